@@ -0,0 +1,149 @@
+"""
+Corretora falsa (HTTP local) com as rotas usadas pelos clientes da OptionMarket,
+para benchmarks sem rede. Cada resposta espera `latencia` segundos, simulando o
+tempo de ida e volta da API real.
+
+Roda em um processo separado (uvicorn), para não disputar o GIL com os
+clientes medidos. Pode ser iniciada sozinha:
+    uv run python benchmarks/corretora_falsa.py --porta 8099 --latencia-ms 50
+"""
+import argparse
+import asyncio
+import base64
+import json
+import re
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, Optional
+from urllib.parse import parse_qsl
+
+
+def criar_token(validade: float = 3600) -> str:
+    """JWT (sem assinatura válida) com a claim 'exp' daqui a `validade` segundos"""
+    def parte(dados: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip("=")
+    return f"{parte({'alg': 'none'})}.{parte({'exp': int(time.time() + validade)})}.assinatura"
+
+
+def criar_app(latencia: float):
+    """
+    App ASGI com login, criar/listar copy-trades e as transições de estado.
+    ASGI puro (sem FastAPI) para a corretora falsa gastar o mínimo de CPU
+    e não virar o gargalo da medição.
+    """
+    copy_trades: Dict[str, dict] = {}
+    transicao = re.compile(r"^/copy-trade/([^/]+)/(inactive|approve-follower|refuse-follower)$")
+
+    def responder(metodo: str, caminho: str, consulta: Dict[str, str], corpo: dict):
+        if metodo == "POST" and caminho == "/auth/login":
+            return 200, {"token": criar_token()}
+
+        if metodo == "POST" and caminho == "/copy-trade":
+            copy_trade = {"id": str(uuid.uuid4()), "traderUserId": corpo.get("traderUserId"), "active": True, "status": "APPROVED"}
+            copy_trades[copy_trade["id"]] = copy_trade
+            return 201, copy_trade
+
+        if metodo == "GET" and caminho == "/copy-trade":
+            pagina, tamanho = int(consulta.get("page", 1)), int(consulta.get("pageSize", 100))
+            return 200, {"data": list(copy_trades.values())[(pagina - 1) * tamanho:pagina * tamanho]}
+
+        encontrado = transicao.match(caminho)
+        if metodo == "PATCH" and encontrado and encontrado.group(1) in copy_trades:
+            if encontrado.group(2) == "inactive":
+                copy_trades[encontrado.group(1)]["active"] = False
+            return 200, {}
+
+        return 404, {"data": {"message": "Not found"}}
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        corpo = b""
+        while True:
+            mensagem = await receive()
+            corpo += mensagem.get("body", b"")
+            if not mensagem.get("more_body"):
+                break
+
+        await asyncio.sleep(latencia)
+        consulta = dict(parse_qsl(scope["query_string"].decode()))
+        status, resposta = responder(scope["method"], scope["path"], consulta, json.loads(corpo or b"{}"))
+
+        dados = json.dumps(resposta).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(dados)).encode())],
+        })
+        await send({"type": "http.response.body", "body": dados})
+
+    return app
+
+
+class CorretoraFalsa:
+    """
+    Inicia a corretora falsa em um subprocesso e espera a porta aceitar conexões.
+
+    Uso:
+        with CorretoraFalsa(latencia=0.05) as corretora:
+            cliente.URL_BASE = corretora.url
+    """
+
+    def __init__(self, latencia: float = 0.05):
+        """
+        Args:
+            latencia: Segundos de espera antes de cada resposta
+        """
+        self.latencia = latencia
+        self.porta = _porta_livre()
+        self._processo: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.porta}"
+
+    def __enter__(self) -> "CorretoraFalsa":
+        self._processo = subprocess.Popen(
+            [sys.executable, __file__, "--porta", str(self.porta), "--latencia-ms", str(self.latencia * 1000)],
+        )
+        limite = time.monotonic() + 15
+        while time.monotonic() < limite:
+            try:
+                socket.create_connection(("127.0.0.1", self.porta), timeout=0.2).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError("Corretora falsa não iniciou")
+
+    def __exit__(self, *args) -> None:
+        if self._processo is not None:
+            self._processo.terminate()
+            self._processo.wait()
+            self._processo = None
+
+
+def _porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--porta", type=int, default=8099)
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    args = parser.parse_args()
+    uvicorn.run(
+        criar_app(args.latencia_ms / 1000),
+        host="127.0.0.1",
+        port=args.porta,
+        log_level="warning",
+        access_log=False,
+        backlog=4096,
+    )
@@ -0,0 +1,93 @@
+"""
+Vazão do cliente síncrono (uma thread por requisição em andamento) contra o
+assíncrono (um event loop, concorrência limitada) seguindo um bot em muitas
+contas na corretora falsa.
+
+Rodar a partir da raiz do repositório:
+    uv run python benchmarks/vazao_option_market.py --contas 500 --latencia-ms 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(RAIZ, "src"), os.path.join(RAIZ, "src", "tradebotmanager")]
+
+import httpx  # noqa: E402
+from corretora_falsa import CorretoraFalsa, criar_token  # noqa: E402
+from tradebotmanager.integracao.option_market.client import ClienteOptionMarket  # noqa: E402
+from tradebotmanager.integracao.option_market.client_async import ClienteOptionMarketAsync  # noqa: E402
+from tradebotmanager.integracao.option_market.limitador import LimitadorRequisicoes  # noqa: E402
+from tradebotmanager.integracao.option_market.repository import OptionMarketRepository  # noqa: E402
+from tradebotmanager.integracao.option_market.repository_async import OptionMarketRepositoryAsync, executar_com_limite  # noqa: E402
+
+# Sem limitação de taxa: mede só o custo do modelo de concorrência
+LIMITADOR_LIVRE = LimitadorRequisicoes(taxa_host=1e9, rajada_host=1e9, taxa_conta=1e9, rajada_conta=1e9)
+
+
+def medir_sincrono(url: str, contas: int, threads: int) -> float:
+    token = criar_token()
+
+    def seguir(indice: int) -> str:
+        # Token válido: o construtor não faz login
+        cliente = ClienteOptionMarket(f"conta{indice}@teste", "senha", token=token)
+        cliente.URL_BASE = url
+        cliente.limitador = LIMITADOR_LIVRE
+        try:
+            return OptionMarketRepository(cliente, cache=None).seguir_bot("trader", 10)
+        finally:
+            cliente.desconectar()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(seguir, range(contas)))
+    return time.perf_counter() - inicio
+
+
+async def medir_assincrono(url: str, contas: int, concorrencia: int) -> float:
+    token = criar_token()
+    async with httpx.AsyncClient(
+        base_url=url,
+        headers=ClienteOptionMarketAsync.CABECALHOS_FIXOS,
+        limits=httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia),
+        timeout=30,
+    ) as sessao:
+        async def seguir(indice: int) -> str:
+            cliente = ClienteOptionMarketAsync(f"conta{indice}@teste", "senha", token=token, sessao=sessao)
+            cliente.limitador = LIMITADOR_LIVRE
+            async with cliente:
+                return await OptionMarketRepositoryAsync(cliente, cache=None).seguir_bot("trader", 10)
+
+        inicio = time.perf_counter()
+        resultados = await executar_com_limite((seguir(i) for i in range(contas)), limite=concorrencia)
+        duracao = time.perf_counter() - inicio
+
+    falhas = [r for r in resultados if isinstance(r, Exception)]
+    if falhas:
+        raise falhas[0]
+    return duracao
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contas", type=int, default=500, help="Contas seguindo o bot (uma requisição cada)")
+    parser.add_argument("--latencia-ms", type=float, default=50, help="Latência de cada resposta da corretora falsa")
+    parser.add_argument("--threads", type=int, default=40, help="Threads do cliente síncrono (threadpool do FastAPI: 40)")
+    parser.add_argument("--concorrencia", type=int, default=50, help="Requisições simultâneas do cliente assíncrono")
+    args = parser.parse_args()
+
+    with CorretoraFalsa(latencia=args.latencia_ms / 1000) as corretora:
+        sincrono = medir_sincrono(corretora.url, args.contas, args.threads)
+        assincrono = asyncio.run(medir_assincrono(corretora.url, args.contas, args.concorrencia))
+
+    print(f"{args.contas} contas, latência {args.latencia_ms:.0f} ms")
+    print(f"  síncrono   ({args.threads} threads):     {sincrono:6.2f} s  {args.contas / sincrono:8.1f} req/s")
+    print(f"  assíncrono ({args.concorrencia} simultâneas): {assincrono:6.2f} s  {args.contas / assincrono:8.1f} req/s")
+    print(f"  ganho: {sincrono / assincrono:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
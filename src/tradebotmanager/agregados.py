@@ -0,0 +1,186 @@
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from instrumentacao_banco import medir_repository
+from unidade_trabalho import confirmar, confirmar_async
+from .bots_option_market.model import BotOptionMarket
+from .bots_usuarios_op_mkt.model import BotUsuarioOpMkt
+from .bots_usuarios_op_mkt.resumo import RECALCULAR_RESUMO, ResumoSeguidoresBot
+from .corretoras_usuarios.model import CorretoraUsuario
+
+
+class Contagem:
+    """Quantidade de registros ativos e inativos de um grupo (bot, corretora ou usuário)"""
+
+    __slots__ = ("ativos", "inativos")
+
+    def __init__(self, ativos: int = 0, inativos: int = 0):
+        self.ativos = ativos
+        self.inativos = inativos
+
+    @property
+    def total(self) -> int:
+        return self.ativos + self.inativos
+
+    def __repr__(self) -> str:
+        return f"Contagem(ativos={self.ativos}, inativos={self.inativos})"
+
+
+def _contagens(linhas: Iterable) -> Dict[int, Contagem]:
+    # Linhas (chave, ativos, inativos); SUM pode vir None em grupo vazio
+    return {chave: Contagem(int(ativos or 0), int(inativos or 0)) for chave, ativos, inativos in linhas}
+
+
+def _ativos(coluna):
+    return func.count().filter(coluna.is_(True))
+
+
+def _inativos(coluna):
+    return func.count().filter(coluna.is_(False))
+
+
+def consulta_seguidores_por_bot(corretora_id: Optional[int] = None, usar_resumo: bool = False):
+    """SELECT bot_id, ativos, inativos; da tabela de resumo ou com GROUP BY nas associações"""
+    if usar_resumo:
+        consulta = select(ResumoSeguidoresBot.bot_option_market_id, ResumoSeguidoresBot.ativos, ResumoSeguidoresBot.inativos)
+        if corretora_id is not None:
+            consulta = consulta.join(BotOptionMarket, BotOptionMarket.id == ResumoSeguidoresBot.bot_option_market_id)\
+                .where(BotOptionMarket.corretora_id == corretora_id)
+        return consulta
+
+    consulta = select(
+        BotUsuarioOpMkt.bot_option_market_id,
+        _ativos(BotUsuarioOpMkt.ativo),
+        _inativos(BotUsuarioOpMkt.ativo),
+    ).group_by(BotUsuarioOpMkt.bot_option_market_id)
+    if corretora_id is not None:
+        consulta = consulta.join(BotOptionMarket).where(BotOptionMarket.corretora_id == corretora_id)
+    return consulta
+
+
+def consulta_seguidores_por_corretora(usar_resumo: bool = False):
+    """SELECT corretora_id, ativos, inativos das associações com bots de cada corretora"""
+    if usar_resumo:
+        return select(
+            BotOptionMarket.corretora_id,
+            func.sum(ResumoSeguidoresBot.ativos),
+            func.sum(ResumoSeguidoresBot.inativos),
+        ).join(BotOptionMarket, BotOptionMarket.id == ResumoSeguidoresBot.bot_option_market_id)\
+            .group_by(BotOptionMarket.corretora_id)
+
+    return select(
+        BotOptionMarket.corretora_id,
+        _ativos(BotUsuarioOpMkt.ativo),
+        _inativos(BotUsuarioOpMkt.ativo),
+    ).join(BotOptionMarket).group_by(BotOptionMarket.corretora_id)
+
+
+def consulta_contas_por_corretora():
+    """SELECT corretora_id, ativas, inativas das contas de usuários"""
+    return select(
+        CorretoraUsuario.corretora_id,
+        _ativos(CorretoraUsuario.ativo),
+        _inativos(CorretoraUsuario.ativo),
+    ).group_by(CorretoraUsuario.corretora_id)
+
+
+def consulta_seguidos_por_usuario(usuario_ids: List[int]):
+    """SELECT usuario_id, ativos, inativos dos bots seguidos por cada usuário"""
+    return select(
+        BotUsuarioOpMkt.usuario_id,
+        _ativos(BotUsuarioOpMkt.ativo),
+        _inativos(BotUsuarioOpMkt.ativo),
+    ).where(BotUsuarioOpMkt.usuario_id.in_(usuario_ids)).group_by(BotUsuarioOpMkt.usuario_id)
+
+
+@medir_repository
+class AgregadosRepository:
+    """
+    Contagens para os painéis, calculadas no banco em uma consulta (GROUP BY),
+    sem carregar objetos. Grupos sem registros não aparecem no resultado:
+    use resultado.get(chave, Contagem()).
+    """
+
+    def __init__(self, sessao: Session, usar_resumo: bool = False):
+        """
+        Args:
+            sessao: Sessão do banco
+            usar_resumo: Lê os seguidores da tabela resumo_seguidores_bot (migration 0003)
+                em vez de contar as associações; custo constante com milhões de associações
+        """
+        self.sessao = sessao
+        self.usar_resumo = usar_resumo
+
+    def seguidores_por_bot(self, corretora_id: Optional[int] = None) -> Dict[int, Contagem]:
+        """
+        Seguidores ativos e inativos de cada bot
+        Args:
+            corretora_id: Só os bots desta corretora; None = todos
+        """
+        return _contagens(self.sessao.execute(consulta_seguidores_por_bot(corretora_id, self.usar_resumo)))
+
+    def seguidores_por_corretora(self) -> Dict[int, Contagem]:
+        """Associações ativas e inativas com bots de cada corretora"""
+        return _contagens(self.sessao.execute(consulta_seguidores_por_corretora(self.usar_resumo)))
+
+    def contas_por_corretora(self) -> Dict[int, Contagem]:
+        """Contas de usuários ativas e inativas em cada corretora"""
+        return _contagens(self.sessao.execute(consulta_contas_por_corretora()))
+
+    def seguidos_por_usuario(self, usuario_ids: List[int]) -> Dict[int, Contagem]:
+        """
+        Bots seguidos (associações ativas e inativas) por cada usuário
+        Args:
+            usuario_ids: IDs dos usuários
+        """
+        if not usuario_ids:
+            return {}
+        return _contagens(self.sessao.execute(consulta_seguidos_por_usuario(usuario_ids)))
+
+    def recalcular_resumo(self) -> None:
+        """Refaz resumo_seguidores_bot a partir das associações (correção de divergência)"""
+        for comando in RECALCULAR_RESUMO:
+            self.sessao.execute(text(comando))
+        confirmar(self.sessao)
+
+
+@medir_repository
+class AgregadosRepositoryAsync:
+    """Versão assíncrona do AgregadosRepository, para uso nos handlers do FastAPI"""
+
+    def __init__(self, sessao: AsyncSession, usar_resumo: bool = False):
+        self.sessao = sessao
+        self.usar_resumo = usar_resumo
+
+    async def seguidores_por_bot(self, corretora_id: Optional[int] = None) -> Dict[int, Contagem]:
+        """
+        Seguidores ativos e inativos de cada bot
+        Args:
+            corretora_id: Só os bots desta corretora; None = todos
+        """
+        return _contagens(await self.sessao.execute(consulta_seguidores_por_bot(corretora_id, self.usar_resumo)))
+
+    async def seguidores_por_corretora(self) -> Dict[int, Contagem]:
+        """Associações ativas e inativas com bots de cada corretora"""
+        return _contagens(await self.sessao.execute(consulta_seguidores_por_corretora(self.usar_resumo)))
+
+    async def contas_por_corretora(self) -> Dict[int, Contagem]:
+        """Contas de usuários ativas e inativas em cada corretora"""
+        return _contagens(await self.sessao.execute(consulta_contas_por_corretora()))
+
+    async def seguidos_por_usuario(self, usuario_ids: List[int]) -> Dict[int, Contagem]:
+        """
+        Bots seguidos (associações ativas e inativas) por cada usuário
+        Args:
+            usuario_ids: IDs dos usuários
+        """
+        if not usuario_ids:
+            return {}
+        return _contagens(await self.sessao.execute(consulta_seguidos_por_usuario(usuario_ids)))
+
+    async def recalcular_resumo(self) -> None:
+        """Refaz resumo_seguidores_bot a partir das associações (correção de divergência)"""
+        for comando in RECALCULAR_RESUMO:
+            await self.sessao.execute(text(comando))
+        await confirmar_async(self.sessao)
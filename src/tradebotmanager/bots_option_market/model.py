@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from database import ModelBase
 
 
 class BotOptionMarket(ModelBase):
     __tablename__ = "bots_option_market"
+    __table_args__ = (
+        # listar_por_corretora e as junções por corretora (em qualquer estado, como na reconciliação)
+        Index("ix_bots_option_market_corretora", "corretora_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     id_perfil = Column(String(100), nullable=True, index=True)
@@ -1,8 +1,13 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from unidade_trabalho import confirmar, recarregar
 from .model import BotOptionMarket
+from ..planos_carga import PlanoCarga, aplicar_plano
 
 
+@medir_repository
 class BotOptionMarketRepository:
     def __init__(self, sessao: Session):
         self.sessao = sessao
@@ -48,53 +53,83 @@ class BotOptionMarketRepository:
         
         return query.all()
 
-    def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True) -> List[BotOptionMarket]:
+    def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None) -> List[BotOptionMarket]:
         """
         Lista bots de uma corretora específica
         Args:
             corretora_id: ID da corretora
             ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.BOT_PAINEL)
         """
         query = self.sessao.query(BotOptionMarket).filter(BotOptionMarket.corretora_id == corretora_id)
         
         if ativo is not None:
             query = query.filter(BotOptionMarket.ativo.is_(ativo))
         
-        return query.all()
+        return aplicar_plano(query, plano).all()
     
     def criar(self, bot: BotOptionMarket) -> BotOptionMarket:
         """Cria novo bot"""
         self.sessao.add(bot)
-        self.sessao.commit()
-        self.sessao.refresh(bot)
+        confirmar(self.sessao)
+        recarregar(self.sessao, bot)
         return bot
 
     def atualizar(self, bot: BotOptionMarket) -> BotOptionMarket:
         """Atualiza bot existente"""
-        self.sessao.commit()
-        self.sessao.refresh(bot)
+        confirmar(self.sessao)
+        recarregar(self.sessao, bot)
         return bot
 
+    def atualizar_por_id(self, bot_id: int, dados: Dict[str, Any]) -> Optional[BotOptionMarket]:
+        """
+        Atualiza campos do bot com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            bot_id: ID do bot
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Bot atualizado, ou None se não existe
+        """
+        return operacoes_lote.atualizar_por_id(self.sessao, BotOptionMarket, bot_id, dados)
+
+    def criar_em_lote(self, bots: List[BotOptionMarket]) -> List[BotOptionMarket]:
+        """
+        Cria vários registros com INSERT em lote (RETURNING) e um único commit
+        Args:
+            bots: Bots novos
+        Returns:
+            Bots criados, com id, na mesma ordem
+        """
+        return operacoes_lote.criar_em_lote(self.sessao, bots)
+
+    def atualizar_em_lote(self, alteracoes: List[Dict[str, Any]]) -> int:
+        """
+        Atualiza vários bots pelo id com UPDATE em lote e um único commit
+        Args:
+            alteracoes: Um dicionário por bot, com "id" e os campos a alterar
+        """
+        return operacoes_lote.atualizar_em_lote(self.sessao, BotOptionMarket, alteracoes)
+
+    def desativar_em_lote(self, bot_ids: List[int]) -> List[int]:
+        """
+        Soft delete de vários bots com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs desativados (os que estavam ativos)
+        """
+        return operacoes_lote.definir_ativo_em_lote(self.sessao, BotOptionMarket, bot_ids, False)
+
+    def ativar_em_lote(self, bot_ids: List[int]) -> List[int]:
+        """
+        Reativa vários bots com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs ativados (os que estavam inativos)
+        """
+        return operacoes_lote.definir_ativo_em_lote(self.sessao, BotOptionMarket, bot_ids, True)
+
     def desativar(self, bot_id: int) -> bool:
-        """Soft delete - marca bot como inativo"""
-        bot = self.buscar_por_id(bot_id)
-        if bot:
-            # Usar update query para evitar problemas de tipo
-            self.sessao.query(BotOptionMarket)\
-                .filter(BotOptionMarket.id == bot_id)\
-                .update({BotOptionMarket.ativo: False})
-            self.sessao.commit()
-            return True
-        return False
+        """Soft delete - marca bot como inativo com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, BotOptionMarket, bot_id, False)
 
     def ativar(self, bot_id: int) -> bool:
-        """Reativa bot inativo"""
-        # Busca bot mesmo se inativo
-        bot = self.sessao.query(BotOptionMarket).filter(BotOptionMarket.id == bot_id).first()
-        if bot:
-            self.sessao.query(BotOptionMarket)\
-                .filter(BotOptionMarket.id == bot_id)\
-                .update({BotOptionMarket.ativo: True})
-            self.sessao.commit()
-            return True
-        return False
\ No newline at end of file
+        """Reativa bot inativo com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, BotOptionMarket, bot_id, True)
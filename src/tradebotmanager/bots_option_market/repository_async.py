@@ -0,0 +1,134 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from unidade_trabalho import confirmar_async, recarregar_async
+from .model import BotOptionMarket
+from ..planos_carga import PlanoCarga, aplicar_plano
+
+
+@medir_repository
+class BotOptionMarketRepositoryAsync:
+    """Versão assíncrona do BotOptionMarketRepository, para uso nos handlers do FastAPI"""
+
+    def __init__(self, sessao: AsyncSession):
+        self.sessao = sessao
+
+    async def buscar_por_id(self, bot_id: int) -> Optional[BotOptionMarket]:
+        """
+        Busca bot por ID
+        Args:
+            bot_id: ID do bot
+        """
+        return await self.sessao.scalar(select(BotOptionMarket).where(BotOptionMarket.id == bot_id))
+
+    async def buscar_por_id_perfil(self, id_perfil: str) -> Optional[BotOptionMarket]:
+        """
+        Busca bot por ID do perfil na OptionMarket
+        Args:
+            id_perfil: ID do perfil
+        """
+        return await self.sessao.scalar(select(BotOptionMarket).where(BotOptionMarket.id_perfil == id_perfil))
+
+    async def buscar_por_nome(self, nome: str) -> Optional[BotOptionMarket]:
+        """
+        Busca bot por nome
+        Args:
+            nome: Nome do bot
+        """
+        return await self.sessao.scalar(select(BotOptionMarket).where(BotOptionMarket.nome == nome))
+
+    async def listar_bots(self, ativo: Optional[bool] = True) -> List[BotOptionMarket]:
+        """
+        Lista bots com filtro de status
+        Args:
+            ativo: True=só ativos, False=só inativos, None=todos
+        """
+        consulta = select(BotOptionMarket)
+
+        if ativo is not None:
+            consulta = consulta.where(BotOptionMarket.ativo.is_(ativo))
+
+        return list(await self.sessao.scalars(consulta))
+
+    async def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None) -> List[BotOptionMarket]:
+        """
+        Lista bots de uma corretora específica
+        Args:
+            corretora_id: ID da corretora
+            ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.BOT_PAINEL)
+        """
+        consulta = select(BotOptionMarket).where(BotOptionMarket.corretora_id == corretora_id)
+
+        if ativo is not None:
+            consulta = consulta.where(BotOptionMarket.ativo.is_(ativo))
+
+        return list((await self.sessao.scalars(aplicar_plano(consulta, plano))).unique())
+
+    async def criar(self, bot: BotOptionMarket) -> BotOptionMarket:
+        """Cria novo bot"""
+        self.sessao.add(bot)
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, bot)
+        return bot
+
+    async def atualizar(self, bot: BotOptionMarket) -> BotOptionMarket:
+        """Atualiza bot existente"""
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, bot)
+        return bot
+
+    async def atualizar_por_id(self, bot_id: int, dados: Dict[str, Any]) -> Optional[BotOptionMarket]:
+        """
+        Atualiza campos do bot com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            bot_id: ID do bot
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Bot atualizado, ou None se não existe
+        """
+        return await operacoes_lote.atualizar_por_id_async(self.sessao, BotOptionMarket, bot_id, dados)
+
+    async def criar_em_lote(self, bots: List[BotOptionMarket]) -> List[BotOptionMarket]:
+        """
+        Cria vários registros com INSERT em lote (RETURNING) e um único commit
+        Args:
+            bots: Bots novos
+        Returns:
+            Bots criados, com id, na mesma ordem
+        """
+        return await operacoes_lote.criar_em_lote_async(self.sessao, bots)
+
+    async def atualizar_em_lote(self, alteracoes: List[Dict[str, Any]]) -> int:
+        """
+        Atualiza vários bots pelo id com UPDATE em lote e um único commit
+        Args:
+            alteracoes: Um dicionário por bot, com "id" e os campos a alterar
+        """
+        return await operacoes_lote.atualizar_em_lote_async(self.sessao, BotOptionMarket, alteracoes)
+
+    async def desativar_em_lote(self, bot_ids: List[int]) -> List[int]:
+        """
+        Soft delete de vários bots com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs desativados (os que estavam ativos)
+        """
+        return await operacoes_lote.definir_ativo_em_lote_async(self.sessao, BotOptionMarket, bot_ids, False)
+
+    async def ativar_em_lote(self, bot_ids: List[int]) -> List[int]:
+        """
+        Reativa vários bots com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs ativados (os que estavam inativos)
+        """
+        return await operacoes_lote.definir_ativo_em_lote_async(self.sessao, BotOptionMarket, bot_ids, True)
+
+    async def desativar(self, bot_id: int) -> bool:
+        """Soft delete - marca bot como inativo com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, BotOptionMarket, bot_id, False)
+
+    async def ativar(self, bot_id: int) -> bool:
+        """Reativa bot inativo com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, BotOptionMarket, bot_id, True)
@@ -0,0 +1,80 @@
+from typing import Optional
+from cache_catalogo import CacheCatalogo, RepositoryComCache, Retrato, cache_bots
+from .repository import BotOptionMarketRepository
+from .repository_async import BotOptionMarketRepositoryAsync
+
+# Métodos que alteram bots e, por isso, invalidam o cache
+ESCRITAS = (
+    "criar", "atualizar", "atualizar_por_id", "desativar", "ativar",
+    "criar_em_lote", "atualizar_em_lote", "desativar_em_lote", "ativar_em_lote",
+)
+
+
+class BotOptionMarketRepositoryCache(RepositoryComCache):
+    """
+    BotOptionMarketRepository com cache de leitura nas buscas por id, id_perfil e nome.
+    As buscas devolvem Retrato (somente leitura, sem sessão); para alterar
+    um bot, use os métodos de escrita do repository, que invalidam o cache.
+    """
+
+    metodos_escrita = ESCRITAS
+
+    def __init__(self, repository: BotOptionMarketRepository, cache: CacheCatalogo = cache_bots):
+        super().__init__(repository, cache)
+
+    def buscar_por_id(self, bot_id: int) -> Optional[Retrato]:
+        """
+        Busca bot por ID, pelo cache
+        Args:
+            bot_id: ID do bot
+        """
+        return self.cache.obter_ou_carregar(("id", bot_id), lambda: self.repository.buscar_por_id(bot_id))
+
+    def buscar_por_id_perfil(self, id_perfil: str) -> Optional[Retrato]:
+        """
+        Busca bot por ID do perfil na OptionMarket, pelo cache
+        Args:
+            id_perfil: ID do perfil
+        """
+        return self.cache.obter_ou_carregar(("id_perfil", id_perfil), lambda: self.repository.buscar_por_id_perfil(id_perfil))
+
+    def buscar_por_nome(self, nome: str) -> Optional[Retrato]:
+        """
+        Busca bot por nome, pelo cache
+        Args:
+            nome: Nome do bot
+        """
+        return self.cache.obter_ou_carregar(("nome", nome), lambda: self.repository.buscar_por_nome(nome))
+
+
+class BotOptionMarketRepositoryCacheAsync(RepositoryComCache):
+    """Versão assíncrona do BotOptionMarketRepositoryCache; compartilha o mesmo cache"""
+
+    metodos_escrita = ESCRITAS
+
+    def __init__(self, repository: BotOptionMarketRepositoryAsync, cache: CacheCatalogo = cache_bots):
+        super().__init__(repository, cache)
+
+    async def buscar_por_id(self, bot_id: int) -> Optional[Retrato]:
+        """
+        Busca bot por ID, pelo cache
+        Args:
+            bot_id: ID do bot
+        """
+        return await self.cache.obter_ou_carregar_async(("id", bot_id), lambda: self.repository.buscar_por_id(bot_id))
+
+    async def buscar_por_id_perfil(self, id_perfil: str) -> Optional[Retrato]:
+        """
+        Busca bot por ID do perfil na OptionMarket, pelo cache
+        Args:
+            id_perfil: ID do perfil
+        """
+        return await self.cache.obter_ou_carregar_async(("id_perfil", id_perfil), lambda: self.repository.buscar_por_id_perfil(id_perfil))
+
+    async def buscar_por_nome(self, nome: str) -> Optional[Retrato]:
+        """
+        Busca bot por nome, pelo cache
+        Args:
+            nome: Nome do bot
+        """
+        return await self.cache.obter_ou_carregar_async(("nome", nome), lambda: self.repository.buscar_por_nome(nome))
@@ -1,10 +1,28 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from database import ModelBase
 
+# Linhas que entram no índice único de copy_trade_id: vazios ("" de registros
+# antigos) não identificam um copy trade e podem se repetir
+COPY_TRADE_ID_PREENCHIDO = "copy_trade_id IS NOT NULL AND copy_trade_id <> ''"
+
 
 class BotUsuarioOpMkt(ModelBase):
     __tablename__ = "bots_usuarios_op_mkt"
+    __table_args__ = (
+        # buscar_por_usuario_e_bot / listar_por_usuario
+        Index("ix_bots_usuarios_op_mkt_usuario_bot", "usuario_id", "bot_option_market_id"),
+        # listar_por_bot e listar_por_corretora só das associações ativas
+        Index("ix_bots_usuarios_op_mkt_bot_ativo", "bot_option_market_id", postgresql_where=text("ativo")),
+        # O copy trade é criado pela corretora; um id nunca pertence a duas associações
+        Index(
+            "uq_bots_usuarios_op_mkt_copy_trade_id",
+            "copy_trade_id",
+            unique=True,
+            postgresql_where=text(COPY_TRADE_ID_PREENCHIDO),
+            sqlite_where=text(COPY_TRADE_ID_PREENCHIDO),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
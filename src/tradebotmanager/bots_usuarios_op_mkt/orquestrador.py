@@ -0,0 +1,206 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List
+from sqlalchemy.orm import Session
+from unidade_trabalho import desfazer
+from .model import BotUsuarioOpMkt
+from .repository import BotUsuarioOpMktRepository
+from ..bots_option_market.model import BotOptionMarket
+from ..corretoras_usuarios.repository import CorretoraUsuarioRepository
+from ..integracao.option_market.client_async import ClienteOptionMarketAsync
+from ..integracao.option_market.repository_async import OptionMarketRepositoryAsync, executar_com_limite
+from ..integracao.option_market.tokens import obter_gerenciador_token
+
+
+class ResultadoLote:
+    """Resultado de uma operação em lote, por usuário"""
+
+    def __init__(self):
+        # usuario_id -> copy_trade_id
+        self.sucessos: Dict[int, str] = {}
+        # usuario_id -> mensagem de erro
+        self.falhas: Dict[int, str] = {}
+
+    def __repr__(self) -> str:
+        return f"ResultadoLote(sucessos={len(self.sucessos)}, falhas={len(self.falhas)})"
+
+
+class OrquestradorSeguidores:
+    """
+    Segue ou deixa de seguir um bot para muitos usuários de uma vez.
+
+    As chamadas à corretora rodam em paralelo, limitadas no total e por
+    conta, compartilhando um único pool de conexões. Falhas de uma conta não
+    interrompem as demais. O acesso ao banco (síncrono) roda em uma thread,
+    um de cada vez, para não bloquear o event loop. Os sucessos são gravados no banco em lotes de
+    `tamanho_lote` à medida que concluem (e o restante ao final, mesmo se a
+    execução for interrompida), para que uma queda no meio não deixe
+    copy-trades criados na corretora sem registro no banco.
+    """
+
+    def __init__(self, sessao: Session, limite_global: int = 50, limite_por_conta: int = 2, tamanho_lote: int = 50):
+        """
+        Args:
+            sessao: Sessão do banco
+            limite_global: Máximo de chamadas simultâneas à corretora
+            limite_por_conta: Máximo de chamadas simultâneas de uma mesma conta
+            tamanho_lote: Sucessos acumulados antes de cada gravação no banco
+        """
+        self.sessao = sessao
+        self.limite_global = limite_global
+        self.limite_por_conta = limite_por_conta
+        self.tamanho_lote = tamanho_lote
+        self.associacoes = BotUsuarioOpMktRepository(sessao)
+        self.contas = CorretoraUsuarioRepository(sessao)
+
+    async def seguir(self, bot: BotOptionMarket, usuario_ids: List[int], max_balance_to_use: float) -> ResultadoLote:
+        """
+        Segue o bot com a conta de cada usuário na corretora do bot.
+        Usuários que já seguem o bot são ignorados; associações inativas são reativadas.
+
+        Args:
+            bot: Bot a seguir
+            usuario_ids: IDs dos usuários
+            max_balance_to_use: Saldo máximo usado pelo copy-trade de cada usuário
+        """
+        resultado = ResultadoLote()
+        associacoes = await asyncio.to_thread(self.associacoes.listar_por_bot, bot.id, ativo=None)
+        existentes = {a.usuario_id: a for a in associacoes}
+        pendentes = [
+            usuario_id for usuario_id in usuario_ids
+            if not (usuario_id in existentes and existentes[usuario_id].ativo)
+        ]
+
+        async def seguir_conta(usuario_id: int, repository: OptionMarketRepositoryAsync) -> str:
+            return await repository.seguir_bot(bot.id_perfil, max_balance_to_use)
+
+        def gravar(usuario_ids: List[int]) -> None:
+            associacoes = []
+            for usuario_id in usuario_ids:
+                associacao = existentes.get(usuario_id) or BotUsuarioOpMkt(
+                    usuario_id=usuario_id, bot_option_market_id=bot.id
+                )
+                associacao.copy_trade_id = resultado.sucessos[usuario_id]
+                associacao.ativo = True
+                associacoes.append(associacao)
+            self.associacoes.salvar_em_lote(associacoes)
+
+        await self._executar(bot.corretora_id, pendentes, seguir_conta, resultado, gravar)
+        return resultado
+
+    async def deixar_de_seguir_todos(self, bot: BotOptionMarket) -> ResultadoLote:
+        """
+        Deixa de seguir o bot para todos os usuários que o seguem (ex: ao desativar o bot).
+        Associações ativas sem copy_trade_id não podem ser desfeitas na corretora e
+        entram como falha, para serem reconciliadas.
+        """
+        resultado = ResultadoLote()
+        ativas: Dict[int, BotUsuarioOpMkt] = {}
+        for associacao in await asyncio.to_thread(self.associacoes.listar_por_bot, bot.id, ativo=True):
+            if associacao.copy_trade_id:
+                ativas[associacao.usuario_id] = associacao
+            else:
+                resultado.falhas[associacao.usuario_id] = "Associação ativa sem copy_trade_id"
+
+        # Lidos antes de começar: um commit na thread de gravação expira os objetos da sessão
+        copy_trades = {usuario_id: associacao.copy_trade_id for usuario_id, associacao in ativas.items()}
+
+        async def deixar_de_seguir_conta(usuario_id: int, repository: OptionMarketRepositoryAsync) -> str:
+            copy_trade_id = copy_trades[usuario_id]
+            if not await repository.deixar_de_seguir_bot(copy_trade_id):
+                raise RuntimeError("Copy-trade continua ativo na corretora")
+            return copy_trade_id
+
+        def gravar(usuario_ids: List[int]) -> None:
+            self.associacoes.desativar_em_lote([ativas[usuario_id].id for usuario_id in usuario_ids])
+
+        await self._executar(bot.corretora_id, list(ativas), deixar_de_seguir_conta, resultado, gravar)
+        return resultado
+
+    async def _executar(
+        self,
+        corretora_id: int,
+        usuario_ids: List[int],
+        operacao: Callable[[int, OptionMarketRepositoryAsync], Awaitable[str]],
+        resultado: ResultadoLote,
+        gravar: Callable[[List[int]], None],
+    ) -> None:
+        """
+        Executa a operação na conta de cada usuário, em paralelo, preenchendo o
+        resultado e gravando os sucessos em lotes de `tamanho_lote`
+
+        Args:
+            corretora_id: Corretora das contas usadas
+            usuario_ids: IDs dos usuários
+            operacao: Corrotina que recebe (usuario_id, repository da conta) e devolve o copy_trade_id
+            resultado: Resultado a preencher
+            gravar: Grava no banco (com commit) os sucessos dos usuários informados
+        """
+        contas = {
+            c.usuario_id: c
+            for c in await asyncio.to_thread(self.contas.listar_por_usuarios, usuario_ids, corretora_id)
+        }
+        for usuario_id in usuario_ids:
+            if usuario_id not in contas:
+                resultado.falhas[usuario_id] = "Usuário sem conta ativa na corretora"
+
+        # Credenciais lidas antes de começar: um commit na thread de gravação
+        # expira os objetos da sessão, e recarregá-los no event loop concorreria com ela
+        credenciais = {
+            usuario_id: (conta.id, conta.login, conta.senha, obter_gerenciador_token(conta))
+            for usuario_id, conta in contas.items()
+        }
+        travas_conta: Dict[int, asyncio.Semaphore] = {}
+        # Sucessos ainda não gravados no banco
+        a_gravar: List[int] = []
+        # A sessão não pode ser usada por duas threads ao mesmo tempo
+        trava_gravacao = asyncio.Lock()
+
+        def gravar_lote(lote: List[int]) -> None:
+            try:
+                gravar(lote)
+            except Exception as exc:
+                # A corretora aplicou a operação, mas o banco não registrou: vira falha para ser reconciliada
+                desfazer(self.sessao)
+                for usuario_id in lote:
+                    copy_trade_id = resultado.sucessos.pop(usuario_id)
+                    resultado.falhas[usuario_id] = f"Aplicado na corretora ({copy_trade_id}), falha ao gravar: {exc}"
+
+        async def descarregar() -> None:
+            async with trava_gravacao:
+                if not a_gravar:
+                    return
+                lote = a_gravar[:]
+                a_gravar.clear()
+                await asyncio.to_thread(gravar_lote, lote)
+
+        async with ClienteOptionMarketAsync.criar_sessao(max_conexoes=self.limite_global) as sessao_http:
+
+            async def executar_conta(usuario_id: int) -> None:
+                conta_id, login, senha, gerenciador_token = credenciais[usuario_id]
+                trava = travas_conta.setdefault(conta_id, asyncio.Semaphore(self.limite_por_conta))
+                async with trava:
+                    try:
+                        cliente = ClienteOptionMarketAsync(
+                            login,
+                            senha,
+                            gerenciador_token=gerenciador_token,
+                            sessao=sessao_http,
+                        )
+                        repository = OptionMarketRepositoryAsync(cliente)
+                        resultado.sucessos[usuario_id] = await operacao(usuario_id, repository)
+                    except Exception as exc:
+                        resultado.falhas[usuario_id] = str(exc)
+                        return
+
+                a_gravar.append(usuario_id)
+                if len(a_gravar) >= self.tamanho_lote:
+                    await descarregar()
+
+            try:
+                await executar_com_limite(
+                    (executar_conta(usuario_id) for usuario_id in credenciais),
+                    limite=self.limite_global,
+                )
+            finally:
+                await descarregar()
+
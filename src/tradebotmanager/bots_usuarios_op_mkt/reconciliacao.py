@@ -0,0 +1,272 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from metricas import registro_metricas
+from .repository_async import BotUsuarioOpMktRepositoryAsync
+from ..corretoras_usuarios.model import CorretoraUsuario
+from ..corretoras_usuarios.repository_async import CorretoraUsuarioRepositoryAsync
+from ..integracao.option_market.client_async import ClienteOptionMarketAsync
+from ..integracao.option_market.repository_async import OptionMarketRepositoryAsync
+from ..integracao.option_market.tokens import obter_gerenciador_token
+
+# (id, usuario_id, copy_trade_id, ativo, id_perfil do bot)
+Linha = Tuple[int, int, Optional[str], bool, Optional[str]]
+
+# Tipos de divergência entre o banco e a corretora
+INATIVO_NA_CORRETORA = "inativo_na_corretora"
+AUSENTE_NA_CORRETORA = "ausente_na_corretora"
+ATIVO_NA_CORRETORA = "ativo_na_corretora"
+SEM_COPY_TRADE_ID = "sem_copy_trade_id"
+DESCONHECIDO_NO_BANCO = "desconhecido_no_banco"
+
+divergencias_encontradas = registro_metricas.contador(
+    "reconciliacao_divergencias_total",
+    "Divergências entre banco e corretora encontradas pela reconciliação",
+    ("tipo",),
+)
+
+# corretora_id -> posição da próxima conta a verificar, para que passadas
+# interrompidas pelo prazo continuem de onde pararam
+_cursores: Dict[int, int] = {}
+
+
+class RelatorioReconciliacao:
+    """Divergências encontradas e correções aplicadas em uma passada"""
+
+    def __init__(self):
+        self.contas_verificadas = 0
+        self.contas_nao_verificadas = 0
+        # conta_id -> mensagem de erro da listagem
+        self.falhas: Dict[int, str] = {}
+        # tipo -> IDs das associações (ou copy-trades, para desconhecido_no_banco)
+        self.divergencias: Dict[str, List[Any]] = defaultdict(list)
+        self.corrigidas = 0
+        self.duracao = 0.0
+        self.prazo_esgotado = False
+
+    def registrar(self, tipo: str, identificador: Any) -> None:
+        self.divergencias[tipo].append(identificador)
+        divergencias_encontradas.incrementar(tipo)
+
+    def resumo(self) -> Dict[str, Any]:
+        """Contagens da passada, para log e resposta de API"""
+        return {
+            "contas_verificadas": self.contas_verificadas,
+            "contas_nao_verificadas": self.contas_nao_verificadas,
+            "contas_com_falha": len(self.falhas),
+            "divergencias": {tipo: len(itens) for tipo, itens in self.divergencias.items()},
+            "corrigidas": self.corrigidas,
+            "duracao": round(self.duracao, 3),
+            "prazo_esgotado": self.prazo_esgotado,
+        }
+
+    def __repr__(self) -> str:
+        return f"RelatorioReconciliacao({self.resumo()})"
+
+
+class CorrecoesLote:
+    """
+    Correções de um lote de contas, aplicadas juntas em uma transação.
+    Guardam o estado lido no retrato, para que cada UPDATE só altere a
+    linha que continua como foi lida.
+    """
+
+    def __init__(self):
+        # associacao_id -> copy_trade_id lido
+        self.ativar: Dict[int, str] = {}
+        self.desativar: Dict[int, str] = {}
+        # associacao_id -> (copy_trade_id a gravar, ativo lido)
+        self.copy_trade_ids: Dict[int, Tuple[str, bool]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ativar) + len(self.desativar) + len(self.copy_trade_ids)
+
+
+class IndiceAssociacoes:
+    """
+    Associações de uma corretora indexadas em dicionários, montado a partir
+    de uma única consulta ao banco, para comparar com as listagens sem
+    consultas por linha.
+    """
+
+    def __init__(self, linhas: List[Linha]):
+        self.por_usuario: Dict[int, List[Linha]] = defaultdict(list)
+        # (usuario_id, id_perfil) -> associações ainda sem copy_trade_id
+        self.sem_copy_trade: Dict[Tuple[int, Optional[str]], List[Linha]] = defaultdict(list)
+
+        for linha in linhas:
+            _, usuario_id, copy_trade_id, _, id_perfil = linha
+            self.por_usuario[usuario_id].append(linha)
+            if not copy_trade_id:
+                self.sem_copy_trade[(usuario_id, id_perfil)].append(linha)
+
+
+class Reconciliador:
+    """
+    Reconcilia BotUsuarioOpMkt (ativo/copy_trade_id) com o que a corretora informa.
+
+    Uma passada:
+    - carrega todas as associações da corretora com uma consulta na primária e indexa em memória
+    - percorre as contas ativas em lotes; em cada lote as listagens de copy-trade
+      das contas são lidas em paralelo, compartilhando um pool de conexões
+    - compara cada listagem com o índice e aplica as correções do lote com
+      UPDATEs em lote, numa única transação, condicionados ao estado lido:
+      associações alteradas durante a passada ficam para a próxima
+    - respeita um prazo total; as contas que ficaram de fora são as primeiras
+      da próxima passada
+    """
+
+    def __init__(
+        self,
+        sessao: AsyncSession,
+        corretora_id: int,
+        prazo: float = 300,
+        tamanho_lote: int = 500,
+        limite_global: int = 50,
+        aplicar: bool = True,
+    ):
+        """
+        Args:
+            sessao: Sessão assíncrona do banco
+            corretora_id: Corretora (OptionMarket) cujas contas são reconciliadas
+            prazo: Segundos disponíveis para a passada inteira
+            tamanho_lote: Contas por lote (e por transação)
+            limite_global: Máximo de listagens simultâneas na corretora
+            aplicar: False apenas relata as divergências, sem alterar o banco
+        """
+        self.sessao = sessao
+        self.corretora_id = corretora_id
+        self.prazo = prazo
+        self.tamanho_lote = tamanho_lote
+        self.limite_global = limite_global
+        self.aplicar = aplicar
+        self.associacoes = BotUsuarioOpMktRepositoryAsync(sessao)
+        self.contas = CorretoraUsuarioRepositoryAsync(sessao)
+
+    async def executar(self) -> RelatorioReconciliacao:
+        """Executa uma passada de reconciliação e retorna o relatório"""
+        inicio = time.monotonic()
+        limite = inicio + self.prazo
+        relatorio = RelatorioReconciliacao()
+
+        contas = await self.contas.listar_por_corretora(self.corretora_id, ativo=True)
+        if contas:
+            cursor = _cursores.get(self.corretora_id, 0) % len(contas)
+            contas = contas[cursor:] + contas[:cursor]
+        indice = IndiceAssociacoes(await self.associacoes.listar_estado_por_corretora(self.corretora_id))
+
+        async with ClienteOptionMarketAsync.criar_sessao(max_conexoes=self.limite_global) as sessao_http:
+            for posicao in range(0, len(contas), self.tamanho_lote):
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    relatorio.prazo_esgotado = True
+                    break
+
+                lote = contas[posicao:posicao + self.tamanho_lote]
+                listagens = await self._ler_listagens(lote, sessao_http, restante, relatorio)
+
+                correcoes = CorrecoesLote()
+                for conta in lote:
+                    if conta.id in listagens:
+                        self._comparar(conta, listagens[conta.id], indice, correcoes, relatorio)
+
+                if self.aplicar and correcoes:
+                    relatorio.corrigidas += await self.associacoes.aplicar_correcoes(
+                        correcoes.ativar, correcoes.desativar, correcoes.copy_trade_ids
+                    )
+
+        relatorio.contas_nao_verificadas = len(contas) - relatorio.contas_verificadas - len(relatorio.falhas)
+        if contas:
+            _cursores[self.corretora_id] = (
+                _cursores.get(self.corretora_id, 0) + relatorio.contas_verificadas + len(relatorio.falhas)
+            ) % len(contas)
+        relatorio.duracao = time.monotonic() - inicio
+        return relatorio
+
+    async def _ler_listagens(
+        self,
+        lote: List[CorretoraUsuario],
+        sessao_http: Any,
+        prazo: float,
+        relatorio: RelatorioReconciliacao,
+    ) -> Dict[int, Dict[str, dict]]:
+        """
+        Lê em paralelo a listagem completa (ativos e inativos) de cada conta do lote
+
+        Returns:
+            conta_id -> {copy_trade_id: copy-trade}, só das contas lidas até o fim dentro do prazo
+        """
+        semaforo = asyncio.Semaphore(self.limite_global)
+
+        async def ler_conta(conta: CorretoraUsuario) -> Dict[str, dict]:
+            async with semaforo:
+                cliente = ClienteOptionMarketAsync(
+                    conta.login,
+                    conta.senha,
+                    gerenciador_token=obter_gerenciador_token(conta),
+                    sessao=sessao_http,
+                )
+                # Sem cache: a reconciliação precisa do estado atual da corretora
+                repository = OptionMarketRepositoryAsync(cliente, cache=None)
+                return {bot["id"]: bot async for bot in repository.iterar_bots(ativo=None, pre_carregar=True)}
+
+        tarefas = {asyncio.create_task(ler_conta(conta)): conta for conta in lote}
+        concluidas, pendentes = await asyncio.wait(tarefas, timeout=prazo)
+        for tarefa in pendentes:
+            tarefa.cancel()
+        if pendentes:
+            relatorio.prazo_esgotado = True
+            await asyncio.gather(*pendentes, return_exceptions=True)
+
+        listagens: Dict[int, Dict[str, dict]] = {}
+        for tarefa in concluidas:
+            conta = tarefas[tarefa]
+            if tarefa.exception() is not None:
+                relatorio.falhas[conta.id] = str(tarefa.exception())
+            else:
+                listagens[conta.id] = tarefa.result()
+                relatorio.contas_verificadas += 1
+        return listagens
+
+    def _comparar(
+        self,
+        conta: CorretoraUsuario,
+        listagem: Dict[str, dict],
+        indice: IndiceAssociacoes,
+        correcoes: CorrecoesLote,
+        relatorio: RelatorioReconciliacao,
+    ) -> None:
+        """Compara a listagem da conta com as associações do usuário, acumulando as correções"""
+        conhecidos = set()
+
+        for associacao_id, _, copy_trade_id, ativo, _ in indice.por_usuario.get(conta.usuario_id, ()):
+            if not copy_trade_id:
+                continue
+            conhecidos.add(copy_trade_id)
+            bot = listagem.get(copy_trade_id)
+            if bot is None:
+                if ativo:
+                    relatorio.registrar(AUSENTE_NA_CORRETORA, associacao_id)
+                    correcoes.desativar[associacao_id] = copy_trade_id
+            elif bot.get("active", True) and not ativo:
+                relatorio.registrar(ATIVO_NA_CORRETORA, associacao_id)
+                correcoes.ativar[associacao_id] = copy_trade_id
+            elif not bot.get("active", True) and ativo:
+                relatorio.registrar(INATIVO_NA_CORRETORA, associacao_id)
+                correcoes.desativar[associacao_id] = copy_trade_id
+
+        # Copy-trades ativos que o banco não conhece: se houver associação do
+        # usuário com o mesmo trader e sem copy_trade_id, completa; senão só relata
+        for copy_trade_id, bot in listagem.items():
+            if copy_trade_id in conhecidos or not bot.get("active", True):
+                continue
+            candidatas = indice.sem_copy_trade.get((conta.usuario_id, bot.get("traderUserId")))
+            if candidatas:
+                associacao_id, _, _, ativo, _ = candidatas.pop(0)
+                relatorio.registrar(SEM_COPY_TRADE_ID, associacao_id)
+                # O mesmo UPDATE grava o copy_trade_id e ativa a associação
+                correcoes.copy_trade_ids[associacao_id] = (copy_trade_id, ativo)
+            else:
+                relatorio.registrar(DESCONHECIDO_NO_BANCO, copy_trade_id)
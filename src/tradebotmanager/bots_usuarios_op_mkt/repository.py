@@ -1,8 +1,16 @@
+from sqlalchemy import Select, or_, select, text, tuple_, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from .model import BotUsuarioOpMkt
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from paginacao import TAMANHO_LOTE_STREAM, iterar, paginar
+from roteamento_banco import LER_DA_PRIMARIA
+from unidade_trabalho import confirmar, desfazer, recarregar
+from .model import COPY_TRADE_ID_PREENCHIDO, BotUsuarioOpMkt
+from ..planos_carga import PlanoCarga, aplicar_plano
 
 
+@medir_repository
 class BotUsuarioOpMktRepository:
     def __init__(self, sessao: Session):
         self.sessao = sessao
@@ -33,44 +41,54 @@ class BotUsuarioOpMktRepository:
         Args:
             copy_trade_id: ID do copy trade
         
-        Para validar se copy_trade_id já existe, use: buscar_por_copy_trade_id(copy_trade_id) is not None
+        Para validar se copy_trade_id já existe, use: buscar_por_copy_trade_id(copy_trade_id) is not None.
+        Um copy_trade_id vazio não identifica associação e devolve None.
         """
-        return self.sessao.query(BotUsuarioOpMkt).filter(BotUsuarioOpMkt.copy_trade_id == copy_trade_id).first()
+        return self.sessao.scalar(consulta_por_copy_trade_id(copy_trade_id))
 
-    def listar_por_usuario(self, usuario_id: int, ativo: Optional[bool] = True) -> List[BotUsuarioOpMkt]:
+    def listar_por_usuario(self, usuario_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[BotUsuarioOpMkt]:
         """
         Lista associações de um usuário
         Args:
             usuario_id: ID do usuário
             ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.ASSOCIACAO_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
         """
         query = self.sessao.query(BotUsuarioOpMkt).filter(BotUsuarioOpMkt.usuario_id == usuario_id)
         
         if ativo is not None:
             query = query.filter(BotUsuarioOpMkt.ativo.is_(ativo))
         
-        return query.all()
+        return aplicar_plano(paginar(query, BotUsuarioOpMkt, apos_id, limite), plano).all()
 
-    def listar_por_bot(self, bot_id: int, ativo: Optional[bool] = True) -> List[BotUsuarioOpMkt]:
+    def listar_por_bot(self, bot_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[BotUsuarioOpMkt]:
         """
         Lista associações de um bot
         Args:
             bot_id: ID do bot
             ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.ASSOCIACAO_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
         """
         query = self.sessao.query(BotUsuarioOpMkt).filter(BotUsuarioOpMkt.bot_option_market_id == bot_id)
         
         if ativo is not None:
             query = query.filter(BotUsuarioOpMkt.ativo.is_(ativo))
         
-        return query.all()
+        return aplicar_plano(paginar(query, BotUsuarioOpMkt, apos_id, limite), plano).all()
 
-    def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True) -> List[BotUsuarioOpMkt]:
+    def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[BotUsuarioOpMkt]:
         """
         Lista associações de bots de uma corretora específica
         Args:
             corretora_id: ID da corretora
             ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.ASSOCIACAO_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
         """
         from ..bots_option_market.model import BotOptionMarket
         
@@ -84,41 +102,195 @@ class BotUsuarioOpMktRepository:
                 BotUsuarioOpMkt.ativo.is_(ativo)
             )
         
-        return query.all()
+        return aplicar_plano(paginar(query, BotUsuarioOpMkt, apos_id, limite), plano).all()
+
+    def listar_estado_por_corretora(self, corretora_id: int) -> List[Tuple[int, int, Optional[str], bool, Optional[str]]]:
+        """
+        Estado de todas as associações com bots de uma corretora, numa única consulta.
+        Retorna só as colunas usadas na reconciliação, sem carregar objetos.
+        Lido sempre na primária: é o estado esperado pelas correções condicionais.
+        Args:
+            corretora_id: ID da corretora
+        Returns:
+            Tuplas (id, usuario_id, copy_trade_id, ativo, id_perfil do bot)
+        """
+        from ..bots_option_market.model import BotOptionMarket
+
+        return self.sessao.query(
+            BotUsuarioOpMkt.id,
+            BotUsuarioOpMkt.usuario_id,
+            BotUsuarioOpMkt.copy_trade_id,
+            BotUsuarioOpMkt.ativo,
+            BotOptionMarket.id_perfil,
+        ).join(BotOptionMarket)\
+            .filter(BotOptionMarket.corretora_id == corretora_id)\
+            .execution_options(**{LER_DA_PRIMARIA: True})\
+            .all()
+
+    def aplicar_correcoes(
+        self,
+        ativar: Dict[int, str],
+        desativar: Dict[int, str],
+        copy_trade_ids: Dict[int, Tuple[str, bool]],
+    ) -> int:
+        """
+        Aplica correções de estado em lote, numa única transação. Cada UPDATE
+        só altera a linha que ainda está como no retrato lido antes (ativo e
+        copy_trade_id): uma associação alterada no meio tempo (ex: seguida de
+        novo pelo usuário) fica como está e é revista na próxima passada.
+        Args:
+            ativar: associacao_id -> copy_trade_id esperado, das associações inativas a ativar
+            desativar: associacao_id -> copy_trade_id esperado, das associações ativas a desativar
+            copy_trade_ids: associacao_id -> (copy_trade_id a gravar, ativo esperado), das
+                associações ainda sem copy_trade_id; também ficam ativas
+        Returns:
+            Quantidade de linhas alteradas
+        """
+        alteradas = 0
+        try:
+            for comando in comandos_correcao(ativar, desativar, copy_trade_ids):
+                alteradas += self.sessao.execute(comando).rowcount
+            confirmar(self.sessao)
+        except Exception:
+            desfazer(self.sessao)
+            raise
+        return alteradas
+
+    def iterar_por_bot(
+        self,
+        bot_id: int,
+        ativo: Optional[bool] = True,
+        colunas: Optional[Sequence[Any]] = None,
+        tamanho_lote: int = TAMANHO_LOTE_STREAM,
+    ) -> Iterator[Any]:
+        """
+        Percorre as associações de um bot em lotes, com cursor no servidor (memória constante)
+        Args:
+            bot_id: ID do bot
+            ativo: True=só ativas, False=só inativas, None=todas
+            colunas: Só estas colunas (ex: [BotUsuarioOpMkt.id, BotUsuarioOpMkt.ativo]), em linhas leves sem objetos ORM
+            tamanho_lote: Linhas buscadas por vez
+        Uso: for item in repository.iterar_por_bot(...)
+        """
+        consulta = (select(*colunas) if colunas else select(BotUsuarioOpMkt)).where(BotUsuarioOpMkt.bot_option_market_id == bot_id)
+
+        if ativo is not None:
+            consulta = consulta.where(BotUsuarioOpMkt.ativo.is_(ativo))
+
+        return iterar(self.sessao, consulta.order_by(BotUsuarioOpMkt.id), objetos=not colunas, tamanho_lote=tamanho_lote)
 
     def criar(self, associacao: BotUsuarioOpMkt) -> BotUsuarioOpMkt:
         """Cria nova associação"""
         self.sessao.add(associacao)
-        self.sessao.commit()
-        self.sessao.refresh(associacao)
+        confirmar(self.sessao)
+        recarregar(self.sessao, associacao)
         return associacao
 
     def atualizar(self, associacao: BotUsuarioOpMkt) -> BotUsuarioOpMkt:
         """Atualiza associação existente"""
-        self.sessao.commit()
-        self.sessao.refresh(associacao)
+        confirmar(self.sessao)
+        recarregar(self.sessao, associacao)
         return associacao
 
+    def atualizar_por_id(self, associacao_id: int, dados: Dict[str, Any]) -> Optional[BotUsuarioOpMkt]:
+        """
+        Atualiza campos da associação com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            associacao_id: ID da associação
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Associação atualizada, ou None se não existe
+        """
+        return operacoes_lote.atualizar_por_id(self.sessao, BotUsuarioOpMkt, associacao_id, dados)
+
+    def salvar_em_lote(self, associacoes: List[BotUsuarioOpMkt]) -> List[BotUsuarioOpMkt]:
+        """Cria ou atualiza várias associações com um único commit"""
+        self.sessao.add_all(associacoes)
+        confirmar(self.sessao)
+        return associacoes
+
+    def criar_em_lote(self, associacoes: List[BotUsuarioOpMkt]) -> List[BotUsuarioOpMkt]:
+        """
+        Cria vários registros com INSERT em lote (RETURNING) e um único commit
+        Args:
+            associacoes: Associações novas
+        Returns:
+            Associações criadas, com id, na mesma ordem
+        """
+        return operacoes_lote.criar_em_lote(self.sessao, associacoes)
+
+    def atualizar_em_lote(self, alteracoes: List[Dict[str, Any]]) -> int:
+        """
+        Atualiza várias associações pelo id com UPDATE em lote e um único commit
+        Args:
+            alteracoes: Um dicionário por associação, com "id" e os campos a alterar
+        """
+        return operacoes_lote.atualizar_em_lote(self.sessao, BotUsuarioOpMkt, alteracoes)
+
+    def desativar_em_lote(self, associacao_ids: List[int]) -> List[int]:
+        """
+        Soft delete de várias associações com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs desativados (os que estavam ativos)
+        """
+        return operacoes_lote.definir_ativo_em_lote(self.sessao, BotUsuarioOpMkt, associacao_ids, False)
+
+    def ativar_em_lote(self, associacao_ids: List[int]) -> List[int]:
+        """
+        Reativa várias associações com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs ativados (os que estavam inativos)
+        """
+        return operacoes_lote.definir_ativo_em_lote(self.sessao, BotUsuarioOpMkt, associacao_ids, True)
+
     def desativar(self, associacao_id: int) -> bool:
-        """Soft delete - marca associação como inativa"""
-        associacao = self.buscar_por_id(associacao_id)
-        if associacao:
-            # Usar update query para evitar problemas de tipo
-            self.sessao.query(BotUsuarioOpMkt)\
-                .filter(BotUsuarioOpMkt.id == associacao_id)\
-                .update({BotUsuarioOpMkt.ativo: False})
-            self.sessao.commit()
-            return True
-        return False
+        """Soft delete - marca associação como inativa com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, BotUsuarioOpMkt, associacao_id, False)
 
     def ativar(self, associacao_id: int) -> bool:
-        """Reativa associação inativa"""
-        # Busca associação mesmo se inativa
-        associacao = self.sessao.query(BotUsuarioOpMkt).filter(BotUsuarioOpMkt.id == associacao_id).first()
-        if associacao:
-            self.sessao.query(BotUsuarioOpMkt)\
-                .filter(BotUsuarioOpMkt.id == associacao_id)\
-                .update({BotUsuarioOpMkt.ativo: True})
-            self.sessao.commit()
-            return True
-        return False
\ No newline at end of file
+        """Reativa associação inativa com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, BotUsuarioOpMkt, associacao_id, True)
+
+
+def consulta_por_copy_trade_id(copy_trade_id: str) -> Select:
+    """
+    SELECT da associação pelo copy_trade_id, compartilhado com a versão assíncrona.
+    Repete o predicado do índice único parcial: com o id em um parâmetro (plano
+    genérico de prepared statement) o Postgres não prova sozinho que ele não é
+    vazio e deixaria de usar o índice.
+    """
+    return select(BotUsuarioOpMkt).where(
+        BotUsuarioOpMkt.copy_trade_id == copy_trade_id, text(COPY_TRADE_ID_PREENCHIDO)
+    )
+
+
+def comandos_correcao(
+    ativar: Dict[int, str],
+    desativar: Dict[int, str],
+    copy_trade_ids: Dict[int, Tuple[str, bool]],
+) -> List[Any]:
+    """UPDATEs condicionais de aplicar_correcoes(), compartilhados com a versão assíncrona"""
+    comandos = []
+    for esperados, ativo in ((ativar, True), (desativar, False)):
+        if esperados:
+            comandos.append(
+                update(BotUsuarioOpMkt)
+                .where(
+                    tuple_(BotUsuarioOpMkt.id, BotUsuarioOpMkt.copy_trade_id).in_(list(esperados.items())),
+                    BotUsuarioOpMkt.ativo.is_(not ativo),
+                )
+                .values(ativo=ativo)
+                .execution_options(synchronize_session=False)
+            )
+    for associacao_id, (copy_trade_id, ativo_esperado) in copy_trade_ids.items():
+        comandos.append(
+            update(BotUsuarioOpMkt)
+            .where(
+                BotUsuarioOpMkt.id == associacao_id,
+                BotUsuarioOpMkt.ativo.is_(ativo_esperado),
+                or_(BotUsuarioOpMkt.copy_trade_id.is_(None), BotUsuarioOpMkt.copy_trade_id == ""),
+            )
+            .values(copy_trade_id=copy_trade_id, ativo=True)
+            .execution_options(synchronize_session=False)
+        )
+    return comandos
@@ -0,0 +1,247 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from paginacao import TAMANHO_LOTE_STREAM, iterar_async, paginar
+from roteamento_banco import LER_DA_PRIMARIA
+from unidade_trabalho import confirmar_async, desfazer_async, recarregar_async
+from .model import BotUsuarioOpMkt
+from .repository import comandos_correcao, consulta_por_copy_trade_id
+from ..bots_option_market.model import BotOptionMarket
+from ..planos_carga import PlanoCarga, aplicar_plano
+
+
+@medir_repository
+class BotUsuarioOpMktRepositoryAsync:
+    """Versão assíncrona do BotUsuarioOpMktRepository, para uso nos handlers do FastAPI"""
+
+    def __init__(self, sessao: AsyncSession):
+        self.sessao = sessao
+
+    async def buscar_por_id(self, associacao_id: int) -> Optional[BotUsuarioOpMkt]:
+        """
+        Busca associação por ID
+        Args:
+            associacao_id: ID da associação
+        """
+        return await self.sessao.scalar(select(BotUsuarioOpMkt).where(BotUsuarioOpMkt.id == associacao_id))
+
+    async def buscar_por_usuario_e_bot(self, usuario_id: int, bot_id: int) -> Optional[BotUsuarioOpMkt]:
+        """
+        Busca associação específica entre usuário e bot
+        Args:
+            usuario_id: ID do usuário
+            bot_id: ID do bot
+        """
+        return await self.sessao.scalar(select(BotUsuarioOpMkt).where(
+            BotUsuarioOpMkt.usuario_id == usuario_id,
+            BotUsuarioOpMkt.bot_option_market_id == bot_id
+        ))
+
+    async def buscar_por_copy_trade_id(self, copy_trade_id: str) -> Optional[BotUsuarioOpMkt]:
+        """
+        Busca associação por ID do copy trade
+        Args:
+            copy_trade_id: ID do copy trade
+        """
+        return await self.sessao.scalar(consulta_por_copy_trade_id(copy_trade_id))
+
+    async def listar_por_usuario(self, usuario_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[BotUsuarioOpMkt]:
+        """
+        Lista associações de um usuário
+        Args:
+            usuario_id: ID do usuário
+            ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.ASSOCIACAO_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
+        """
+        consulta = select(BotUsuarioOpMkt).where(BotUsuarioOpMkt.usuario_id == usuario_id)
+
+        if ativo is not None:
+            consulta = consulta.where(BotUsuarioOpMkt.ativo.is_(ativo))
+
+        return list((await self.sessao.scalars(aplicar_plano(paginar(consulta, BotUsuarioOpMkt, apos_id, limite), plano))).unique())
+
+    async def listar_por_bot(self, bot_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[BotUsuarioOpMkt]:
+        """
+        Lista associações de um bot
+        Args:
+            bot_id: ID do bot
+            ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.ASSOCIACAO_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
+        """
+        consulta = select(BotUsuarioOpMkt).where(BotUsuarioOpMkt.bot_option_market_id == bot_id)
+
+        if ativo is not None:
+            consulta = consulta.where(BotUsuarioOpMkt.ativo.is_(ativo))
+
+        return list((await self.sessao.scalars(aplicar_plano(paginar(consulta, BotUsuarioOpMkt, apos_id, limite), plano))).unique())
+
+    async def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[BotUsuarioOpMkt]:
+        """
+        Lista associações de bots de uma corretora específica
+        Args:
+            corretora_id: ID da corretora
+            ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.ASSOCIACAO_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
+        """
+        consulta = select(BotUsuarioOpMkt)\
+            .join(BotOptionMarket)\
+            .where(BotOptionMarket.corretora_id == corretora_id)
+
+        if ativo is not None:
+            consulta = consulta.where(
+                BotOptionMarket.ativo.is_(ativo),
+                BotUsuarioOpMkt.ativo.is_(ativo)
+            )
+
+        return list((await self.sessao.scalars(aplicar_plano(paginar(consulta, BotUsuarioOpMkt, apos_id, limite), plano))).unique())
+
+    async def listar_estado_por_corretora(self, corretora_id: int) -> List[Tuple[int, int, Optional[str], bool, Optional[str]]]:
+        """
+        Estado de todas as associações com bots de uma corretora, numa única consulta,
+        sempre na primária (ver BotUsuarioOpMktRepository.listar_estado_por_corretora)
+        Args:
+            corretora_id: ID da corretora
+        Returns:
+            Tuplas (id, usuario_id, copy_trade_id, ativo, id_perfil do bot)
+        """
+        resultado = await self.sessao.execute(
+            select(
+                BotUsuarioOpMkt.id,
+                BotUsuarioOpMkt.usuario_id,
+                BotUsuarioOpMkt.copy_trade_id,
+                BotUsuarioOpMkt.ativo,
+                BotOptionMarket.id_perfil,
+            ).join(BotOptionMarket)
+            .where(BotOptionMarket.corretora_id == corretora_id)
+            .execution_options(**{LER_DA_PRIMARIA: True})
+        )
+        return [tuple(linha) for linha in resultado]
+
+    def iterar_por_bot(
+        self,
+        bot_id: int,
+        ativo: Optional[bool] = True,
+        colunas: Optional[Sequence[Any]] = None,
+        tamanho_lote: int = TAMANHO_LOTE_STREAM,
+    ) -> AsyncIterator[Any]:
+        """
+        Percorre as associações de um bot em lotes, com cursor no servidor (memória constante)
+        Args:
+            bot_id: ID do bot
+            ativo: True=só ativas, False=só inativas, None=todas
+            colunas: Só estas colunas (ex: [BotUsuarioOpMkt.id, BotUsuarioOpMkt.ativo]), em linhas leves sem objetos ORM
+            tamanho_lote: Linhas buscadas por vez
+        Uso: async for item in repository.iterar_por_bot(...)
+        """
+        consulta = (select(*colunas) if colunas else select(BotUsuarioOpMkt)).where(BotUsuarioOpMkt.bot_option_market_id == bot_id)
+
+        if ativo is not None:
+            consulta = consulta.where(BotUsuarioOpMkt.ativo.is_(ativo))
+
+        return iterar_async(self.sessao, consulta.order_by(BotUsuarioOpMkt.id), objetos=not colunas, tamanho_lote=tamanho_lote)
+
+    async def criar(self, associacao: BotUsuarioOpMkt) -> BotUsuarioOpMkt:
+        """Cria nova associação"""
+        self.sessao.add(associacao)
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, associacao)
+        return associacao
+
+    async def atualizar(self, associacao: BotUsuarioOpMkt) -> BotUsuarioOpMkt:
+        """Atualiza associação existente"""
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, associacao)
+        return associacao
+
+    async def atualizar_por_id(self, associacao_id: int, dados: Dict[str, Any]) -> Optional[BotUsuarioOpMkt]:
+        """
+        Atualiza campos da associação com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            associacao_id: ID da associação
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Associação atualizada, ou None se não existe
+        """
+        return await operacoes_lote.atualizar_por_id_async(self.sessao, BotUsuarioOpMkt, associacao_id, dados)
+
+    async def salvar_em_lote(self, associacoes: List[BotUsuarioOpMkt]) -> List[BotUsuarioOpMkt]:
+        """Cria ou atualiza várias associações com um único commit"""
+        self.sessao.add_all(associacoes)
+        await confirmar_async(self.sessao)
+        return associacoes
+
+    async def aplicar_correcoes(
+        self,
+        ativar: Dict[int, str],
+        desativar: Dict[int, str],
+        copy_trade_ids: Dict[int, Tuple[str, bool]],
+    ) -> int:
+        """
+        Aplica correções de estado em lote, numa única transação, só nas linhas
+        ainda iguais ao retrato lido antes (ver BotUsuarioOpMktRepository.aplicar_correcoes)
+        Args:
+            ativar: associacao_id -> copy_trade_id esperado, das associações inativas a ativar
+            desativar: associacao_id -> copy_trade_id esperado, das associações ativas a desativar
+            copy_trade_ids: associacao_id -> (copy_trade_id a gravar, ativo esperado)
+        Returns:
+            Quantidade de linhas alteradas
+        """
+        alteradas = 0
+        try:
+            for comando in comandos_correcao(ativar, desativar, copy_trade_ids):
+                alteradas += (await self.sessao.execute(comando)).rowcount
+            await confirmar_async(self.sessao)
+        except Exception:
+            await desfazer_async(self.sessao)
+            raise
+        return alteradas
+
+    async def criar_em_lote(self, associacoes: List[BotUsuarioOpMkt]) -> List[BotUsuarioOpMkt]:
+        """
+        Cria vários registros com INSERT em lote (RETURNING) e um único commit
+        Args:
+            associacoes: Associações novas
+        Returns:
+            Associações criadas, com id, na mesma ordem
+        """
+        return await operacoes_lote.criar_em_lote_async(self.sessao, associacoes)
+
+    async def atualizar_em_lote(self, alteracoes: List[Dict[str, Any]]) -> int:
+        """
+        Atualiza várias associações pelo id com UPDATE em lote e um único commit
+        Args:
+            alteracoes: Um dicionário por associação, com "id" e os campos a alterar
+        """
+        return await operacoes_lote.atualizar_em_lote_async(self.sessao, BotUsuarioOpMkt, alteracoes)
+
+    async def desativar_em_lote(self, associacao_ids: List[int]) -> List[int]:
+        """
+        Soft delete de várias associações com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs desativados (os que estavam ativos)
+        """
+        return await operacoes_lote.definir_ativo_em_lote_async(self.sessao, BotUsuarioOpMkt, associacao_ids, False)
+
+    async def ativar_em_lote(self, associacao_ids: List[int]) -> List[int]:
+        """
+        Reativa várias associações com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs ativados (os que estavam inativos)
+        """
+        return await operacoes_lote.definir_ativo_em_lote_async(self.sessao, BotUsuarioOpMkt, associacao_ids, True)
+
+    async def desativar(self, associacao_id: int) -> bool:
+        """Soft delete - marca associação como inativa com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, BotUsuarioOpMkt, associacao_id, False)
+
+    async def ativar(self, associacao_id: int) -> bool:
+        """Reativa associação inativa com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, BotUsuarioOpMkt, associacao_id, True)
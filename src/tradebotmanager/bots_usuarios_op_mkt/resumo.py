@@ -0,0 +1,73 @@
+from sqlalchemy import DDL, Column, ForeignKey, Integer, event
+from database import ModelBase
+from .model import BotUsuarioOpMkt
+
+
+class ResumoSeguidoresBot(ModelBase):
+    """
+    Contagem de seguidores ativos e inativos por bot, mantida pelo próprio
+    banco (triggers em bots_usuarios_op_mkt). Lida em tempo constante, sem
+    varrer as associações; ver agregados.AgregadosRepository(usar_resumo=True).
+    """
+    __tablename__ = "resumo_seguidores_bot"
+
+    bot_option_market_id = Column(Integer, ForeignKey("bots_option_market.id", ondelete="CASCADE"), primary_key=True)
+    ativos = Column(Integer, nullable=False, default=0)
+    inativos = Column(Integer, nullable=False, default=0)
+
+
+# Cada mudança em uma associação soma/subtrai 1 na linha do bot (atualização incremental)
+FUNCAO_RESUMO = """
+CREATE OR REPLACE FUNCTION atualizar_resumo_seguidores_bot() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE resumo_seguidores_bot
+           SET ativos = ativos - CASE WHEN OLD.ativo THEN 1 ELSE 0 END,
+               inativos = inativos - CASE WHEN OLD.ativo THEN 0 ELSE 1 END
+         WHERE bot_option_market_id = OLD.bot_option_market_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO resumo_seguidores_bot (bot_option_market_id, ativos, inativos)
+        VALUES (NEW.bot_option_market_id, CASE WHEN NEW.ativo THEN 1 ELSE 0 END, CASE WHEN NEW.ativo THEN 0 ELSE 1 END)
+        ON CONFLICT (bot_option_market_id) DO UPDATE
+           SET ativos = resumo_seguidores_bot.ativos + EXCLUDED.ativos,
+               inativos = resumo_seguidores_bot.inativos + EXCLUDED.inativos;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGER_INCLUSAO_EXCLUSAO = """
+CREATE TRIGGER tg_resumo_seguidores_bot_inclusao_exclusao
+AFTER INSERT OR DELETE ON bots_usuarios_op_mkt
+FOR EACH ROW EXECUTE FUNCTION atualizar_resumo_seguidores_bot()
+"""
+
+# Só quando ativo ou o bot mudam de fato (ex: gravar copy_trade_id não mexe no resumo)
+TRIGGER_ALTERACAO = """
+CREATE TRIGGER tg_resumo_seguidores_bot_alteracao
+AFTER UPDATE OF ativo, bot_option_market_id ON bots_usuarios_op_mkt
+FOR EACH ROW
+WHEN (OLD.ativo IS DISTINCT FROM NEW.ativo OR OLD.bot_option_market_id IS DISTINCT FROM NEW.bot_option_market_id)
+EXECUTE FUNCTION atualizar_resumo_seguidores_bot()
+"""
+
+# Recalcula tudo a partir das associações (carga inicial ou correção de divergência).
+# Bloqueia escritas nas associações até o commit, para nenhuma mudança escapar da contagem.
+RECALCULAR_RESUMO = (
+    "LOCK TABLE bots_usuarios_op_mkt IN SHARE MODE",
+    "DELETE FROM resumo_seguidores_bot",
+    """
+    INSERT INTO resumo_seguidores_bot (bot_option_market_id, ativos, inativos)
+    SELECT bot_option_market_id,
+           count(*) FILTER (WHERE ativo),
+           count(*) FILTER (WHERE NOT ativo)
+      FROM bots_usuarios_op_mkt
+     GROUP BY bot_option_market_id
+    """,
+)
+
+# Bancos criados com create_all (teste.py) recebem as mesmas triggers da migration 0003
+for comando in (FUNCAO_RESUMO, TRIGGER_INCLUSAO_EXCLUSAO, TRIGGER_ALTERACAO):
+    event.listen(BotUsuarioOpMkt.__table__, "after_create", DDL(comando).execute_if(dialect="postgresql"))
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class CacheTTL:
+    """
+    Cache em memória com expiração por tempo (TTL) e descarte LRU.
+    Seguro para uso entre threads. Conta acertos e falhas para diagnóstico.
+    """
+
+    def __init__(self, ttl: float, max_itens: int = 1000):
+        """
+        Args:
+            ttl: Segundos que um valor permanece válido
+            max_itens: Quantidade máxima de valores; acima disso descarta os menos usados
+        """
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.acertos = 0
+        self.falhas = 0
+        # chave -> (valor, expira_em); a ordem do OrderedDict é a ordem LRU
+        self._itens: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor da chave, ou None se ausente ou expirado"""
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None or item[1] <= time.monotonic():
+                if item is not None:
+                    del self._itens[chave]
+                self.falhas += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[0]
+
+    def guardar(self, chave: Hashable, valor: Any) -> None:
+        """Guarda o valor da chave, renovando sua validade"""
+        with self._trava:
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave: Hashable) -> None:
+        """Remove a chave do cache"""
+        with self._trava:
+            self._itens.pop(chave, None)
+
+    def limpar(self) -> None:
+        """Remove todos os valores"""
+        with self._trava:
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Acertos, falhas, taxa de acerto e quantidade de itens"""
+        consultas = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "itens": len(self._itens),
+        }
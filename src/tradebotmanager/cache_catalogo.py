@@ -0,0 +1,183 @@
+import inspect
+import threading
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+from sqlalchemy import event, inspect as inspecionar
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from cache import CacheTTL
+from metricas import registro_metricas
+from unidade_trabalho import unidade_atual
+
+
+class Retrato:
+    """
+    Cópia somente leitura das colunas de um registro, desligada de qualquer sessão.
+    Pode ser compartilhada entre sessões e threads; relacionamentos não são copiados.
+    """
+
+    __slots__ = ("_modelo", "_valores")
+
+    def __init__(self, registro: Any):
+        modelo = type(registro)
+        valores = {atributo.key: getattr(registro, atributo.key) for atributo in inspecionar(modelo).column_attrs}
+        object.__setattr__(self, "_modelo", modelo.__name__)
+        object.__setattr__(self, "_valores", MappingProxyType(valores))
+
+    def __getattr__(self, nome: str) -> Any:
+        if nome.startswith("_"):
+            raise AttributeError(nome)
+        try:
+            return self._valores[nome]
+        except KeyError:
+            raise AttributeError(f"{self._modelo} em cache não tem o atributo {nome!r}") from None
+
+    def __setattr__(self, nome: str, valor: Any) -> None:
+        raise AttributeError(f"{self._modelo} em cache é somente leitura; altere pelo repository")
+
+    # Imutável: cópias são o próprio retrato
+    def __copy__(self) -> "Retrato":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Retrato":
+        return self
+
+    def __repr__(self) -> str:
+        return f"Retrato({self._modelo}, id={self._valores.get('id')})"
+
+
+class CacheCatalogo:
+    """
+    Cache de leitura (read-through) de registros que quase nunca mudam, como
+    corretoras e bots. Guarda Retratos por chave de busca, ex: ("id", 3) ou
+    ("nome", "Bot X"). Qualquer escrita na entidade limpa o cache inteiro:
+    o catálogo é pequeno e isso evita chaves secundárias desatualizadas.
+    Buscas sem resultado não são guardadas.
+
+    Cada limpeza inicia uma nova geração. Um registro carregado enquanto o
+    cache era limpo (ex: lido antes do commit de uma escrita e devolvido
+    depois) pertence à geração anterior e não é guardado.
+    """
+
+    def __init__(self, entidade: str, ttl: float = 300, max_itens: int = 1000):
+        """
+        Args:
+            entidade: Nome usado nas métricas
+            ttl: Segundos que um registro permanece válido
+            max_itens: Quantidade máxima de chaves; acima disso descarta as menos usadas
+        """
+        self.entidade = entidade
+        self._itens = CacheTTL(ttl, max_itens=max_itens)
+        self._geracao = 0
+        self._trava = threading.Lock()
+
+    def obter_ou_carregar(self, chave: Hashable, carregar: Callable[[], Any]) -> Optional[Retrato]:
+        """Retorna o Retrato da chave; na falha, carrega do banco e guarda"""
+        retrato = self._itens.obter(chave)
+        if retrato is None:
+            geracao = self._geracao
+            registro = carregar()
+            if registro is None:
+                return None
+            retrato = Retrato(registro)
+            self._guardar(chave, retrato, geracao)
+        return retrato
+
+    async def obter_ou_carregar_async(self, chave: Hashable, carregar: Callable[[], Awaitable[Any]]) -> Optional[Retrato]:
+        """Versão assíncrona de obter_ou_carregar()"""
+        retrato = self._itens.obter(chave)
+        if retrato is None:
+            geracao = self._geracao
+            registro = await carregar()
+            if registro is None:
+                return None
+            retrato = Retrato(registro)
+            self._guardar(chave, retrato, geracao)
+        return retrato
+
+    def invalidar(self, sessao: Union[Session, AsyncSession, None] = None) -> None:
+        """
+        Limpa o cache após uma escrita. Dentro de uma unidade de trabalho a
+        escrita só vale no commit, então limpa de novo quando ele acontecer:
+        sem isso, uma leitura de outra sessão entre o flush e o commit
+        guardaria o valor antigo até o TTL.
+        """
+        self.limpar()
+        if sessao is not None and unidade_atual(sessao) is not None:
+            sessao_sincrona = sessao.sync_session if isinstance(sessao, AsyncSession) else sessao
+            event.listen(sessao_sincrona, "after_commit", lambda _: self.limpar(), once=True)
+
+    def limpar(self) -> None:
+        """Remove todos os registros e inicia uma nova geração"""
+        with self._trava:
+            self._geracao += 1
+            self._itens.limpar()
+
+    def _guardar(self, chave: Hashable, retrato: Retrato, geracao: int) -> None:
+        """Guarda o retrato só se o cache não foi limpo desde que a carga começou"""
+        with self._trava:
+            if geracao == self._geracao:
+                self._itens.guardar(chave, retrato)
+
+    @property
+    def acertos(self) -> int:
+        return self._itens.acertos
+
+    @property
+    def falhas(self) -> int:
+        return self._itens.falhas
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Acertos, falhas, taxa de acerto e quantidade de chaves guardadas"""
+        return self._itens.estatisticas()
+
+
+class RepositoryComCache:
+    """
+    Base das camadas de cache na frente de um repository. As subclasses
+    definem as buscas em cache; os métodos listados em `metodos_escrita`
+    são repassados ao repository e invalidam o cache; os demais são
+    repassados sem alteração.
+    """
+
+    metodos_escrita: Tuple[str, ...] = ()
+
+    def __init__(self, repository: Any, cache: CacheCatalogo):
+        self.repository = repository
+        self.cache = cache
+
+    def __getattr__(self, nome: str) -> Any:
+        atributo = getattr(self.repository, nome)
+        if nome not in self.metodos_escrita:
+            return atributo
+
+        if inspect.iscoroutinefunction(atributo):
+            async def escrever_async(*args, **kwargs):
+                try:
+                    return await atributo(*args, **kwargs)
+                finally:
+                    self.cache.invalidar(self.repository.sessao)
+            return escrever_async
+
+        def escrever(*args, **kwargs):
+            try:
+                return atributo(*args, **kwargs)
+            finally:
+                self.cache.invalidar(self.repository.sessao)
+        return escrever
+
+
+# Caches únicos do processo, compartilhados por todas as sessões (síncronas e assíncronas)
+cache_corretoras = CacheCatalogo("corretoras")
+cache_bots = CacheCatalogo("bots_option_market")
+
+registro_metricas.coletor(
+    "catalogo_cache_total",
+    "counter",
+    "Leituras do cache de catálogo (corretoras e bots)",
+    lambda: [
+        ({"entidade": cache.entidade, "resultado": resultado}, valor)
+        for cache in (cache_corretoras, cache_bots)
+        for resultado, valor in (("acerto", cache.acertos), ("falha", cache.falhas))
+    ],
+)
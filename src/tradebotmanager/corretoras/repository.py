@@ -1,8 +1,12 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from unidade_trabalho import confirmar, recarregar
 from .model import Corretora
 
 
+@medir_repository
 class CorretoraRepository:
     def __init__(self, sessao: Session):
         self.sessao = sessao
@@ -41,36 +45,31 @@ class CorretoraRepository:
     def criar(self, corretora: Corretora) -> Corretora:
         """Cria nova corretora"""
         self.sessao.add(corretora)
-        self.sessao.commit()
-        self.sessao.refresh(corretora)
+        confirmar(self.sessao)
+        recarregar(self.sessao, corretora)
         return corretora
 
     def atualizar(self, corretora: Corretora) -> Corretora:
         """Atualiza corretora existente"""
-        self.sessao.commit()
-        self.sessao.refresh(corretora)
+        confirmar(self.sessao)
+        recarregar(self.sessao, corretora)
         return corretora
 
+    def atualizar_por_id(self, corretora_id: int, dados: Dict[str, Any]) -> Optional[Corretora]:
+        """
+        Atualiza campos da corretora com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            corretora_id: ID da corretora
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Corretora atualizada, ou None se não existe
+        """
+        return operacoes_lote.atualizar_por_id(self.sessao, Corretora, corretora_id, dados)
+
     def desativar(self, corretora_id: int) -> bool:
-        """Soft delete - marca corretora como inativa"""
-        corretora = self.buscar_por_id(corretora_id)
-        if corretora:
-            # Usar update query para evitar problemas de tipo
-            self.sessao.query(Corretora)\
-                .filter(Corretora.id == corretora_id)\
-                .update({Corretora.ativo: False})
-            self.sessao.commit()
-            return True
-        return False
+        """Soft delete - marca corretora como inativa com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, Corretora, corretora_id, False)
 
     def ativar(self, corretora_id: int) -> bool:
-        """Reativa corretora inativa"""
-        # Busca corretora mesmo se inativa
-        corretora = self.sessao.query(Corretora).filter(Corretora.id == corretora_id).first()
-        if corretora:
-            self.sessao.query(Corretora)\
-                .filter(Corretora.id == corretora_id)\
-                .update({Corretora.ativo: True})
-            self.sessao.commit()
-            return True
-        return False
+        """Reativa corretora inativa com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, Corretora, corretora_id, True)
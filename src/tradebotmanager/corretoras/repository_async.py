@@ -0,0 +1,76 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from unidade_trabalho import confirmar_async, recarregar_async
+from .model import Corretora
+
+
+@medir_repository
+class CorretoraRepositoryAsync:
+    """Versão assíncrona do CorretoraRepository, para uso nos handlers do FastAPI"""
+
+    def __init__(self, sessao: AsyncSession):
+        self.sessao = sessao
+
+    async def buscar_por_id(self, corretora_id: int) -> Optional[Corretora]:
+        """
+        Busca corretora por ID
+        Args:
+            corretora_id: ID da corretora
+        """
+        return await self.sessao.scalar(select(Corretora).where(Corretora.id == corretora_id))
+
+    async def buscar_por_nome(self, nome: str) -> Optional[Corretora]:
+        """
+        Busca corretora por nome
+        Args:
+            nome: Nome da corretora
+        """
+        return await self.sessao.scalar(select(Corretora).where(Corretora.nome == nome))
+
+    async def listar_corretoras(self, ativo: Optional[bool] = True) -> List[Corretora]:
+        """
+        Lista corretoras com filtro de status
+        Args:
+            ativo: True=só ativas, False=só inativas, None=todas
+        """
+        consulta = select(Corretora)
+
+        if ativo is not None:
+            consulta = consulta.where(Corretora.ativo.is_(ativo))
+
+        return list(await self.sessao.scalars(consulta))
+
+    async def criar(self, corretora: Corretora) -> Corretora:
+        """Cria nova corretora"""
+        self.sessao.add(corretora)
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, corretora)
+        return corretora
+
+    async def atualizar(self, corretora: Corretora) -> Corretora:
+        """Atualiza corretora existente"""
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, corretora)
+        return corretora
+
+    async def atualizar_por_id(self, corretora_id: int, dados: Dict[str, Any]) -> Optional[Corretora]:
+        """
+        Atualiza campos da corretora com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            corretora_id: ID da corretora
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Corretora atualizada, ou None se não existe
+        """
+        return await operacoes_lote.atualizar_por_id_async(self.sessao, Corretora, corretora_id, dados)
+
+    async def desativar(self, corretora_id: int) -> bool:
+        """Soft delete - marca corretora como inativa com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, Corretora, corretora_id, False)
+
+    async def ativar(self, corretora_id: int) -> bool:
+        """Reativa corretora inativa com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, Corretora, corretora_id, True)
@@ -0,0 +1,61 @@
+from typing import Optional
+from cache_catalogo import CacheCatalogo, RepositoryComCache, Retrato, cache_corretoras
+from .repository import CorretoraRepository
+from .repository_async import CorretoraRepositoryAsync
+
+# Métodos que alteram corretoras e, por isso, invalidam o cache
+ESCRITAS = ("criar", "atualizar", "atualizar_por_id", "desativar", "ativar")
+
+
+class CorretoraRepositoryCache(RepositoryComCache):
+    """
+    CorretoraRepository com cache de leitura nas buscas por id e nome.
+    As buscas devolvem Retrato (somente leitura, sem sessão); para alterar
+    uma corretora, use atualizar_por_id/desativar/ativar, que invalidam o cache.
+    """
+
+    metodos_escrita = ESCRITAS
+
+    def __init__(self, repository: CorretoraRepository, cache: CacheCatalogo = cache_corretoras):
+        super().__init__(repository, cache)
+
+    def buscar_por_id(self, corretora_id: int) -> Optional[Retrato]:
+        """
+        Busca corretora por ID, pelo cache
+        Args:
+            corretora_id: ID da corretora
+        """
+        return self.cache.obter_ou_carregar(("id", corretora_id), lambda: self.repository.buscar_por_id(corretora_id))
+
+    def buscar_por_nome(self, nome: str) -> Optional[Retrato]:
+        """
+        Busca corretora por nome, pelo cache
+        Args:
+            nome: Nome da corretora
+        """
+        return self.cache.obter_ou_carregar(("nome", nome), lambda: self.repository.buscar_por_nome(nome))
+
+
+class CorretoraRepositoryCacheAsync(RepositoryComCache):
+    """Versão assíncrona do CorretoraRepositoryCache; compartilha o mesmo cache"""
+
+    metodos_escrita = ESCRITAS
+
+    def __init__(self, repository: CorretoraRepositoryAsync, cache: CacheCatalogo = cache_corretoras):
+        super().__init__(repository, cache)
+
+    async def buscar_por_id(self, corretora_id: int) -> Optional[Retrato]:
+        """
+        Busca corretora por ID, pelo cache
+        Args:
+            corretora_id: ID da corretora
+        """
+        return await self.cache.obter_ou_carregar_async(("id", corretora_id), lambda: self.repository.buscar_por_id(corretora_id))
+
+    async def buscar_por_nome(self, nome: str) -> Optional[Retrato]:
+        """
+        Busca corretora por nome, pelo cache
+        Args:
+            nome: Nome da corretora
+        """
+        return await self.cache.obter_ou_carregar_async(("nome", nome), lambda: self.repository.buscar_por_nome(nome))
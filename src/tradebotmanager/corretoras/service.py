@@ -27,21 +27,16 @@ class CorretoraService:
         return self.repository.listar_corretoras(ativo=ativo)
 
     def atualizar_corretora(self, corretora_id: int, **dados) -> Corretora:
-        """Atualiza dados de uma corretora. Lança ValueError se não encontrada."""
-        corretora = self.repository.buscar_por_id(corretora_id)
+        """Atualiza dados de uma corretora com um único UPDATE ... RETURNING. Lança ValueError se não encontrada."""
+        corretora = self.repository.atualizar_por_id(corretora_id, dados)
         if not corretora:
             raise ValueError(f"Corretora com id {corretora_id} não encontrada.")
-        
-        for campo, valor in dados.items():
-            if hasattr(corretora, campo):
-                setattr(corretora, campo, valor)
-                
-        return self.repository.atualizar(corretora)
+
+        return corretora
 
     def desativar_corretora(self, corretora_id: int) -> bool:
         """Marca a corretora como inativa (soft delete). Lança ValueError se não encontrada."""
-        corretora = self.repository.buscar_por_id(corretora_id)
-        if not corretora:
+        if not self.repository.desativar(corretora_id):
             raise ValueError(f"Corretora com id {corretora_id} não encontrada.")
-        
-        return self.repository.desativar(corretora_id)
+
+        return True
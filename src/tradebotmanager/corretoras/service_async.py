@@ -0,0 +1,42 @@
+from typing import List, Optional
+from .model import Corretora
+from .repository_async import CorretoraRepositoryAsync
+
+class CorretoraServiceAsync:
+    """
+    Versão assíncrona do CorretoraService, sobre o CorretoraRepositoryAsync.
+    """
+    def __init__(self, repository: CorretoraRepositoryAsync):
+        self.repository = repository
+
+    async def criar_corretora(self, nome: str) -> Corretora:
+        """Cria uma nova corretora."""
+        corretora = Corretora(nome=nome, ativo=True)
+        return await self.repository.criar(corretora)
+
+    async def buscar_por_id(self, corretora_id: int) -> Corretora:
+        """Busca uma corretora pelo ID. Lança ValueError se não encontrada."""
+        corretora = await self.repository.buscar_por_id(corretora_id)
+        if not corretora:
+            raise ValueError(f"Corretora com id {corretora_id} não encontrada.")
+
+        return corretora
+
+    async def listar_corretoras(self, ativo: Optional[bool] = True) -> List[Corretora]:
+        """Lista todas as corretoras, podendo filtrar por ativas/inativas."""
+        return await self.repository.listar_corretoras(ativo=ativo)
+
+    async def atualizar_corretora(self, corretora_id: int, **dados) -> Corretora:
+        """Atualiza dados de uma corretora com um único UPDATE ... RETURNING. Lança ValueError se não encontrada."""
+        corretora = await self.repository.atualizar_por_id(corretora_id, dados)
+        if not corretora:
+            raise ValueError(f"Corretora com id {corretora_id} não encontrada.")
+
+        return corretora
+
+    async def desativar_corretora(self, corretora_id: int) -> bool:
+        """Marca a corretora como inativa (soft delete). Lança ValueError se não encontrada."""
+        if not await self.repository.desativar(corretora_id):
+            raise ValueError(f"Corretora com id {corretora_id} não encontrada.")
+
+        return True
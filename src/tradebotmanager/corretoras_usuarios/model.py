@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from database import ModelBase
 
 
 class CorretoraUsuario(ModelBase):
     __tablename__ = "corretoras_usuarios"
+    __table_args__ = (
+        # Uma conta por usuário em cada corretora (buscar_por_usuario_e_corretora / listar_por_usuario)
+        Index("uq_corretoras_usuarios_usuario_corretora", "usuario_id", "corretora_id", unique=True),
+        # Um login não se repete dentro da corretora (buscar_por_login)
+        Index("uq_corretoras_usuarios_corretora_login", "corretora_id", "login", unique=True),
+        # listar_por_corretora só das contas ativas (reconciliação, observador de aprovações)
+        Index("ix_corretoras_usuarios_corretora_ativo", "corretora_id", postgresql_where=text("ativo")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
@@ -1,8 +1,17 @@
+from sqlalchemy import exists, select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from paginacao import TAMANHO_LOTE_STREAM, iterar, paginar
+from unidade_trabalho import confirmar, recarregar
 from .model import CorretoraUsuario
+from ..bots_option_market.model import BotOptionMarket
+from ..bots_usuarios_op_mkt.model import BotUsuarioOpMkt
+from ..planos_carga import PlanoCarga, aplicar_plano
 
 
+@medir_repository
 class CorretoraUsuarioRepository:
     def __init__(self, sessao: Session):
         self.sessao = sessao
@@ -27,34 +36,67 @@ class CorretoraUsuarioRepository:
             CorretoraUsuario.corretora_id == corretora_id
         ).first()
 
-    def listar_por_usuario(self, usuario_id: int, ativo: Optional[bool] = True) -> List[CorretoraUsuario]:
+    def listar_por_usuario(self, usuario_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[CorretoraUsuario]:
         """
         Lista contas de um usuário
         Args:
             usuario_id: ID do usuário
             ativo: True=só ativas, False=só inativas, None=todas
+            plano: Relacionamentos carregados junto (ex: planos_carga.CONTA_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
         """
         query = self.sessao.query(CorretoraUsuario).filter(CorretoraUsuario.usuario_id == usuario_id)
         
         if ativo is not None:
             query = query.filter(CorretoraUsuario.ativo.is_(ativo))
         
-        return query.all()
+        return aplicar_plano(paginar(query, CorretoraUsuario, apos_id, limite), plano).all()
 
-    def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True) -> List[CorretoraUsuario]:
+    def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[CorretoraUsuario]:
         """
         Lista contas de uma corretora
         Args:
             corretora_id: ID da corretora
             ativo: True=só ativas, False=só inativas, None=todas
+            plano: Relacionamentos carregados junto (ex: planos_carga.CONTA_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
         """
         query = self.sessao.query(CorretoraUsuario).filter(CorretoraUsuario.corretora_id == corretora_id)
         
+        if ativo is not None:
+            query = query.filter(CorretoraUsuario.ativo.is_(ativo))
+        
+        return aplicar_plano(paginar(query, CorretoraUsuario, apos_id, limite), plano).all()
+
+    def listar_por_usuarios(self, usuario_ids: List[int], corretora_id: int, ativo: Optional[bool] = True) -> List[CorretoraUsuario]:
+        """
+        Lista, em uma única consulta, as contas de vários usuários em uma corretora
+        Args:
+            usuario_ids: IDs dos usuários
+            corretora_id: ID da corretora
+            ativo: True=só ativas, False=só inativas, None=todas
+        """
+        query = self.sessao.query(CorretoraUsuario).filter(
+            CorretoraUsuario.usuario_id.in_(usuario_ids),
+            CorretoraUsuario.corretora_id == corretora_id
+        )
+        
         if ativo is not None:
             query = query.filter(CorretoraUsuario.ativo.is_(ativo))
         
         return query.all()
 
+    def listar_com_bots_ativos(self, limite: Optional[int] = None) -> List[CorretoraUsuario]:
+        """
+        Lista contas ativas que seguem algum bot ativo da própria corretora
+        (as que operam na corretora), em ordem de id
+        Args:
+            limite: Quantidade máxima de contas; None traz todas
+        """
+        return list(self.sessao.scalars(consulta_com_bots_ativos(limite)))
+
     def buscar_por_login(self, corretora_id: int, login: str) -> Optional[CorretoraUsuario]:
         """
         Busca conta por login específico na corretora
@@ -69,39 +111,116 @@ class CorretoraUsuarioRepository:
             CorretoraUsuario.login == login
         ).first()
 
+    def iterar_por_corretora(
+        self,
+        corretora_id: int,
+        ativo: Optional[bool] = True,
+        colunas: Optional[Sequence[Any]] = None,
+        tamanho_lote: int = TAMANHO_LOTE_STREAM,
+    ) -> Iterator[Any]:
+        """
+        Percorre as contas de uma corretora em lotes, com cursor no servidor (memória constante)
+        Args:
+            corretora_id: ID da corretora
+            ativo: True=só ativas, False=só inativas, None=todas
+            colunas: Só estas colunas (ex: [CorretoraUsuario.id, CorretoraUsuario.ativo]), em linhas leves sem objetos ORM
+            tamanho_lote: Linhas buscadas por vez
+        Uso: for item in repository.iterar_por_corretora(...)
+        """
+        consulta = (select(*colunas) if colunas else select(CorretoraUsuario)).where(CorretoraUsuario.corretora_id == corretora_id)
+
+        if ativo is not None:
+            consulta = consulta.where(CorretoraUsuario.ativo.is_(ativo))
+
+        return iterar(self.sessao, consulta.order_by(CorretoraUsuario.id), objetos=not colunas, tamanho_lote=tamanho_lote)
+
     def criar(self, conta: CorretoraUsuario) -> CorretoraUsuario:
         """Cria nova conta"""
         self.sessao.add(conta)
-        self.sessao.commit()
-        self.sessao.refresh(conta)
+        confirmar(self.sessao)
+        recarregar(self.sessao, conta)
         return conta
 
     def atualizar(self, conta: CorretoraUsuario) -> CorretoraUsuario:
         """Atualiza conta existente"""
-        self.sessao.commit()
-        self.sessao.refresh(conta)
+        confirmar(self.sessao)
+        recarregar(self.sessao, conta)
         return conta
 
+    def atualizar_por_id(self, conta_id: int, dados: Dict[str, Any]) -> Optional[CorretoraUsuario]:
+        """
+        Atualiza campos da conta com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            conta_id: ID da conta
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Conta atualizada, ou None se não existe
+        """
+        return operacoes_lote.atualizar_por_id(self.sessao, CorretoraUsuario, conta_id, dados)
+
+    def atualizar_token(self, conta_id: int, token_jwt: str) -> None:
+        """
+        Grava o token JWT renovado da conta
+        Args:
+            conta_id: ID da conta
+            token_jwt: Token obtido no login da corretora
+        """
+        self.sessao.query(CorretoraUsuario)\
+            .filter(CorretoraUsuario.id == conta_id)\
+            .update({CorretoraUsuario.token_jwt: token_jwt})
+        confirmar(self.sessao)
+
+    def criar_em_lote(self, contas: List[CorretoraUsuario]) -> List[CorretoraUsuario]:
+        """
+        Cria vários registros com INSERT em lote (RETURNING) e um único commit
+        Args:
+            contas: Contas novas
+        Returns:
+            Contas criadas, com id, na mesma ordem
+        """
+        return operacoes_lote.criar_em_lote(self.sessao, contas)
+
+    def atualizar_em_lote(self, alteracoes: List[Dict[str, Any]]) -> int:
+        """
+        Atualiza várias contas pelo id com UPDATE em lote e um único commit
+        Args:
+            alteracoes: Um dicionário por conta, com "id" e os campos a alterar
+        """
+        return operacoes_lote.atualizar_em_lote(self.sessao, CorretoraUsuario, alteracoes)
+
+    def desativar_em_lote(self, conta_ids: List[int]) -> List[int]:
+        """
+        Soft delete de várias contas com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs desativados (os que estavam ativos)
+        """
+        return operacoes_lote.definir_ativo_em_lote(self.sessao, CorretoraUsuario, conta_ids, False)
+
+    def ativar_em_lote(self, conta_ids: List[int]) -> List[int]:
+        """
+        Reativa várias contas com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs ativados (os que estavam inativos)
+        """
+        return operacoes_lote.definir_ativo_em_lote(self.sessao, CorretoraUsuario, conta_ids, True)
+
     def desativar(self, conta_id: int) -> bool:
-        """Soft delete - marca conta como inativa"""
-        conta = self.buscar_por_id(conta_id)
-        if conta:
-            # Usar update query para evitar problemas de tipo
-            self.sessao.query(CorretoraUsuario)\
-                .filter(CorretoraUsuario.id == conta_id)\
-                .update({CorretoraUsuario.ativo: False})
-            self.sessao.commit()
-            return True
-        return False
+        """Soft delete - marca conta como inativa com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, CorretoraUsuario, conta_id, False)
 
     def ativar(self, conta_id: int) -> bool:
-        """Reativa conta inativa"""
-        # Busca conta mesmo se inativa
-        conta = self.sessao.query(CorretoraUsuario).filter(CorretoraUsuario.id == conta_id).first()
-        if conta:
-            self.sessao.query(CorretoraUsuario)\
-                .filter(CorretoraUsuario.id == conta_id)\
-                .update({CorretoraUsuario.ativo: True})
-            self.sessao.commit()
-            return True
-        return False
\ No newline at end of file
+        """Reativa conta inativa com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, CorretoraUsuario, conta_id, True)
+
+
+def consulta_com_bots_ativos(limite: Optional[int] = None):
+    """select() de listar_com_bots_ativos(), compartilhado com a versão assíncrona"""
+    segue_bot_ativo = exists().where(
+        BotUsuarioOpMkt.usuario_id == CorretoraUsuario.usuario_id,
+        BotUsuarioOpMkt.ativo.is_(True),
+        BotOptionMarket.id == BotUsuarioOpMkt.bot_option_market_id,
+        BotOptionMarket.corretora_id == CorretoraUsuario.corretora_id,
+        BotOptionMarket.ativo.is_(True),
+    )
+    consulta = select(CorretoraUsuario).where(CorretoraUsuario.ativo.is_(True), segue_bot_ativo)
+    return paginar(consulta, CorretoraUsuario, limite=limite)
@@ -0,0 +1,211 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from paginacao import TAMANHO_LOTE_STREAM, iterar_async, paginar
+from unidade_trabalho import confirmar_async, recarregar_async
+from .model import CorretoraUsuario
+from .repository import consulta_com_bots_ativos
+from ..planos_carga import PlanoCarga, aplicar_plano
+
+
+@medir_repository
+class CorretoraUsuarioRepositoryAsync:
+    """Versão assíncrona do CorretoraUsuarioRepository, para uso nos handlers do FastAPI"""
+
+    def __init__(self, sessao: AsyncSession):
+        self.sessao = sessao
+
+    async def buscar_por_id(self, conta_id: int) -> Optional[CorretoraUsuario]:
+        """
+        Busca conta por ID
+        Args:
+            conta_id: ID da conta
+        """
+        return await self.sessao.scalar(select(CorretoraUsuario).where(CorretoraUsuario.id == conta_id))
+
+    async def buscar_por_usuario_e_corretora(self, usuario_id: int, corretora_id: int) -> Optional[CorretoraUsuario]:
+        """
+        Busca conta específica de um usuário em uma corretora
+        Args:
+            usuario_id: ID do usuário
+            corretora_id: ID da corretora
+        """
+        return await self.sessao.scalar(select(CorretoraUsuario).where(
+            CorretoraUsuario.usuario_id == usuario_id,
+            CorretoraUsuario.corretora_id == corretora_id
+        ))
+
+    async def listar_por_usuario(self, usuario_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[CorretoraUsuario]:
+        """
+        Lista contas de um usuário
+        Args:
+            usuario_id: ID do usuário
+            ativo: True=só ativas, False=só inativas, None=todas
+            plano: Relacionamentos carregados junto (ex: planos_carga.CONTA_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
+        """
+        consulta = select(CorretoraUsuario).where(CorretoraUsuario.usuario_id == usuario_id)
+
+        if ativo is not None:
+            consulta = consulta.where(CorretoraUsuario.ativo.is_(ativo))
+
+        return list((await self.sessao.scalars(aplicar_plano(paginar(consulta, CorretoraUsuario, apos_id, limite), plano))).unique())
+
+    async def listar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[CorretoraUsuario]:
+        """
+        Lista contas de uma corretora
+        Args:
+            corretora_id: ID da corretora
+            ativo: True=só ativas, False=só inativas, None=todas
+            plano: Relacionamentos carregados junto (ex: planos_carga.CONTA_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
+        """
+        consulta = select(CorretoraUsuario).where(CorretoraUsuario.corretora_id == corretora_id)
+
+        if ativo is not None:
+            consulta = consulta.where(CorretoraUsuario.ativo.is_(ativo))
+
+        return list((await self.sessao.scalars(aplicar_plano(paginar(consulta, CorretoraUsuario, apos_id, limite), plano))).unique())
+
+    async def listar_por_usuarios(self, usuario_ids: List[int], corretora_id: int, ativo: Optional[bool] = True) -> List[CorretoraUsuario]:
+        """
+        Lista, em uma única consulta, as contas de vários usuários em uma corretora
+        Args:
+            usuario_ids: IDs dos usuários
+            corretora_id: ID da corretora
+            ativo: True=só ativas, False=só inativas, None=todas
+        """
+        consulta = select(CorretoraUsuario).where(
+            CorretoraUsuario.usuario_id.in_(usuario_ids),
+            CorretoraUsuario.corretora_id == corretora_id
+        )
+
+        if ativo is not None:
+            consulta = consulta.where(CorretoraUsuario.ativo.is_(ativo))
+
+        return list(await self.sessao.scalars(consulta))
+
+    async def listar_com_bots_ativos(self, limite: Optional[int] = None) -> List[CorretoraUsuario]:
+        """
+        Lista contas ativas que seguem algum bot ativo da própria corretora, em ordem de id
+        Args:
+            limite: Quantidade máxima de contas; None traz todas
+        """
+        return list(await self.sessao.scalars(consulta_com_bots_ativos(limite)))
+
+    async def buscar_por_login(self, corretora_id: int, login: str) -> Optional[CorretoraUsuario]:
+        """
+        Busca conta por login específico na corretora
+        Args:
+            corretora_id: ID da corretora
+            login: Login da conta
+        """
+        return await self.sessao.scalar(select(CorretoraUsuario).where(
+            CorretoraUsuario.corretora_id == corretora_id,
+            CorretoraUsuario.login == login
+        ))
+
+    def iterar_por_corretora(
+        self,
+        corretora_id: int,
+        ativo: Optional[bool] = True,
+        colunas: Optional[Sequence[Any]] = None,
+        tamanho_lote: int = TAMANHO_LOTE_STREAM,
+    ) -> AsyncIterator[Any]:
+        """
+        Percorre as contas de uma corretora em lotes, com cursor no servidor (memória constante)
+        Args:
+            corretora_id: ID da corretora
+            ativo: True=só ativas, False=só inativas, None=todas
+            colunas: Só estas colunas (ex: [CorretoraUsuario.id, CorretoraUsuario.ativo]), em linhas leves sem objetos ORM
+            tamanho_lote: Linhas buscadas por vez
+        Uso: async for item in repository.iterar_por_corretora(...)
+        """
+        consulta = (select(*colunas) if colunas else select(CorretoraUsuario)).where(CorretoraUsuario.corretora_id == corretora_id)
+
+        if ativo is not None:
+            consulta = consulta.where(CorretoraUsuario.ativo.is_(ativo))
+
+        return iterar_async(self.sessao, consulta.order_by(CorretoraUsuario.id), objetos=not colunas, tamanho_lote=tamanho_lote)
+
+    async def criar(self, conta: CorretoraUsuario) -> CorretoraUsuario:
+        """Cria nova conta"""
+        self.sessao.add(conta)
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, conta)
+        return conta
+
+    async def atualizar(self, conta: CorretoraUsuario) -> CorretoraUsuario:
+        """Atualiza conta existente"""
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, conta)
+        return conta
+
+    async def atualizar_por_id(self, conta_id: int, dados: Dict[str, Any]) -> Optional[CorretoraUsuario]:
+        """
+        Atualiza campos da conta com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            conta_id: ID da conta
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Conta atualizada, ou None se não existe
+        """
+        return await operacoes_lote.atualizar_por_id_async(self.sessao, CorretoraUsuario, conta_id, dados)
+
+    async def atualizar_token(self, conta_id: int, token_jwt: str) -> None:
+        """
+        Grava o token JWT renovado da conta
+        Args:
+            conta_id: ID da conta
+            token_jwt: Token obtido no login da corretora
+        """
+        await self.sessao.execute(
+            update(CorretoraUsuario).where(CorretoraUsuario.id == conta_id).values(token_jwt=token_jwt)
+        )
+        await confirmar_async(self.sessao)
+
+    async def criar_em_lote(self, contas: List[CorretoraUsuario]) -> List[CorretoraUsuario]:
+        """
+        Cria vários registros com INSERT em lote (RETURNING) e um único commit
+        Args:
+            contas: Contas novas
+        Returns:
+            Contas criadas, com id, na mesma ordem
+        """
+        return await operacoes_lote.criar_em_lote_async(self.sessao, contas)
+
+    async def atualizar_em_lote(self, alteracoes: List[Dict[str, Any]]) -> int:
+        """
+        Atualiza várias contas pelo id com UPDATE em lote e um único commit
+        Args:
+            alteracoes: Um dicionário por conta, com "id" e os campos a alterar
+        """
+        return await operacoes_lote.atualizar_em_lote_async(self.sessao, CorretoraUsuario, alteracoes)
+
+    async def desativar_em_lote(self, conta_ids: List[int]) -> List[int]:
+        """
+        Soft delete de várias contas com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs desativados (os que estavam ativos)
+        """
+        return await operacoes_lote.definir_ativo_em_lote_async(self.sessao, CorretoraUsuario, conta_ids, False)
+
+    async def ativar_em_lote(self, conta_ids: List[int]) -> List[int]:
+        """
+        Reativa várias contas com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs ativados (os que estavam inativos)
+        """
+        return await operacoes_lote.definir_ativo_em_lote_async(self.sessao, CorretoraUsuario, conta_ids, True)
+
+    async def desativar(self, conta_id: int) -> bool:
+        """Soft delete - marca conta como inativa com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, CorretoraUsuario, conta_id, False)
+
+    async def ativar(self, conta_id: int) -> bool:
+        """Reativa conta inativa com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, CorretoraUsuario, conta_id, True)
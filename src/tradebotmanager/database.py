@@ -1,18 +1,237 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import threading
+from contextlib import AsyncExitStack
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Type
-from env_variables import DATABASE_URL
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, Optional, Type
+from unidade_trabalho import UnidadeDeTrabalho
 
-engine = create_engine(DATABASE_URL, echo=True)
-
-BancoDeDados = sessionmaker(autocommit=False, autoflush=False, bind=engine, pool_pre_ping=True)
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+    from sqlalchemy.orm import sessionmaker
+    from perfil_banco import PerfilBanco
 
 ModelBase: Type = declarative_base()
 
+# Engines, réplicas e fábricas de sessão são criadas no primeiro uso, não no
+# import: importar os models, scripts e a coleta de testes não leem o .env nem
+# montam pools. Os nomes antigos continuam valendo (from database import engine)
+# e criam os recursos na primeira leitura; ver __getattr__ no fim do módulo.
+_recursos: Dict[str, Any] = {}
+_trava = threading.RLock()
+
+
+def _obter(nome: str, criar: Callable[[], Dict[str, Any]]) -> Any:
+    if nome not in _recursos:
+        with _trava:
+            if nome not in _recursos:
+                _recursos.update(criar())
+    return _recursos[nome]
+
+
+def _criar_perfil() -> Dict[str, Any]:
+    from perfil_banco import PerfilBanco
+
+    return {"perfil_banco": PerfilBanco.do_ambiente()}
+
+
+def obter_perfil_banco() -> "PerfilBanco":
+    """Perfil das engines, lido das variáveis DB_* no primeiro uso"""
+    return _obter("perfil_banco", _criar_perfil)
+
+
+def converter_url_async(url: str) -> str:
+    """Troca o driver síncrono da URL pelo assíncrono (asyncpg; aiosqlite para testes locais)"""
+    url_banco = make_url(url)
+    if url_banco.get_backend_name() == "postgresql":
+        url_banco = url_banco.set(drivername="postgresql+asyncpg")
+    elif url_banco.get_backend_name() == "sqlite":
+        url_banco = url_banco.set(drivername="sqlite+aiosqlite")
+    return url_banco.render_as_string(hide_password=False)
+
+
+def opcoes_replica(url: str, assincrona: bool = False) -> Dict[str, Any]:
+    """Perfil da engine para réplicas Postgres; um arquivo SQLite (testes locais) usa o padrão"""
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+    return obter_perfil_banco().opcoes_engine(url, assincrona=assincrona)
+
+
+def _criar_sincrono() -> Dict[str, Any]:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from env_variables import DATABASE_REPLICA_URLS, DATABASE_URL, DB_REPLICA_ATRASO_MAX_S, DB_REPLICA_VERIFICACAO_S
+    from roteamento_banco import SessaoRoteada, criar_replicas
+
+    perfil_banco = obter_perfil_banco()
+    engine = create_engine(DATABASE_URL, **perfil_banco.opcoes_engine(DATABASE_URL))
+    perfil_banco.instrumentar(engine, "sync")
+
+    # Réplicas de leitura opcionais; sem DATABASE_REPLICA_URLS tudo vai para a primária
+    replicas = criar_replicas(
+        "sync",
+        [create_engine(url, **opcoes_replica(url)) for url in DATABASE_REPLICA_URLS],
+        DB_REPLICA_ATRASO_MAX_S,
+        DB_REPLICA_VERIFICACAO_S,
+    )
+    for replica in replicas:
+        perfil_banco.instrumentar(replica.engine, replica.nome)
+
+    return {
+        "engine": engine,
+        "replicas": replicas,
+        "BancoDeDados": sessionmaker(class_=SessaoRoteada, replicas=replicas, autocommit=False, autoflush=False, bind=engine),
+    }
+
+
+def _criar_assincrono() -> Dict[str, Any]:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from env_variables import DATABASE_REPLICA_URLS, DATABASE_URL, DB_REPLICA_ATRASO_MAX_S, DB_REPLICA_VERIFICACAO_S
+    from roteamento_banco import SessaoRoteada, criar_replicas
+
+    # Engine assíncrona para os handlers do FastAPI; a síncrona continua para scripts
+    perfil_banco = obter_perfil_banco()
+    engine_async = create_async_engine(converter_url_async(DATABASE_URL), **perfil_banco.opcoes_engine(DATABASE_URL, assincrona=True))
+    perfil_banco.instrumentar(engine_async.sync_engine, "async")
+
+    engines_replica_async = [
+        create_async_engine(converter_url_async(url), **opcoes_replica(url, assincrona=True))
+        for url in DATABASE_REPLICA_URLS
+    ]
+    replicas_async = criar_replicas(
+        "async",
+        [engine_replica.sync_engine for engine_replica in engines_replica_async],
+        DB_REPLICA_ATRASO_MAX_S,
+        DB_REPLICA_VERIFICACAO_S,
+        engines_replica_async,
+    )
+    for replica in replicas_async:
+        perfil_banco.instrumentar(replica.engine, replica.nome)
+
+    return {
+        "engine_async": engine_async,
+        "engines_replica_async": engines_replica_async,
+        "replicas_async": replicas_async,
+        # expire_on_commit=False: objetos continuam legíveis após o commit sem novo I/O implícito
+        "BancoDeDadosAsync": async_sessionmaker(
+            bind=engine_async,
+            class_=AsyncSession,
+            sync_session_class=SessaoRoteada,
+            replicas=replicas_async,
+            autoflush=False,
+            expire_on_commit=False,
+        ),
+    }
+
+
+def obter_engine() -> "Engine":
+    """Engine síncrona (scripts, teste.py), criada no primeiro uso"""
+    return _obter("engine", _criar_sincrono)
+
+
+def obter_engine_async() -> "AsyncEngine":
+    """Engine assíncrona dos handlers do FastAPI, criada no primeiro uso"""
+    return _obter("engine_async", _criar_assincrono)
+
+
+def fabrica_sessoes() -> "sessionmaker":
+    """sessionmaker síncrono (BancoDeDados)"""
+    return _obter("BancoDeDados", _criar_sincrono)
+
+
+def fabrica_sessoes_async() -> "async_sessionmaker":
+    """async_sessionmaker dos handlers (BancoDeDadosAsync)"""
+    return _obter("BancoDeDadosAsync", _criar_assincrono)
+
+
+async def aquecer_pool_async(conexoes: Optional[int] = None) -> int:
+    """
+    Abre conexões da engine assíncrona com um SELECT 1, para que as primeiras
+    requisições encontrem o pool pronto em vez de pagar a conexão (TCP, TLS e
+    autenticação). As conexões voltam ao pool ao fim.
+
+    Args:
+        conexoes: Quantas conexões abrir ao mesmo tempo; None = DB_AQUECER_CONEXOES
+
+    Returns:
+        Quantidade de conexões abertas com sucesso
+    """
+    from sqlalchemy import text
+    import env_variables
+
+    engine_async = obter_engine_async()
+    quantidade = env_variables.DB_AQUECER_CONEXOES if conexoes is None else conexoes
+
+    # Todas ficam abertas juntas até o fim do bloco; em sequência, o pool reaproveitaria a mesma
+    async with AsyncExitStack() as pilha:
+        async def abrir() -> None:
+            conexao = await pilha.enter_async_context(engine_async.connect())
+            await conexao.execute(text("SELECT 1"))
+
+        resultados = await asyncio.gather(*(abrir() for _ in range(quantidade)), return_exceptions=True)
+
+    falhas = [resultado for resultado in resultados if isinstance(resultado, BaseException)]
+    if falhas and len(falhas) == len(resultados):
+        raise falhas[0]
+    return len(resultados) - len(falhas)
+
+
+async def liberar_engines_async() -> None:
+    """Fecha as conexões das engines assíncronas criadas (desligamento da aplicação)"""
+    if "engine_async" not in _recursos:
+        return
+    await _recursos["engine_async"].dispose()
+    for engine_replica in _recursos["engines_replica_async"]:
+        await engine_replica.dispose()
+
+
 def obter_sessao():
-    sessao = BancoDeDados()
+    sessao = fabrica_sessoes()()
     try:
         yield sessao
     finally:
-        sessao.close()
\ No newline at end of file
+        sessao.close()
+
+
+async def obter_sessao_async() -> AsyncIterator["AsyncSession"]:
+    """Dependência do FastAPI que fornece uma AsyncSession por requisição"""
+    async with fabrica_sessoes_async()() as sessao:
+        yield sessao
+
+
+def obter_unidade_trabalho() -> Iterator:
+    """Sessão com uma unidade de trabalho aberta: um único commit ao fim da requisição"""
+    sessao = fabrica_sessoes()()
+    try:
+        with UnidadeDeTrabalho(sessao):
+            yield sessao
+    finally:
+        sessao.close()
+
+
+async def obter_unidade_trabalho_async() -> AsyncIterator["AsyncSession"]:
+    """Versão assíncrona de obter_unidade_trabalho()"""
+    async with fabrica_sessoes_async()() as sessao:
+        async with UnidadeDeTrabalho(sessao):
+            yield sessao
+
+
+# Nomes antigos do módulo -> quem os cria
+_CRIADORES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "perfil_banco": _criar_perfil,
+    "engine": _criar_sincrono,
+    "replicas": _criar_sincrono,
+    "BancoDeDados": _criar_sincrono,
+    "engine_async": _criar_assincrono,
+    "engines_replica_async": _criar_assincrono,
+    "replicas_async": _criar_assincrono,
+    "BancoDeDadosAsync": _criar_assincrono,
+}
+
+
+def __getattr__(nome: str) -> Any:
+    criar = _CRIADORES.get(nome)
+    if criar is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    return _obter(nome, criar)
@@ -1,16 +1,80 @@
 import os
-import dotenv
+from typing import Any, Callable, Dict
 
-dotenv.load_dotenv()
+# As variáveis são lidas no primeiro acesso (from env_variables import X ou
+# env_variables.X), não no import: importar os models, scripts e a coleta de
+# testes não exige o .env, e uma variável obrigatória ausente só falha em
+# quem de fato a usa.
+_dotenv_carregado = False
 
-DATABASE_URL = os.getenv("DATABASE_URL", "")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL não esta definido nas variaveis de ambiente")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-if not SUPABASE_URL:
-    raise ValueError("SUPABASE_URL não esta definido nas variaveis de ambiente")
+def _carregar_dotenv() -> None:
+    global _dotenv_carregado
+    if not _dotenv_carregado:
+        import dotenv
 
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
-if not SUPABASE_ANON_KEY:
-    raise ValueError("SUPABASE_ANON_KEY não esta definido nas variaveis de ambiente")
+        dotenv.load_dotenv()
+        _dotenv_carregado = True
+
+
+def _obrigatoria(nome: str) -> str:
+    valor = os.getenv(nome, "")
+    if not valor:
+        raise ValueError(f"{nome} não esta definido nas variaveis de ambiente")
+    return valor
+
+
+def _ler_bool(nome: str, padrao: bool) -> bool:
+    return os.getenv(nome, str(padrao)).strip().lower() in ("1", "true", "sim", "yes")
+
+
+def _ler_lista(nome: str) -> list:
+    return [item.strip() for item in os.getenv(nome, "").split(",") if item.strip()]
+
+
+_LEITURAS: Dict[str, Callable[[], Any]] = {
+    "DATABASE_URL": lambda: _obrigatoria("DATABASE_URL"),
+    "SUPABASE_URL": lambda: _obrigatoria("SUPABASE_URL"),
+    "SUPABASE_ANON_KEY": lambda: _obrigatoria("SUPABASE_ANON_KEY"),
+
+    # Perfil da engine do banco (opcionais; os padrões servem para produção)
+    "DB_POOL_SIZE": lambda: int(os.getenv("DB_POOL_SIZE", "5")),
+    "DB_MAX_OVERFLOW": lambda: int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "DB_POOL_TIMEOUT": lambda: float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "DB_POOL_RECYCLE": lambda: int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "DB_POOL_PRE_PING": lambda: _ler_bool("DB_POOL_PRE_PING", True),
+    "DB_STATEMENT_TIMEOUT_MS": lambda: int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")),
+    "DB_PGBOUNCER": lambda: _ler_bool("DB_PGBOUNCER", False),
+    # desligado | lento | amostra | tudo
+    "DB_LOG_SQL": lambda: os.getenv("DB_LOG_SQL", "lento").strip().lower(),
+    "DB_LOG_SQL_LENTO_MS": lambda: float(os.getenv("DB_LOG_SQL_LENTO_MS", "500")),
+    "DB_LOG_SQL_AMOSTRA": lambda: float(os.getenv("DB_LOG_SQL_AMOSTRA", "0.01")),
+    # Conexões abertas no início da aplicação, antes da primeira requisição; vazio = pool_size
+    "DB_AQUECER_CONEXOES": lambda: int(os.getenv("DB_AQUECER_CONEXOES") or os.getenv("DB_POOL_SIZE", "5")),
+
+    # Réplicas de leitura (opcionais): URLs separadas por vírgula; vazio = tudo na primária
+    "DATABASE_REPLICA_URLS": lambda: _ler_lista("DATABASE_REPLICA_URLS"),
+    # Atraso máximo aceito da réplica; acima disso as leituras voltam para a primária
+    "DB_REPLICA_ATRASO_MAX_S": lambda: float(os.getenv("DB_REPLICA_ATRASO_MAX_S", "5")),
+    # Intervalo entre medições do atraso de cada réplica
+    "DB_REPLICA_VERIFICACAO_S": lambda: float(os.getenv("DB_REPLICA_VERIFICACAO_S", "5")),
+
+    # /health/deep: intervalo entre rodadas das sondas e tempo máximo de cada sonda
+    "SAUDE_INTERVALO_S": lambda: float(os.getenv("SAUDE_INTERVALO_S", "15")),
+    "SAUDE_TEMPO_LIMITE_S": lambda: float(os.getenv("SAUDE_TEMPO_LIMITE_S", "5")),
+}
+
+
+def __getattr__(nome: str) -> Any:
+    leitura = _LEITURAS.get(nome)
+    if leitura is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    _carregar_dotenv()
+    valor = leitura()
+    # Guarda no módulo: os próximos acessos não passam mais por aqui
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LEITURAS))
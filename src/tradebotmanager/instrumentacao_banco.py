@@ -0,0 +1,204 @@
+import functools
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from metricas import registro_metricas
+
+logger = logging.getLogger("tradebotmanager.sql")
+
+# Método de repository que está executando (ex: BotUsuarioOpMktRepository.listar_por_corretora)
+metodo_atual: ContextVar[str] = ContextVar("metodo_atual", default="desconhecido")
+
+duracao_comandos = registro_metricas.histograma(
+    "banco_comando_segundos",
+    "Duração dos comandos SQL por método de repository",
+    ("metodo",),
+)
+linhas_comandos = registro_metricas.contador(
+    "banco_linhas_total",
+    "Linhas retornadas ou afetadas por método de repository",
+    ("metodo",),
+)
+erros_comandos = registro_metricas.contador(
+    "banco_comando_erros_total",
+    "Comandos SQL que falharam (erro do banco, statement_timeout, conexão perdida)",
+    ("metodo",),
+)
+n_mais_um = registro_metricas.contador(
+    "banco_n_mais_um_total",
+    "Escopos (requisições) em que o mesmo comando repetiu além do limite",
+    ("metodo",),
+)
+
+
+class EscopoConsultas:
+    """Comandos executados dentro de uma requisição (ou job), para detectar N+1"""
+
+    def __init__(self, nome: str, limite_repeticoes: int = 5):
+        """
+        Args:
+            nome: Identificação do escopo nos logs (ex: GET /usuarios)
+            limite_repeticoes: Execuções do mesmo comando a partir das quais é N+1
+        """
+        self.nome = nome
+        self.limite_repeticoes = limite_repeticoes
+        self.comandos = 0
+        self.duracao = 0.0
+        # (método, comando) -> execuções
+        self.repeticoes: Dict[Tuple[str, str], int] = {}
+        self.alertados: Set[Tuple[str, str]] = set()
+
+    def registrar(self, metodo: str, comando: str, duracao: float) -> None:
+        self.comandos += 1
+        self.duracao += duracao
+        chave = (metodo, comando)
+        quantidade = self.repeticoes[chave] = self.repeticoes.get(chave, 0) + 1
+        if quantidade >= self.limite_repeticoes and chave not in self.alertados:
+            self.alertados.add(chave)
+            n_mais_um.incrementar(metodo)
+            logger.warning(
+                "Possível N+1 em %s: %s repetiu %d vezes: %s",
+                self.nome, metodo, quantidade, _resumir(comando),
+            )
+
+
+escopo_atual: ContextVar[Optional[EscopoConsultas]] = ContextVar("escopo_consultas", default=None)
+
+
+@contextmanager
+def escopo_consultas(nome: str, limite_repeticoes: int = 5) -> Iterator[EscopoConsultas]:
+    """
+    Agrupa os comandos executados no bloco (ex: uma requisição HTTP ou um job)
+    para detectar o mesmo comando repetido várias vezes
+
+    Args:
+        nome: Identificação do escopo nos logs
+        limite_repeticoes: Execuções do mesmo comando a partir das quais é N+1
+    """
+    escopo = EscopoConsultas(nome, limite_repeticoes)
+    token = escopo_atual.set(escopo)
+    try:
+        yield escopo
+    finally:
+        escopo_atual.reset(token)
+
+
+def medir_repository(classe: type) -> type:
+    """
+    Decorador de classe: marca os comandos SQL de cada método público com
+    "Classe.metodo", para atribuir tempo e linhas ao método que os executou
+    """
+    for nome, metodo in list(vars(classe).items()):
+        if nome.startswith("_") or not inspect.isfunction(metodo):
+            continue
+        setattr(classe, nome, _marcar(f"{classe.__name__}.{nome}", metodo))
+    return classe
+
+
+def _marcar(rotulo: str, metodo: Callable) -> Callable:
+    if inspect.iscoroutinefunction(metodo):
+        @functools.wraps(metodo)
+        async def marcado_async(*args, **kwargs):
+            token = metodo_atual.set(rotulo)
+            try:
+                return await metodo(*args, **kwargs)
+            finally:
+                metodo_atual.reset(token)
+        return marcado_async
+
+    @functools.wraps(metodo)
+    def marcado(*args, **kwargs):
+        token = metodo_atual.set(rotulo)
+        try:
+            return metodo(*args, **kwargs)
+        finally:
+            metodo_atual.reset(token)
+    return marcado
+
+
+def instrumentar_comandos(engine: Engine, nome: str, deve_logar: Callable[[float], bool]) -> None:
+    """
+    Mede cada comando SQL da engine e loga os que `deve_logar` aprovar.
+    Comandos que falham também são medidos e sempre logados.
+
+    Args:
+        engine: Engine síncrona (para a assíncrona, engine_async.sync_engine)
+        nome: Rótulo da engine nos logs
+        deve_logar: Recebe a duração em ms e decide se o comando vai para o log
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def antes(conexao, cursor, comando, parametros, contexto, executemany):
+        conexao.info.setdefault("inicio_comandos", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def depois(conexao, cursor, comando, parametros, contexto, executemany):
+        duracao = time.perf_counter() - conexao.info["inicio_comandos"].pop()
+        metodo = metodo_atual.get()
+        linhas = max(0, getattr(cursor, "rowcount", 0) or 0)
+
+        _registrar(metodo, comando, duracao)
+        if linhas:
+            linhas_comandos.incrementar(metodo, valor=linhas)
+
+        if deve_logar(duracao * 1000):
+            logger.warning(
+                "[%s] %s %.1f ms, %d linhas: %s | parâmetros: %s",
+                nome, metodo, duracao * 1000, linhas, _resumir(comando), redigir_parametros(parametros),
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def erro(contexto):
+        # after_cursor_execute não roda quando o comando falha: sem isto o início
+        # ficaria na pilha da conexão e o próximo comando mediria a duração errada
+        conexao = contexto.connection
+        if conexao is None or not conexao.info.get("inicio_comandos") or contexto.statement is None:
+            return
+        duracao = time.perf_counter() - conexao.info["inicio_comandos"].pop()
+        metodo = metodo_atual.get()
+
+        _registrar(metodo, contexto.statement, duracao)
+        erros_comandos.incrementar(metodo)
+        logger.warning(
+            "[%s] %s falhou após %.1f ms (%s): %s | parâmetros: %s",
+            nome, metodo, duracao * 1000, type(contexto.original_exception).__name__,
+            _resumir(contexto.statement), redigir_parametros(contexto.parameters),
+        )
+
+
+def _registrar(metodo: str, comando: str, duracao: float) -> None:
+    """Duração do comando no histograma e no escopo de consultas atual"""
+    duracao_comandos.observar(duracao, metodo)
+    escopo = escopo_atual.get()
+    if escopo is not None:
+        escopo.registrar(metodo, comando, duracao)
+
+
+def redigir_parametros(parametros: Any) -> Any:
+    """Troca os valores dos parâmetros pelo tipo (e tamanho), para logar sem dados sensíveis"""
+    if isinstance(parametros, dict):
+        return {chave: _redigir(valor) for chave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        if parametros and isinstance(parametros[0], (dict, list, tuple)):
+            # executemany: mostra o formato do primeiro e a quantidade
+            return f"{len(parametros)}x {redigir_parametros(parametros[0])}"
+        return [_redigir(valor) for valor in parametros]
+    return _redigir(parametros)
+
+
+def _redigir(valor: Any) -> str:
+    if valor is None:
+        return "None"
+    if isinstance(valor, (str, bytes)):
+        return f"<{type(valor).__name__}:{len(valor)}>"
+    return f"<{type(valor).__name__}>"
+
+
+def _resumir(comando: str, limite: int = 500) -> str:
+    comando = " ".join(comando.split())
+    return comando if len(comando) <= limite else comando[:limite] + "..."
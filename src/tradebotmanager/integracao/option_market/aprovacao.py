@@ -0,0 +1,392 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set
+
+STATUS_APROVADO = "APPROVED"
+
+# Prazo padrão de quem espera a aprovação bloqueado (atualizar_status_aprovado):
+# um id que nunca aparece entre os ativos não segura a chamada pelo prazo do observador
+PRAZO_ESPERA_BLOQUEANTE = 20
+
+
+class AprovacaoPendente:
+    """Copy-trade aguardando ficar com status APPROVED na corretora"""
+
+    def __init__(self, broker_copy_id: str, prazo: float, max_correcoes: int):
+        """
+        Args:
+            broker_copy_id: ID do copy-trade na corretora
+            prazo: Segundos até desistir de esperar a aprovação
+            max_correcoes: Máximo de refuse/approve enviados para o copy-trade
+        """
+        self.broker_copy_id = broker_copy_id
+        self.futuro: Future = Future()
+        self.registrado_em = time.monotonic()
+        self.limite = self.registrado_em + prazo
+        self.max_correcoes = max_correcoes
+        self.correcoes = 0
+        self.ultima_correcao: Optional[float] = None
+
+    def concluir(self, aprovado: bool) -> None:
+        if not self.futuro.done():
+            self.futuro.set_result(aprovado)
+
+    def falhar(self, erro: BaseException) -> None:
+        if not self.futuro.done():
+            self.futuro.set_exception(erro)
+
+
+class VigiaConta:
+    """
+    Aprovações pendentes de uma conta e o intervalo atual de consulta.
+
+    Guarda só o estado e as decisões de cada rodada; quem consulta a
+    corretora é o observador (thread no síncrono, task no assíncrono).
+    """
+
+    def __init__(self, repository: Any, intervalo_inicial: float, intervalo_maximo: float, tolerancia: float):
+        """
+        Args:
+            repository: OptionMarketRepository (ou a versão assíncrona) da conta
+            intervalo_inicial: Segundos entre consultas logo após uma mudança
+            intervalo_maximo: Maior intervalo entre consultas sem mudanças
+            tolerancia: Segundos que um copy-trade pode ficar sem aprovação antes de ser corrigido
+        """
+        self.repository = repository
+        self.intervalo_inicial = intervalo_inicial
+        self.intervalo_maximo = intervalo_maximo
+        self.tolerancia = tolerancia
+        self.intervalo = intervalo_inicial
+        self.pendentes: Dict[str, AprovacaoPendente] = {}
+        self.consultas = 0
+        self.correcoes = 0
+        # Thread ou task que consulta a corretora para a conta
+        self.executor: Any = None
+        # threading.Event ou asyncio.Event usado para antecipar a próxima consulta
+        self.acordar: Any = None
+        self._trava = threading.Lock()
+
+    def adicionar(self, pendente: AprovacaoPendente) -> AprovacaoPendente:
+        """Registra a aprovação; se o id já é observado, retorna a espera existente"""
+        with self._trava:
+            existente = self.pendentes.get(pendente.broker_copy_id)
+            if existente is not None:
+                return existente
+            self.pendentes[pendente.broker_copy_id] = pendente
+            self.intervalo = self.intervalo_inicial
+            return pendente
+
+    def ids(self) -> Set[str]:
+        with self._trava:
+            return set(self.pendentes)
+
+    def processar(self, status: Dict[str, Optional[str]]) -> List[str]:
+        """
+        Aplica o resultado de uma consulta à listagem da conta
+
+        Args:
+            status: broker_copy_id -> status, dos ids pendentes encontrados entre os ativos
+
+        Returns:
+            IDs presos (encontrados e ainda não aprovados) que devem receber refuse/approve
+        """
+        agora = time.monotonic()
+        presos: List[str] = []
+        concluidos = 0
+
+        with self._trava:
+            self.consultas += 1
+            for broker_copy_id, pendente in list(self.pendentes.items()):
+                atual = status.get(broker_copy_id)
+                if atual == STATUS_APROVADO:
+                    self._concluir(pendente, True)
+                    concluidos += 1
+                elif agora >= pendente.limite:
+                    self._concluir(pendente, False)
+                    concluidos += 1
+                elif atual is not None and agora - (pendente.ultima_correcao or pendente.registrado_em) >= self.tolerancia:
+                    if pendente.correcoes >= pendente.max_correcoes:
+                        self._concluir(pendente, False)
+                        concluidos += 1
+                    else:
+                        presos.append(broker_copy_id)
+
+            # Sem novidades a consulta espaça; qualquer mudança volta ao intervalo inicial
+            if presos or concluidos:
+                self.intervalo = self.intervalo_inicial
+            else:
+                self.intervalo = min(self.intervalo_maximo, self.intervalo * 2)
+
+        return presos
+
+    def registrar_correcao(self, broker_copy_id: str, erro: Optional[BaseException] = None) -> None:
+        """Registra o refuse/approve enviado para o copy-trade; um erro encerra a espera dele"""
+        with self._trava:
+            pendente = self.pendentes.get(broker_copy_id)
+            if pendente is None:
+                return
+            self.correcoes += 1
+            pendente.correcoes += 1
+            pendente.ultima_correcao = time.monotonic()
+            if erro is not None:
+                pendente.falhar(erro)
+                del self.pendentes[broker_copy_id]
+
+    def registrar_falha_consulta(self, erro: BaseException) -> None:
+        """A listagem falhou: encerra com o erro as esperas vencidas e espaça a próxima consulta"""
+        agora = time.monotonic()
+        with self._trava:
+            for broker_copy_id, pendente in list(self.pendentes.items()):
+                if agora >= pendente.limite:
+                    pendente.falhar(erro)
+                    del self.pendentes[broker_copy_id]
+            self.intervalo = min(self.intervalo_maximo, self.intervalo * 2)
+
+    def vazio(self) -> bool:
+        with self._trava:
+            return not self.pendentes
+
+    def falhar_todos(self, erro: BaseException) -> None:
+        """Encerra com o erro todas as esperas (ex: o consultor não pode mais rodar)"""
+        with self._trava:
+            for pendente in self.pendentes.values():
+                pendente.falhar(erro)
+            self.pendentes.clear()
+
+    def _concluir(self, pendente: AprovacaoPendente, aprovado: bool) -> None:
+        """Encerra a espera. Chamar com a trava."""
+        pendente.concluir(aprovado)
+        del self.pendentes[pendente.broker_copy_id]
+
+
+class ObservadorAprovacoes:
+    """
+    Acompanha copy-trades até ficarem aprovados na corretora.
+
+    Em vez de cada chamada mandar refuse/approve e baixar a listagem por
+    conta própria, os ids são registrados aqui e recebem um Future. Cada
+    conta tem um único consultor, que a cada rodada lê a listagem de ativos
+    uma vez para todos os ids pendentes (parando quando achar todos) e só
+    manda refuse/approve para os que estão presos há mais de `tolerancia`
+    segundos. O intervalo entre rodadas dobra enquanto nada muda.
+
+    Esta versão consulta em uma thread por conta com pendências, usando o
+    OptionMarketRepository síncrono.
+    """
+
+    def __init__(
+        self,
+        intervalo_inicial: float = 1,
+        intervalo_maximo: float = 30,
+        tolerancia: float = 3,
+        prazo: float = 120,
+        max_correcoes: int = 3,
+    ):
+        """
+        Args:
+            intervalo_inicial: Segundos entre consultas logo após uma mudança
+            intervalo_maximo: Maior intervalo entre consultas sem mudanças
+            tolerancia: Segundos sem aprovação antes de mandar refuse/approve
+            prazo: Segundos até desistir de uma aprovação (resultado False)
+            max_correcoes: Padrão de refuse/approve enviados por copy-trade
+        """
+        self.intervalo_inicial = intervalo_inicial
+        self.intervalo_maximo = intervalo_maximo
+        self.tolerancia = tolerancia
+        self.prazo = prazo
+        self.max_correcoes = max_correcoes
+        self._contas: Dict[str, VigiaConta] = {}
+        self._trava = threading.Lock()
+
+    def observar(
+        self,
+        repository: Any,
+        broker_copy_id: str,
+        ao_concluir: Optional[Callable[[str, bool], None]] = None,
+        max_correcoes: Optional[int] = None,
+        prazo: Optional[float] = None,
+    ) -> Future:
+        """
+        Registra um copy-trade para acompanhar até a aprovação
+
+        Args:
+            repository: Repository da conta dona do copy-trade
+            broker_copy_id: ID do copy-trade na corretora
+            ao_concluir: Chamada com (broker_copy_id, aprovado) ao fim da espera; erros e cancelamento contam como não aprovado
+            max_correcoes: Máximo de refuse/approve para este copy-trade
+            prazo: Segundos até desistir da aprovação
+
+        Returns:
+            Future com True se aprovado, False se o prazo ou as correções acabaram.
+            Falhas ao recusar/aprovar são repassadas como exceção.
+        """
+        pendente = AprovacaoPendente(
+            broker_copy_id,
+            self.prazo if prazo is None else prazo,
+            self.max_correcoes if max_correcoes is None else max_correcoes,
+        )
+        with self._trava:
+            chave = self._chave(repository.client.email)
+            vigia = self._contas.get(chave)
+            if vigia is None or not self._ativo(vigia):
+                vigia = VigiaConta(repository, self.intervalo_inicial, self.intervalo_maximo, self.tolerancia)
+                self._contas[chave] = vigia
+                pendente = vigia.adicionar(pendente)
+                self._iniciar(chave, vigia)
+            else:
+                # O repository mais recente tem o cliente atual da conta
+                vigia.repository = repository
+                pendente = vigia.adicionar(pendente)
+                self._antecipar(vigia)
+
+        if ao_concluir is not None:
+            pendente.futuro.add_done_callback(
+                lambda futuro: ao_concluir(
+                    broker_copy_id,
+                    not futuro.cancelled() and not futuro.exception() and futuro.result(),
+                )
+            )
+        return pendente.futuro
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Contas com consultor ativo, aprovações pendentes, consultas e correções enviadas"""
+        with self._trava:
+            vigias = list(self._contas.values())
+        return {
+            "contas": len(vigias),
+            "pendentes": sum(len(v.ids()) for v in vigias),
+            "consultas": sum(v.consultas for v in vigias),
+            "correcoes": sum(v.correcoes for v in vigias),
+        }
+
+    def _chave(self, conta: str) -> Any:
+        """Chave do consultor em _contas: um por conta. Chamar com a trava."""
+        return conta
+
+    def _encerrar_se_vazio(self, chave: Any, vigia: VigiaConta) -> bool:
+        """Remove o consultor da conta se não há mais pendências"""
+        with self._trava:
+            if not vigia.vazio():
+                return False
+            if self._contas.get(chave) is vigia:
+                del self._contas[chave]
+            return True
+
+    def _ativo(self, vigia: VigiaConta) -> bool:
+        return vigia.executor is not None and vigia.executor.is_alive()
+
+    def _iniciar(self, conta: str, vigia: VigiaConta) -> None:
+        vigia.acordar = threading.Event()
+        vigia.executor = threading.Thread(
+            target=self._vigiar, args=(conta, vigia), name=f"aprovacoes-{conta}", daemon=True
+        )
+        vigia.executor.start()
+
+    def _antecipar(self, vigia: VigiaConta) -> None:
+        vigia.acordar.set()
+
+    def _vigiar(self, conta: str, vigia: VigiaConta) -> None:
+        """Laço do consultor da conta: uma listagem por rodada para todos os pendentes"""
+        while not self._encerrar_se_vazio(conta, vigia):
+            repository = vigia.repository
+            try:
+                status = ler_status(repository.iterar_bots(ativo=True), vigia.ids())
+            except Exception as exc:
+                vigia.registrar_falha_consulta(exc)
+            else:
+                for broker_copy_id in vigia.processar(status):
+                    try:
+                        repository.forcar_aprovacao(broker_copy_id)
+                        vigia.registrar_correcao(broker_copy_id)
+                    except Exception as exc:
+                        vigia.registrar_correcao(broker_copy_id, exc)
+
+            vigia.acordar.wait(vigia.intervalo)
+            vigia.acordar.clear()
+
+
+class ObservadorAprovacoesAsync(ObservadorAprovacoes):
+    """
+    Versão de ObservadorAprovacoes para o OptionMarketRepositoryAsync:
+    o consultor de cada conta é uma task no event loop de quem registrou.
+    O Future retornado por observar() pode ser aguardado com asyncio.wrap_future().
+
+    Os consultores são separados por event loop (a task e o asyncio.Event só
+    valem no loop em que foram criados). Consultores de um loop já fechado
+    são descartados e suas esperas encerradas com erro.
+    """
+
+    def _chave(self, conta: str) -> Any:
+        """(event loop atual, conta); descarta os consultores de loops fechados. Chamar com a trava."""
+        for chave, vigia in list(self._contas.items()):
+            if vigia.executor is not None and vigia.executor.get_loop().is_closed():
+                del self._contas[chave]
+                vigia.falhar_todos(RuntimeError("Event loop do observador de aprovações foi encerrado"))
+        return asyncio.get_running_loop(), conta
+
+    def _ativo(self, vigia: VigiaConta) -> bool:
+        return vigia.executor is not None and not vigia.executor.done()
+
+    def _iniciar(self, chave: Any, vigia: VigiaConta) -> None:
+        vigia.acordar = asyncio.Event()
+        vigia.executor = asyncio.get_running_loop().create_task(self._vigiar(chave, vigia))
+
+    async def _vigiar(self, chave: Any, vigia: VigiaConta) -> None:
+        """Laço do consultor da conta: uma listagem por rodada para todos os pendentes"""
+        while not self._encerrar_se_vazio(chave, vigia):
+            repository = vigia.repository
+            try:
+                status = await ler_status_async(repository.iterar_bots(ativo=True), vigia.ids())
+            except Exception as exc:
+                vigia.registrar_falha_consulta(exc)
+            else:
+                for broker_copy_id in vigia.processar(status):
+                    try:
+                        await repository.forcar_aprovacao(broker_copy_id)
+                        vigia.registrar_correcao(broker_copy_id)
+                    except Exception as exc:
+                        vigia.registrar_correcao(broker_copy_id, exc)
+
+            try:
+                await asyncio.wait_for(vigia.acordar.wait(), vigia.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            vigia.acordar.clear()
+
+
+def ler_status(bots, ids: Set[str]) -> Dict[str, Optional[str]]:
+    """
+    Lê o status dos ids procurados numa listagem de copy-trades,
+    parando a iteração (e as páginas seguintes) ao achar todos
+    """
+    status: Dict[str, Optional[str]] = {}
+    for bot in bots:
+        if bot["id"] in ids:
+            status[bot["id"]] = bot.get("status")
+            if len(status) == len(ids):
+                break
+    if hasattr(bots, "close"):
+        # Interrompe o gerador agora, cancelando a página pré-carregada
+        bots.close()
+    return status
+
+
+async def ler_status_async(bots, ids: Set[str]) -> Dict[str, Optional[str]]:
+    """Versão de ler_status() para iteradores assíncronos"""
+    status: Dict[str, Optional[str]] = {}
+    async for bot in bots:
+        if bot["id"] in ids:
+            status[bot["id"]] = bot.get("status")
+            if len(status) == len(ids):
+                break
+    if hasattr(bots, "aclose"):
+        # Interrompe o gerador agora, cancelando a página pré-carregada
+        await bots.aclose()
+    return status
+
+
+# Instâncias únicas do processo
+observador_aprovacoes = ObservadorAprovacoes()
+observador_aprovacoes_async = ObservadorAprovacoesAsync()
@@ -0,0 +1,103 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from cache import CacheTTL
+
+
+class ListagemEmCache:
+    """Listagem completa de copy-trades de uma conta, com os ids alterados desde a leitura"""
+
+    def __init__(self, bots: Iterable[dict]):
+        self.itens: Dict[str, dict] = {bot["id"]: bot for bot in bots}
+        # Ids alterados por escrita: o valor guardado não é mais confiável
+        self.sujos: Set[str] = set()
+
+
+class CacheListagens:
+    """
+    Cache de curta duração das listagens de copy-trade por conta (ativos e inativos).
+
+    Escritas (seguir, deixar de seguir, aprovar/recusar) marcam apenas o id
+    afetado como sujo: a próxima leitura desse id vai à corretora, as
+    leituras dos demais ids continuam sendo respondidas pelo cache.
+    """
+
+    def __init__(self, ttl: float = 15, max_contas: int = 1000):
+        """
+        Args:
+            ttl: Segundos que uma listagem permanece válida
+            max_contas: Quantidade máxima de listagens (conta, ativo) mantidas
+        """
+        self._listagens = CacheTTL(ttl, max_itens=max_contas * 2)
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter_listagem(self, conta: str, ativo: bool) -> Optional[List[dict]]:
+        """Retorna a listagem completa da conta, se em cache e sem ids sujos"""
+        with self._trava:
+            listagem = self._listagens.obter((conta, ativo))
+            if listagem is None or listagem.sujos:
+                self.falhas += 1
+                return None
+
+            self.acertos += 1
+            return list(listagem.itens.values())
+
+    def buscar(self, conta: str, ativo: bool, broker_copy_id: str) -> Tuple[bool, Optional[dict]]:
+        """
+        Procura um copy-trade na listagem em cache
+
+        Returns:
+            (encontrado_no_cache, bot). bot é None quando o cache garante que o id não está na listagem.
+        """
+        with self._trava:
+            listagem = self._listagens.obter((conta, ativo))
+            if listagem is None or broker_copy_id in listagem.sujos:
+                self.falhas += 1
+                return False, None
+
+            self.acertos += 1
+            return True, listagem.itens.get(broker_copy_id)
+
+    def guardar_listagem(self, conta: str, ativo: bool, bots: List[dict]) -> None:
+        """Guarda a listagem completa lida da corretora"""
+        with self._trava:
+            self._listagens.guardar((conta, ativo), ListagemEmCache(bots))
+
+    def atualizar_itens(self, conta: str, ativo: bool, bots: Iterable[dict]) -> None:
+        """Atualiza na listagem em cache os itens lidos numa leitura parcial (interrompida)"""
+        with self._trava:
+            listagem = self._listagens.obter((conta, ativo))
+            if listagem is None:
+                return
+            for bot in bots:
+                listagem.itens[bot["id"]] = bot
+                listagem.sujos.discard(bot["id"])
+
+    def invalidar(self, conta: str, broker_copy_id: str) -> None:
+        """Marca o copy-trade como alterado nas listagens de ativos e inativos da conta"""
+        with self._trava:
+            for ativo in (True, False):
+                listagem = self._listagens.obter((conta, ativo))
+                if listagem is not None:
+                    listagem.sujos.add(broker_copy_id)
+
+    def invalidar_conta(self, conta: str) -> None:
+        """Descarta as listagens da conta"""
+        with self._trava:
+            for ativo in (True, False):
+                self._listagens.invalidar((conta, ativo))
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Acertos e falhas das leituras de listagem e quantidade de listagens guardadas"""
+        consultas = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "listagens": self._listagens.estatisticas()["itens"],
+        }
+
+
+# Cache único do processo, compartilhado pelos repositories
+cache_listagens = CacheListagens()
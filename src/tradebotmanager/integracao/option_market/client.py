@@ -1,8 +1,10 @@
 import cloudscraper
-import json
-import base64
 import time
 from typing import Dict, Optional, Any
+from .disjuntor import disjuntor_corretora
+from .limitador import limitador_requisicoes, politica_retentativa
+from .metricas import registrar_desafio_cloudflare, registrar_requisicao
+from .tokens import GerenciadorToken
 
 
 class ClienteOptionMarket:
@@ -30,7 +32,13 @@ class ClienteOptionMarket:
         "x-tenant-id": "01HZTB9FAN88DFM3T589J4FW17",
     }
     
-    def __init__(self, email: str, senha: str, token: Optional[str] = None):
+    def __init__(
+        self,
+        email: str,
+        senha: str,
+        token: Optional[str] = None,
+        gerenciador_token: Optional[GerenciadorToken] = None,
+    ):
         """
         Inicializa o cliente da OptionMarket e valida/gera token automaticamente
         
@@ -38,6 +46,7 @@ class ClienteOptionMarket:
             email: Email para autenticação (obrigatório)
             senha: Senha para autenticação (obrigatório)
             token: Token existente (opcional). Se fornecido, será validado primeiro
+            gerenciador_token: Gerenciador compartilhado da conta (opcional), ver obter_gerenciador_token
             
         Raises:
             ValueError: Se credenciais não fornecidas ou autenticação falhar
@@ -46,70 +55,48 @@ class ClienteOptionMarket:
             raise ValueError("Email e senha são obrigatórios")
             
         self.sessao = cloudscraper.create_scraper()
-        self.token: Optional[str] = token
+        self.gerenciador_token = gerenciador_token or GerenciadorToken(token)
         self.email = email
         self.senha = senha
         self.autenticado = False
+        # Compartilhados pelo processo; podem ser trocados por instância
+        self.limitador = limitador_requisicoes
+        self.politica_retentativa = politica_retentativa
+        self.disjuntor = disjuntor_corretora
     
         self.sessao.headers.update(self.CABECALHOS_FIXOS)
         
         self._validar_sessao()
     
+    @property
+    def token(self) -> Optional[str]:
+        """Token JWT atual da conta"""
+        return self.gerenciador_token.token
+    
     def _validar_sessao(self) -> None:
         """
-        Valida o token JWT verificando a claim 'exp'.
-        Se token está ausente, malformado ou expirado, gera um novo token.
+        Garante um token válido: se está ausente, malformado, expirado ou
+        perto de expirar, gera um novo token.
         """
-        token = self.token
-        
-        if not token:
-            self._gerar_token()
-            return
-        
-        try:
-            # JWT format: header.payload.signature
-            partes = token.split(".")
-            if len(partes) < 2:
-                # malformado
-                self._gerar_token()
-                return
-            
-            payload_b64 = partes[1]
-            # Adiciona padding necessário para decodificação base64
-            padding = "=" * (-len(payload_b64) % 4)
-            payload_bytes = base64.urlsafe_b64decode(payload_b64 + padding)
-            payload = json.loads(payload_bytes.decode("utf-8"))
-            
-            exp = payload.get("exp")
-            if exp is None:
-                self._gerar_token()
-                return
-            
-            agora = int(time.time())
-            # exp está em segundos desde epoch
-            if agora < int(exp):
-                # ainda válido
-                self.autenticado = True
-                return
-            
-            # expirado
-            self._gerar_token()
-            return
-            
-        except Exception:
-            # qualquer erro ao analisar/validar -> renovar token
-            self._gerar_token()
-            return
+        self.gerenciador_token.obter(self._login)
+        self.autenticado = True
     
     def _gerar_token(self) -> None:
+        """Força um novo login, mesmo se o token atual ainda for válido"""
+        self.gerenciador_token.renovar(self._login)
+        self.autenticado = True
+    
+    def _login(self) -> str:
         """
-        Autentica usando as credenciais e armazena o bearer token.
+        Autentica usando as credenciais e retorna o bearer token.
         
         O método envia um JSON body como:
         {"tenantId":..., "email":..., "password":..., "agentNavigator":..., "recaptchaToken":...}
         
         Em caso de sucesso, a resposta JSON deve conter a chave 'token'.
-        Em caso de falha, uma ValueError é levantada.
+        Falhas de rede, 429 e 5xx são repetidas conforme a politica_retentativa
+        (respeitando o Retry-After); esgotadas as tentativas, ou em outros erros,
+        uma ValueError é levantada.
         """
         tenant_id = self.CABECALHOS_FIXOS.get("x-tenant-id")
         agent_navigator = self.CABECALHOS_FIXOS.get("User-Agent")
@@ -122,30 +109,69 @@ class ClienteOptionMarket:
             "recaptchaToken": "bypass-2",
         }
         
-        try:
-            # Prepara headers com x-timestamp para requisição de login
-            cabecalhos_login = self._preparar_cabecalhos()
+        tentativa = 0
+        
+        while True:
+            # Fora do try: disjuntor aberto não é erro de autenticação
+            geracao = self.disjuntor.verificar()
+            try:
+                self.limitador.aguardar(self.email)
+                inicio = time.monotonic()
+                resposta = self.sessao.post(
+                    f"{self.URL_BASE}/auth/login",
+                    json=corpo_requisicao,
+                    # Headers com x-timestamp novo a cada tentativa
+                    headers=self._preparar_cabecalhos(),
+                    timeout=10
+                )
+            except Exception as e:
+                self._registrar_resultado("POST", "/auth/login", inicio, geracao)
+                if not self.politica_retentativa.pode_repetir("POST", "/auth/login", tentativa):
+                    raise ValueError(f"Erro na autenticação: {e}")
+                time.sleep(self.politica_retentativa.calcular_espera(tentativa))
+                tentativa += 1
+                continue
+            except BaseException:
+                # Cancelada (ou interrompida) sem resultado: só devolve a vaga do disjuntor
+                self.disjuntor.liberar(geracao)
+                raise
             
-            resposta = self.sessao.post(
-                f"{self.URL_BASE}/auth/login",
-                json=corpo_requisicao,
-                headers=cabecalhos_login,
-                timeout=10
-            )
-            dados = resposta.json()
+            self._registrar_resultado("POST", "/auth/login", inicio, geracao, resposta)
+            if resposta.status_code == 429:
+                self.limitador.registrar_limitacao(self.email)
             
-            resposta.raise_for_status()
+            # 429 e 5xx: mesma política das demais requisições, respeitando o Retry-After
+            if (
+                resposta.status_code in self.politica_retentativa.STATUS_RETENTAVEIS
+                and self.politica_retentativa.pode_repetir("POST", "/auth/login", tentativa)
+            ):
+                time.sleep(self.politica_retentativa.calcular_espera(tentativa, resposta.headers.get("Retry-After")))
+                tentativa += 1
+                continue
             
+            return self._ler_token(resposta)
+    
+    def _ler_token(self, resposta) -> str:
+        """
+        Extrai o token da resposta do login
+        
+        Raises:
+            ValueError: Resposta de erro, com a mensagem da API quando houver
+        """
+        dados = None
+        try:
+            dados = resposta.json()
+            resposta.raise_for_status()
             token = dados["token"]
-            self.token = token
-            self.autenticado = True
-            
         except Exception as e:
             try:
                 mensagem = dados["data"]["message"]
-                raise ValueError(f"Erro na autenticação: {mensagem}")
-            except (KeyError, NameError):
+            except (KeyError, TypeError):
                 raise ValueError(f"Erro na autenticação: {e}")
+            raise ValueError(f"Erro na autenticação: {mensagem}")
+        
+        self.limitador.registrar_sucesso(self.email)
+        return token
     
     def _preparar_cabecalhos(self, cabecalhos: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
@@ -189,30 +215,91 @@ class ClienteOptionMarket:
             Resposta da API em formato dict
             
         Raises:
-            ConnectionError: Erro de conexão
-            ValueError: Erro de resposta da API
+            ConnectionError: Erro de conexão ou resposta de erro da API (após as retentativas permitidas)
         """
+        # Renova o token antes da requisição se estiver perto de expirar
+        self._validar_sessao()
+        
         url = f"{self.URL_BASE}{endpoint}"
-        cabecalhos_preparados = self._preparar_cabecalhos(cabecalhos)
+        tentativa = 0
         
-        try:
-            resposta = self.sessao.request(
-                method=metodo,
-                url=url,
-                headers=cabecalhos_preparados,
-                json=dados_json,
-                params=parametros,
-                timeout=30
-            )
+        while True:
+            geracao = self.disjuntor.verificar()
+            try:
+                self.limitador.aguardar(self.email)
+                inicio = time.monotonic()
+                resposta = self.sessao.request(
+                    method=metodo,
+                    url=url,
+                    headers=self._preparar_cabecalhos(cabecalhos),
+                    json=dados_json,
+                    params=parametros,
+                    timeout=30
+                )
+            except cloudscraper.exceptions.CloudflareChallengeError as e:
+                self._registrar_resultado(metodo, endpoint, inicio, geracao)
+                registrar_desafio_cloudflare(endpoint)
+                raise ConnectionError(f"Cloudflare challenge falhou: {e}")
+            except Exception as e:
+                self._registrar_resultado(metodo, endpoint, inicio, geracao)
+                # Falha de rede: repete apenas operações seguras
+                if not self.politica_retentativa.pode_repetir(metodo, endpoint, tentativa):
+                    raise ConnectionError(f"Erro na requisição: {e}")
+                time.sleep(self.politica_retentativa.calcular_espera(tentativa))
+                tentativa += 1
+                continue
+            except BaseException:
+                # Cancelada (ou interrompida) sem resultado: só devolve a vaga do disjuntor
+                self.disjuntor.liberar(geracao)
+                raise
             
-            resposta.raise_for_status()
+            self._registrar_resultado(metodo, endpoint, inicio, geracao, resposta)
+            if resposta.status_code == 429:
+                self.limitador.registrar_limitacao(self.email)
             
-            return resposta.json()
-                
-        except cloudscraper.exceptions.CloudflareChallengeError as e:
-            raise ConnectionError(f"Cloudflare challenge falhou: {e}")
-        except Exception as e:
-            raise ConnectionError(f"Erro na requisição: {e}")
+            if (
+                resposta.status_code in self.politica_retentativa.STATUS_RETENTAVEIS
+                and self.politica_retentativa.pode_repetir(metodo, endpoint, tentativa)
+            ):
+                time.sleep(self.politica_retentativa.calcular_espera(tentativa, resposta.headers.get("Retry-After")))
+                tentativa += 1
+                continue
+            
+            try:
+                resposta.raise_for_status()
+                dados = resposta.json()
+            except Exception as e:
+                raise ConnectionError(f"Erro na requisição: {e}")
+            
+            self.limitador.registrar_sucesso(self.email)
+            return dados
+    
+    def _registrar_resultado(self, metodo: str, endpoint: str, inicio: float, geracao: int, resposta=None) -> None:
+        """
+        Alimenta o circuit breaker e as métricas com o resultado de uma requisição
+        
+        Args:
+            metodo: Método HTTP
+            endpoint: Endpoint chamado
+            inicio: time.monotonic() de antes do envio
+            geracao: Geração do disjuntor devolvida pelo verificar() desta tentativa
+            resposta: Resposta recebida, ou None se a requisição falhou sem resposta
+        """
+        duracao = time.monotonic() - inicio
+        if resposta is None:
+            self.disjuntor.registrar(False, duracao, geracao)
+            registrar_requisicao(metodo, endpoint, None, duracao)
+            return
+        
+        self.disjuntor.registrar(resposta.status_code < 500, duracao, geracao)
+        registrar_requisicao(
+            metodo,
+            endpoint,
+            resposta.status_code,
+            duracao,
+            enviados=len(resposta.request.body or b""),
+            recebidos=len(resposta.content),
+        )
     
     def get(
         self, 
@@ -278,36 +365,14 @@ class ClienteOptionMarket:
         Returns:
             True se autenticado e token válido
         """
-        if not self.token or not self.autenticado:
-            return False
-        
-        # Usa a mesma lógica de validação local que _validar_sessao
-        try:
-            partes = self.token.split(".")
-            if len(partes) < 2:
-                return False
-            
-            payload_b64 = partes[1]
-            padding = "=" * (-len(payload_b64) % 4)
-            payload_bytes = base64.urlsafe_b64decode(payload_b64 + padding)
-            payload = json.loads(payload_bytes.decode("utf-8"))
-            
-            exp = payload.get("exp")
-            if exp is None:
-                return False
-            
-            agora = int(time.time())
-            return agora < int(exp)
-            
-        except Exception:
-            return False
+        # Expiração já decodificada pelo gerenciador de token
+        return self.autenticado and self.gerenciador_token.valido()
     
     def desconectar(self):
         """
         Limpa dados de autenticação e fecha sessão para evitar vazamento de memória
         """
-        # Limpa dados de autenticação
-        self.token = None
+        # O token continua no gerenciador: é da conta e pode ser reaproveitado por outro cliente
         self.autenticado = False
         
         # Limpa cookies e headers da sessão
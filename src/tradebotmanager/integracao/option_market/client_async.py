@@ -0,0 +1,380 @@
+import asyncio
+import httpx
+import time
+from typing import Dict, Optional, Any
+from .client import ClienteOptionMarket
+from .disjuntor import disjuntor_corretora
+from .limitador import limitador_requisicoes, politica_retentativa
+from .metricas import registrar_desafio_cloudflare, registrar_requisicao
+from .tokens import GerenciadorToken
+
+
+class ClienteOptionMarketAsync:
+    """
+    Versão assíncrona do ClienteOptionMarket usando httpx.AsyncClient.
+
+    Permite disparar muitas requisições simultâneas em um único event loop,
+    sem ocupar uma thread por requisição em andamento.
+
+    O httpx não resolve desafios JavaScript do Cloudflare como o cloudscraper.
+    Se a API exigir o desafio, passe os cookies de uma sessão cloudscraper
+    já liberada (ex: cf_clearance) no parâmetro `cookies`.
+
+    Uso:
+        async with ClienteOptionMarketAsync(email, senha, token) as cliente:
+            dados = await cliente.get("/copy-trade")
+    """
+
+    URL_BASE = ClienteOptionMarket.URL_BASE
+
+    # Remove cabeçalhos de conexão que o próprio httpx gerencia e zstd,
+    # que o httpx só decodifica com o pacote zstandard instalado
+    CABECALHOS_FIXOS: Dict[str, str] = {
+        **{
+            chave: valor
+            for chave, valor in ClienteOptionMarket.CABECALHOS_FIXOS.items()
+            if chave not in ("Connection", "TE", "Host")
+        },
+        "Accept-Encoding": "gzip, deflate",
+    }
+
+    def __init__(
+        self,
+        email: str,
+        senha: str,
+        token: Optional[str] = None,
+        cookies: Optional[Dict[str, str]] = None,
+        max_conexoes: int = 100,
+        gerenciador_token: Optional[GerenciadorToken] = None,
+        sessao: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        Inicializa o cliente assíncrono. A autenticação acontece em conectar()
+        (chamado automaticamente pelo `async with`).
+
+        Args:
+            email: Email para autenticação (obrigatório)
+            senha: Senha para autenticação (obrigatório)
+            token: Token existente (opcional). Se fornecido, será validado primeiro
+            cookies: Cookies de uma sessão cloudscraper (opcional)
+            max_conexoes: Máximo de conexões simultâneas abertas com a API
+            gerenciador_token: Gerenciador compartilhado da conta (opcional), ver obter_gerenciador_token
+            sessao: AsyncClient compartilhado entre contas (opcional), ver criar_sessao.
+                Quem cria a sessão compartilhada é responsável por fechá-la.
+
+        Raises:
+            ValueError: Se credenciais não fornecidas
+        """
+        if not email or not senha:
+            raise ValueError("Email e senha são obrigatórios")
+
+        self.sessao_compartilhada = sessao is not None
+        self.sessao = sessao or self.criar_sessao(cookies, max_conexoes)
+        self.gerenciador_token = gerenciador_token or GerenciadorToken(token)
+        self.email = email
+        self.senha = senha
+        self.autenticado = False
+        # Compartilhados pelo processo; podem ser trocados por instância
+        self.limitador = limitador_requisicoes
+        self.politica_retentativa = politica_retentativa
+        self.disjuntor = disjuntor_corretora
+
+    @classmethod
+    def criar_sessao(cls, cookies: Optional[Dict[str, str]] = None, max_conexoes: int = 100) -> httpx.AsyncClient:
+        """
+        Cria o AsyncClient configurado para a API. Pode ser compartilhado por
+        clientes de várias contas, que passam a dividir o mesmo pool de conexões
+        (a autenticação vai no cabeçalho Authorization de cada requisição).
+
+        Args:
+            cookies: Cookies de uma sessão cloudscraper (opcional)
+            max_conexoes: Máximo de conexões simultâneas abertas com a API
+        """
+        return httpx.AsyncClient(
+            base_url=cls.URL_BASE,
+            headers=cls.CABECALHOS_FIXOS,
+            cookies=cookies,
+            timeout=30,
+            limits=httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes),
+        )
+
+    @property
+    def token(self) -> Optional[str]:
+        """Token JWT atual da conta"""
+        return self.gerenciador_token.token
+
+    async def __aenter__(self) -> "ClienteOptionMarketAsync":
+        await self.conectar()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.desconectar()
+
+    async def conectar(self) -> "ClienteOptionMarketAsync":
+        """
+        Valida o token atual ou autentica novamente
+
+        Raises:
+            ValueError: Se a autenticação falhar
+        """
+        await self._validar_sessao()
+        return self
+
+    async def _validar_sessao(self) -> None:
+        """
+        Garante um token válido: se está ausente, malformado, expirado ou
+        perto de expirar, gera um novo token.
+        """
+        await self.gerenciador_token.obter_async(self._login)
+        self.autenticado = True
+
+    async def _login(self) -> str:
+        """
+        Autentica usando as credenciais e retorna o bearer token.
+        Mesmo corpo de requisição e mesmas retentativas do ClienteOptionMarket._login.
+        """
+        corpo_requisicao = {
+            "tenantId": self.CABECALHOS_FIXOS.get("x-tenant-id"),
+            "email": self.email,
+            "password": self.senha,
+            "agentNavigator": self.CABECALHOS_FIXOS.get("User-Agent"),
+            "recaptchaToken": "bypass-2",
+        }
+
+        tentativa = 0
+
+        while True:
+            # Fora do try: disjuntor aberto não é erro de autenticação
+            geracao = self.disjuntor.verificar()
+            try:
+                await self.limitador.aguardar_async(self.email)
+                inicio = time.monotonic()
+                resposta = await self.sessao.post(
+                    "/auth/login",
+                    json=corpo_requisicao,
+                    headers=self._preparar_cabecalhos(),
+                    timeout=10
+                )
+            except Exception as e:
+                self._registrar_resultado("POST", "/auth/login", inicio, geracao)
+                if not self.politica_retentativa.pode_repetir("POST", "/auth/login", tentativa):
+                    raise ValueError(f"Erro na autenticação: {e}")
+                await asyncio.sleep(self.politica_retentativa.calcular_espera(tentativa))
+                tentativa += 1
+                continue
+            except BaseException:
+                # Cancelada (ou interrompida) sem resultado: só devolve a vaga do disjuntor
+                self.disjuntor.liberar(geracao)
+                raise
+
+            self._registrar_resultado("POST", "/auth/login", inicio, geracao, resposta)
+            if resposta.status_code == 429:
+                self.limitador.registrar_limitacao(self.email)
+
+            # 429 e 5xx: mesma política das demais requisições, respeitando o Retry-After
+            if (
+                resposta.status_code in self.politica_retentativa.STATUS_RETENTAVEIS
+                and self.politica_retentativa.pode_repetir("POST", "/auth/login", tentativa)
+            ):
+                await asyncio.sleep(
+                    self.politica_retentativa.calcular_espera(tentativa, resposta.headers.get("Retry-After"))
+                )
+                tentativa += 1
+                continue
+
+            return self._ler_token(resposta)
+
+    def _ler_token(self, resposta: httpx.Response) -> str:
+        """
+        Extrai o token da resposta do login
+
+        Raises:
+            ValueError: Resposta de erro, com a mensagem da API quando houver
+        """
+        dados = None
+        try:
+            dados = resposta.json()
+            resposta.raise_for_status()
+            token = dados["token"]
+        except Exception as e:
+            try:
+                mensagem = dados["data"]["message"]
+            except (KeyError, TypeError):
+                raise ValueError(f"Erro na autenticação: {e}")
+            raise ValueError(f"Erro na autenticação: {mensagem}")
+
+        self.limitador.registrar_sucesso(self.email)
+        return token
+
+    def _preparar_cabecalhos(self, cabecalhos: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Prepara headers para requisição, adicionando timestamp e token (se disponível)
+
+        Args:
+            cabecalhos: Headers adicionais
+
+        Returns:
+            Headers da requisição (os fixos já estão no AsyncClient)
+        """
+        hdrs = dict(cabecalhos or {})
+        hdrs["x-timestamp"] = str(int(time.time() * 1000))
+
+        if self.token:
+            hdrs["Authorization"] = f"Bearer {self.token}"
+
+        return hdrs
+
+    async def _fazer_requisicao(
+        self,
+        metodo: str,
+        endpoint: str,
+        cabecalhos: Optional[Dict[str, str]] = None,
+        dados_json: Optional[Dict[str, Any]] = None,
+        parametros: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa requisição HTTP com tratamento de erros
+
+        Args:
+            metodo: Método HTTP (GET, POST, etc.)
+            endpoint: Endpoint da API (ex: /copy-trade)
+            cabecalhos: Headers adicionais
+            dados_json: Dados JSON para POST/PATCH
+            parametros: Parâmetros de query string
+
+        Returns:
+            Resposta da API em formato dict
+
+        Raises:
+            ConnectionError: Erro de conexão ou resposta de erro da API
+        """
+        # Renova o token antes da requisição se estiver perto de expirar
+        await self._validar_sessao()
+
+        tentativa = 0
+
+        while True:
+            geracao = self.disjuntor.verificar()
+            try:
+                await self.limitador.aguardar_async(self.email)
+                inicio = time.monotonic()
+                resposta = await self.sessao.request(
+                    metodo,
+                    endpoint,
+                    headers=self._preparar_cabecalhos(cabecalhos),
+                    json=dados_json,
+                    params=parametros,
+                )
+            except Exception as e:
+                self._registrar_resultado(metodo, endpoint, inicio, geracao)
+                # Falha de rede: repete apenas operações seguras
+                if not self.politica_retentativa.pode_repetir(metodo, endpoint, tentativa):
+                    raise ConnectionError(f"Erro na requisição: {e}")
+                await asyncio.sleep(self.politica_retentativa.calcular_espera(tentativa))
+                tentativa += 1
+                continue
+            except BaseException:
+                # Cancelada (ou interrompida) sem resultado: só devolve a vaga do disjuntor
+                self.disjuntor.liberar(geracao)
+                raise
+
+            self._registrar_resultado(metodo, endpoint, inicio, geracao, resposta)
+            if resposta.headers.get("cf-mitigated") == "challenge":
+                registrar_desafio_cloudflare(endpoint)
+                raise ConnectionError("Cloudflare challenge exigido, use cookies de uma sessão cloudscraper")
+
+            if resposta.status_code == 429:
+                self.limitador.registrar_limitacao(self.email)
+
+            if (
+                resposta.status_code in self.politica_retentativa.STATUS_RETENTAVEIS
+                and self.politica_retentativa.pode_repetir(metodo, endpoint, tentativa)
+            ):
+                await asyncio.sleep(
+                    self.politica_retentativa.calcular_espera(tentativa, resposta.headers.get("Retry-After"))
+                )
+                tentativa += 1
+                continue
+
+            try:
+                resposta.raise_for_status()
+                dados = resposta.json()
+            except Exception as e:
+                raise ConnectionError(f"Erro na requisição: {e}")
+
+            self.limitador.registrar_sucesso(self.email)
+            return dados
+
+    def _registrar_resultado(self, metodo: str, endpoint: str, inicio: float, geracao: int, resposta=None) -> None:
+        """
+        Alimenta o circuit breaker e as métricas com o resultado de uma requisição
+
+        Args:
+            metodo: Método HTTP
+            endpoint: Endpoint chamado
+            inicio: time.monotonic() de antes do envio
+            geracao: Geração do disjuntor devolvida pelo verificar() desta tentativa
+            resposta: Resposta recebida, ou None se a requisição falhou sem resposta
+        """
+        duracao = time.monotonic() - inicio
+        if resposta is None:
+            self.disjuntor.registrar(False, duracao, geracao)
+            registrar_requisicao(metodo, endpoint, None, duracao)
+            return
+
+        self.disjuntor.registrar(resposta.status_code < 500, duracao, geracao)
+        registrar_requisicao(
+            metodo,
+            endpoint,
+            resposta.status_code,
+            duracao,
+            enviados=len(resposta.request.content),
+            recebidos=len(resposta.content),
+        )
+
+    async def get(
+        self,
+        endpoint: str,
+        parametros: Optional[Dict[str, Any]] = None,
+        cabecalhos: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Executa requisição GET"""
+        return await self._fazer_requisicao("GET", endpoint, cabecalhos=cabecalhos, parametros=parametros)
+
+    async def post(
+        self,
+        endpoint: str,
+        dados: Optional[Dict[str, Any]] = None,
+        cabecalhos: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Executa requisição POST"""
+        return await self._fazer_requisicao("POST", endpoint, cabecalhos=cabecalhos, dados_json=dados)
+
+    async def patch(
+        self,
+        endpoint: str,
+        dados: Optional[Dict[str, Any]] = None,
+        cabecalhos: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Executa requisição PATCH"""
+        return await self._fazer_requisicao("PATCH", endpoint, cabecalhos=cabecalhos, dados_json=dados)
+
+    def verificar_autenticacao(self) -> bool:
+        """
+        Verifica se o token ainda é válido usando validação local JWT
+
+        Returns:
+            True se autenticado e token válido
+        """
+        return self.autenticado and self.gerenciador_token.valido()
+
+    async def desconectar(self) -> None:
+        """
+        Limpa dados de autenticação e fecha as conexões do AsyncClient
+        """
+        # O token continua no gerenciador: é da conta e pode ser reaproveitado por outro cliente
+        self.autenticado = False
+
+        if self.sessao and not self.sessao_compartilhada:
+            self.sessao.cookies.clear()
+            await self.sessao.aclose()
@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class CircuitoAberto(ConnectionError):
+    """Requisição rejeitada sem contato com a corretora: o disjuntor está aberto"""
+
+
+class Disjuntor:
+    """
+    Circuit breaker das chamadas à corretora.
+
+    - FECHADO: requisições passam; o resultado das últimas `janela` chamadas é observado
+    - ABERTO: taxa de erro ou de chamadas lentas passou do limite; rejeita na hora
+      por `tempo_aberto` segundos
+    - MEIO_ABERTO: deixa passar até `chamadas_teste` requisições de teste; se todas
+      derem certo volta a FECHADO, se alguma falhar volta a ABERTO. Se os testes não
+      concluírem em `tempo_meio_aberto` segundos, o meio aberto recomeça com novas vagas
+
+    Cada mudança de estado inicia uma nova geração. verificar() devolve a
+    geração em que a chamada saiu e registrar() ignora resultados de uma
+    geração anterior: uma chamada lenta iniciada antes da abertura não conta
+    como teste do meio aberto nem entra na janela de um novo fechado.
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(
+        self,
+        janela: int = 50,
+        minimo_chamadas: int = 10,
+        limite_erros: float = 0.5,
+        limite_lentas: float = 0.8,
+        duracao_lenta: float = 10,
+        tempo_aberto: float = 30,
+        chamadas_teste: int = 3,
+        tempo_meio_aberto: float = 60,
+    ):
+        """
+        Args:
+            janela: Quantidade de chamadas recentes consideradas nas taxas
+            minimo_chamadas: Chamadas na janela antes de o disjuntor poder abrir
+            limite_erros: Fração de falhas na janela que abre o disjuntor
+            limite_lentas: Fração de chamadas lentas na janela que abre o disjuntor
+            duracao_lenta: Segundos a partir dos quais uma chamada conta como lenta
+            tempo_aberto: Segundos rejeitando chamadas antes de testar a recuperação
+            chamadas_teste: Chamadas de teste permitidas no estado meio aberto
+            tempo_meio_aberto: Segundos sem concluir os testes após os quais o meio aberto recomeça
+        """
+        self.minimo_chamadas = minimo_chamadas
+        self.limite_erros = limite_erros
+        self.limite_lentas = limite_lentas
+        self.duracao_lenta = duracao_lenta
+        self.tempo_aberto = tempo_aberto
+        self.chamadas_teste = chamadas_teste
+        self.tempo_meio_aberto = tempo_meio_aberto
+
+        self.estado = self.FECHADO
+        self.aberturas = 0
+        self.rejeitadas = 0
+        # (falhou, lenta) das últimas chamadas
+        self._resultados: Deque[Tuple[bool, bool]] = deque(maxlen=janela)
+        self._aberto_em: Optional[float] = None
+        self._meio_aberto_em: Optional[float] = None
+        self._testes_em_andamento = 0
+        self._testes_ok = 0
+        self._geracao = 0
+        self._trava = threading.Lock()
+
+    def verificar(self) -> int:
+        """
+        Deve ser chamado antes de cada requisição
+
+        Returns:
+            Geração do disjuntor, a repassar para registrar()
+
+        Raises:
+            CircuitoAberto: Se a corretora está indisponível e a requisição não deve sair
+        """
+        with self._trava:
+            if self.estado == self.ABERTO:
+                if time.monotonic() - self._aberto_em < self.tempo_aberto:
+                    self.rejeitadas += 1
+                    raise CircuitoAberto("Corretora indisponível (circuit breaker aberto)")
+                self._iniciar_meio_aberto()
+
+            if self.estado == self.MEIO_ABERTO:
+                if (
+                    self._testes_em_andamento >= self.chamadas_teste
+                    and time.monotonic() - self._meio_aberto_em >= self.tempo_meio_aberto
+                ):
+                    # Testes presos (ou vagas perdidas): recomeça, ignorando o resultado deles
+                    self._iniciar_meio_aberto()
+                if self._testes_em_andamento >= self.chamadas_teste:
+                    self.rejeitadas += 1
+                    raise CircuitoAberto("Corretora em recuperação (circuit breaker meio aberto)")
+                self._testes_em_andamento += 1
+
+            return self._geracao
+
+    def registrar(self, sucesso: bool, duracao: float, geracao: Optional[int] = None) -> None:
+        """
+        Registra o resultado de uma requisição que passou por verificar()
+
+        Args:
+            sucesso: False para falhas da corretora (rede, timeout, 5xx)
+            duracao: Segundos que a requisição levou
+            geracao: Valor devolvido por verificar(); resultados de outra geração são ignorados
+        """
+        lenta = duracao >= self.duracao_lenta
+
+        with self._trava:
+            if geracao is not None and geracao != self._geracao:
+                return
+
+            if self.estado == self.MEIO_ABERTO:
+                self._testes_em_andamento = max(0, self._testes_em_andamento - 1)
+                if not sucesso or lenta:
+                    self._abrir()
+                    return
+                self._testes_ok += 1
+                if self._testes_ok >= self.chamadas_teste:
+                    self._mudar_estado(self.FECHADO)
+                    self._resultados.clear()
+                return
+
+            self._resultados.append((not sucesso, lenta))
+            if self.estado == self.FECHADO and len(self._resultados) >= self.minimo_chamadas:
+                total = len(self._resultados)
+                erros = sum(1 for falhou, _ in self._resultados if falhou)
+                lentas = sum(1 for _, lenta_ in self._resultados if lenta_)
+                if erros / total >= self.limite_erros or lentas / total >= self.limite_lentas:
+                    self._abrir()
+
+    def liberar(self, geracao: int) -> None:
+        """
+        Devolve a vaga de uma requisição que passou por verificar() mas terminou
+        sem resultado (ex: cancelada); não conta como sucesso nem como falha
+
+        Args:
+            geracao: Valor devolvido por verificar()
+        """
+        with self._trava:
+            if geracao == self._geracao and self.estado == self.MEIO_ABERTO:
+                self._testes_em_andamento = max(0, self._testes_em_andamento - 1)
+
+    def resumo(self) -> Dict[str, object]:
+        """Estado atual para health checks e métricas"""
+        with self._trava:
+            total = len(self._resultados)
+            erros = sum(1 for falhou, _ in self._resultados if falhou)
+            return {
+                "estado": self.estado,
+                "taxa_erros": erros / total if total else 0.0,
+                "chamadas_na_janela": total,
+                "aberturas": self.aberturas,
+                "rejeitadas": self.rejeitadas,
+            }
+
+    def _abrir(self) -> None:
+        """Abre o disjuntor. Chamar com a trava."""
+        self._mudar_estado(self.ABERTO)
+        self._aberto_em = time.monotonic()
+        self.aberturas += 1
+        self._resultados.clear()
+
+    def _iniciar_meio_aberto(self) -> None:
+        """Entra (ou reentra) no meio aberto com todas as vagas de teste livres. Chamar com a trava."""
+        self._mudar_estado(self.MEIO_ABERTO)
+        self._meio_aberto_em = time.monotonic()
+        self._testes_em_andamento = 0
+        self._testes_ok = 0
+
+    def _mudar_estado(self, estado: str) -> None:
+        """Troca o estado e inicia uma nova geração. Chamar com a trava."""
+        self.estado = estado
+        self._geracao += 1
+
+
+# Um disjuntor para a corretora, compartilhado pelos clientes do processo
+disjuntor_corretora = Disjuntor()
@@ -0,0 +1,257 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class BaldeTokens:
+    """
+    Token bucket com taxa adaptativa.
+
+    Cada requisição consome um token; os tokens são repostos a `taxa` por
+    segundo até `capacidade`. Ao receber 429 a taxa cai pela metade, e volta
+    a subir aos poucos a cada sucesso, até `taxa_maxima`.
+    """
+
+    def __init__(self, taxa: float, capacidade: float, taxa_minima: float = 0.5):
+        """
+        Args:
+            taxa: Requisições por segundo permitidas (e taxa máxima da adaptação)
+            capacidade: Rajada máxima de requisições
+            taxa_minima: Limite inferior da taxa ao reduzir por 429
+        """
+        self.taxa_maxima = taxa
+        self.taxa_minima = taxa_minima
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.limitacoes = 0
+        self.esperas = 0
+        self._tokens = capacidade
+        self._ultima_reposicao = time.monotonic()
+        self._trava = threading.Lock()
+
+    def reservar(self) -> float:
+        """
+        Consome um token, mesmo que ainda não disponível
+
+        Returns:
+            Segundos que a requisição deve esperar antes de sair
+        """
+        with self._trava:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._ultima_reposicao) * self.taxa)
+            self._ultima_reposicao = agora
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+
+            self.esperas += 1
+            return -self._tokens / self.taxa
+
+    def registrar_limitacao(self) -> None:
+        """A API respondeu 429: reduz a taxa pela metade"""
+        with self._trava:
+            self.limitacoes += 1
+            self.taxa = max(self.taxa_minima, self.taxa / 2)
+
+    def registrar_sucesso(self) -> None:
+        """Requisição aceita: recupera a taxa gradualmente"""
+        if self.taxa < self.taxa_maxima:
+            with self._trava:
+                self.taxa = min(self.taxa_maxima, self.taxa + self.taxa_maxima * 0.05)
+
+    def ocioso(self) -> bool:
+        """True se o balde está cheio e na taxa máxima: equivale a um balde novo"""
+        with self._trava:
+            tokens = self._tokens + (time.monotonic() - self._ultima_reposicao) * self.taxa
+            return self.taxa >= self.taxa_maxima and tokens >= self.capacidade
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Taxa atual e contadores de limitação"""
+        return {
+            "taxa_atual": self.taxa,
+            "taxa_maxima": self.taxa_maxima,
+            "limitacoes": self.limitacoes,
+            "esperas": self.esperas,
+        }
+
+
+class LimitadorRequisicoes:
+    """
+    Limita as requisições à corretora por host (todas as contas somadas) e por conta.
+    Compartilhado entre os clientes síncrono e assíncrono do processo.
+
+    Os baldes das contas ociosas (cheios e na taxa máxima) são descartados
+    periodicamente e sempre que passam de `max_contas`; a próxima requisição
+    da conta cria um balde novo, idêntico ao descartado.
+    """
+
+    def __init__(
+        self,
+        taxa_host: float = 20,
+        rajada_host: float = 40,
+        taxa_conta: float = 2,
+        rajada_conta: float = 5,
+        max_contas: int = 5000,
+    ):
+        """
+        Args:
+            taxa_host: Requisições por segundo para a corretora, somando todas as contas
+            rajada_host: Rajada máxima para a corretora
+            taxa_conta: Requisições por segundo de uma mesma conta
+            rajada_conta: Rajada máxima de uma mesma conta
+            max_contas: Baldes de conta mantidos antes de descartar os ociosos
+        """
+        self.host = BaldeTokens(taxa_host, rajada_host)
+        self.taxa_conta = taxa_conta
+        self.rajada_conta = rajada_conta
+        self.max_contas = max_contas
+        self._contas: Dict[str, BaldeTokens] = {}
+        self._trava = threading.Lock()
+
+    def aguardar(self, conta: str) -> None:
+        """Bloqueia até a requisição da conta poder sair"""
+        espera = self._reservar(conta)
+        if espera > 0:
+            time.sleep(espera)
+
+    async def aguardar_async(self, conta: str) -> None:
+        """Versão assíncrona de aguardar()"""
+        espera = self._reservar(conta)
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def registrar_limitacao(self, conta: str) -> None:
+        """A API respondeu 429 para a conta"""
+        self.host.registrar_limitacao()
+        self._balde_conta(conta).registrar_limitacao()
+
+    def registrar_sucesso(self, conta: str) -> None:
+        """A API aceitou a requisição da conta"""
+        self.host.registrar_sucesso()
+        self._balde_conta(conta).registrar_sucesso()
+
+    def estatisticas(self) -> Dict[str, object]:
+        """Taxa e limitações do host e total de limitações por conta"""
+        with self._trava:
+            contas = list(self._contas.values())
+        return {
+            "host": self.host.estatisticas(),
+            "contas": len(contas),
+            "limitacoes_contas": sum(b.limitacoes for b in contas),
+            "contas_com_taxa_reduzida": sum(1 for b in contas if b.taxa < b.taxa_maxima),
+        }
+
+    def limpar_ociosos(self) -> int:
+        """
+        Descarta os baldes das contas ociosas
+
+        Returns:
+            Quantidade de baldes descartados
+        """
+        with self._trava:
+            return self._remover_ociosos()
+
+    def _remover_ociosos(self) -> int:
+        """Chamar com a trava"""
+        ociosas = [conta for conta, balde in self._contas.items() if balde.ocioso()]
+        for conta in ociosas:
+            del self._contas[conta]
+        return len(ociosas)
+
+    def _reservar(self, conta: str) -> float:
+        """Reserva a vez da requisição nos dois baldes e retorna a maior espera"""
+        return max(self.host.reservar(), self._balde_conta(conta).reservar())
+
+    def _balde_conta(self, conta: str) -> BaldeTokens:
+        with self._trava:
+            balde = self._contas.get(conta)
+            if balde is None:
+                if len(self._contas) >= self.max_contas:
+                    self._remover_ociosos()
+                balde = self._contas[conta] = BaldeTokens(self.taxa_conta, self.rajada_conta)
+            return balde
+
+
+class PoliticaRetentativa:
+    """
+    Decide quais requisições podem ser repetidas e quanto esperar entre tentativas.
+
+    Só repete operações seguras: leituras, login e as transições de estado
+    idempotentes do copy-trade. Criar copy-trade (POST /copy-trade) nunca é
+    repetido, pois poderia seguir o mesmo trader duas vezes.
+    """
+
+    # (método, padrão do endpoint) que podem ser repetidos
+    ENDPOINTS_RETENTAVEIS = (
+        ("GET", re.compile(r".*")),
+        ("POST", re.compile(r"^/auth/login$")),
+        ("PATCH", re.compile(r"^/copy-trade/[^/]+/(inactive|approve-follower|refuse-follower)$")),
+    )
+
+    STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_tentativas: int = 4, espera_base: float = 0.5, espera_maxima: float = 30):
+        """
+        Args:
+            max_tentativas: Total de tentativas, incluindo a primeira
+            espera_base: Espera da primeira repetição, dobrada a cada tentativa
+            espera_maxima: Maior espera entre tentativas, inclusive vinda do Retry-After
+        """
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+
+    def pode_repetir(self, metodo: str, endpoint: str, tentativa: int) -> bool:
+        """
+        Args:
+            metodo: Método HTTP
+            endpoint: Endpoint sem query string
+            tentativa: Número da tentativa que falhou (começando em 0)
+        """
+        if tentativa + 1 >= self.max_tentativas:
+            return False
+
+        caminho = endpoint.split("?", 1)[0]
+        return any(
+            metodo.upper() == metodo_permitido and padrao.match(caminho)
+            for metodo_permitido, padrao in self.ENDPOINTS_RETENTAVEIS
+        )
+
+    def calcular_espera(self, tentativa: int, retry_after: Optional[str] = None) -> float:
+        """
+        Espera antes da próxima tentativa: o Retry-After da API, se houver,
+        ou backoff exponencial com jitter completo
+
+        Args:
+            tentativa: Número da tentativa que falhou (começando em 0)
+            retry_after: Valor do cabeçalho Retry-After (segundos ou data HTTP)
+        """
+        espera = ler_retry_after(retry_after)
+        if espera is None:
+            espera = random.uniform(0, self.espera_base * 2 ** tentativa)
+        return min(espera, self.espera_maxima)
+
+
+def ler_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos de espera"""
+    if not valor:
+        return None
+
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Instâncias únicas do processo, compartilhadas pelos clientes
+limitador_requisicoes = LimitadorRequisicoes()
+politica_retentativa = PoliticaRetentativa()
@@ -0,0 +1,145 @@
+import re
+from functools import lru_cache
+from typing import Optional
+from metricas import registro_metricas
+from .aprovacao import observador_aprovacoes, observador_aprovacoes_async
+from .cache import cache_listagens
+from .disjuntor import disjuntor_corretora
+from .limitador import limitador_requisicoes
+
+# Segmentos de caminho que são identificadores (numéricos, UUID, ULID, hashes)
+_SEGMENTO_ID = re.compile(r"^(\d+|[0-9a-fA-F-]{32,36}|[0-9A-HJKMNP-TV-Z]{26}|[A-Za-z0-9_-]{20,})$")
+
+latencia = registro_metricas.histograma(
+    "optionmarket_requisicao_segundos",
+    "Duração das requisições à OptionMarket",
+    ("metodo", "endpoint"),
+)
+respostas = registro_metricas.contador(
+    "optionmarket_respostas_total",
+    "Respostas da OptionMarket por código de status (erro = falha de rede)",
+    ("metodo", "endpoint", "status"),
+)
+bytes_enviados = registro_metricas.contador(
+    "optionmarket_bytes_enviados_total",
+    "Bytes de corpo enviados à OptionMarket",
+    ("metodo", "endpoint"),
+)
+bytes_recebidos = registro_metricas.contador(
+    "optionmarket_bytes_recebidos_total",
+    "Bytes de corpo recebidos da OptionMarket",
+    ("metodo", "endpoint"),
+)
+desafios_cloudflare = registro_metricas.contador(
+    "optionmarket_desafios_cloudflare_total",
+    "Desafios do Cloudflare recebidos",
+    ("endpoint",),
+)
+
+
+@lru_cache(maxsize=512)
+def normalizar_endpoint(endpoint: str) -> str:
+    """
+    Converte o endpoint em modelo, para não criar uma série por id
+    Ex: /copy-trade/01HZT.../approve-follower?x=1 -> /copy-trade/{id}/approve-follower
+    """
+    caminho = endpoint.split("?", 1)[0]
+    return "/".join("{id}" if _SEGMENTO_ID.match(segmento) else segmento for segmento in caminho.split("/"))
+
+
+def registrar_requisicao(
+    metodo: str,
+    endpoint: str,
+    status: Optional[int],
+    duracao: float,
+    enviados: int = 0,
+    recebidos: int = 0,
+) -> None:
+    """
+    Registra uma requisição à corretora
+
+    Args:
+        metodo: Método HTTP
+        endpoint: Endpoint chamado (com ids, normalizado aqui)
+        status: Código HTTP, ou None se a requisição falhou sem resposta
+        duracao: Segundos até a resposta (ou falha)
+        enviados: Bytes do corpo enviado
+        recebidos: Bytes do corpo recebido
+    """
+    modelo = normalizar_endpoint(endpoint)
+    latencia.observar(duracao, metodo, modelo)
+    respostas.incrementar(metodo, modelo, str(status) if status is not None else "erro")
+    if enviados:
+        bytes_enviados.incrementar(metodo, modelo, valor=enviados)
+    if recebidos:
+        bytes_recebidos.incrementar(metodo, modelo, valor=recebidos)
+
+
+def registrar_desafio_cloudflare(endpoint: str) -> None:
+    """Registra um desafio do Cloudflare recebido no endpoint"""
+    desafios_cloudflare.incrementar(normalizar_endpoint(endpoint))
+
+
+registro_metricas.coletor(
+    "optionmarket_limitador_taxa",
+    "gauge",
+    "Requisições por segundo permitidas hoje pelo rate limiter do host",
+    lambda: [({}, limitador_requisicoes.host.taxa)],
+)
+registro_metricas.coletor(
+    "optionmarket_limitador_limitacoes_total",
+    "counter",
+    "Respostas 429 recebidas, por escopo do limitador",
+    lambda: [
+        ({"escopo": "host"}, limitador_requisicoes.host.limitacoes),
+        ({"escopo": "contas"}, limitador_requisicoes.estatisticas()["limitacoes_contas"]),
+    ],
+)
+registro_metricas.coletor(
+    "optionmarket_limitador_esperas_total",
+    "counter",
+    "Requisições que esperaram o rate limiter do host",
+    lambda: [({}, limitador_requisicoes.host.esperas)],
+)
+registro_metricas.coletor(
+    "optionmarket_disjuntor_estado",
+    "gauge",
+    "Estado do circuit breaker da corretora (1 no estado atual)",
+    lambda: [
+        ({"estado": estado}, 1 if disjuntor_corretora.estado == estado else 0)
+        for estado in (disjuntor_corretora.FECHADO, disjuntor_corretora.ABERTO, disjuntor_corretora.MEIO_ABERTO)
+    ],
+)
+registro_metricas.coletor(
+    "optionmarket_disjuntor_rejeitadas_total",
+    "counter",
+    "Requisições rejeitadas pelo circuit breaker",
+    lambda: [({}, disjuntor_corretora.rejeitadas)],
+)
+registro_metricas.coletor(
+    "optionmarket_cache_listagens_total",
+    "counter",
+    "Leituras do cache de listagens de copy-trade",
+    lambda: [
+        ({"resultado": "acerto"}, cache_listagens.acertos),
+        ({"resultado": "falha"}, cache_listagens.falhas),
+    ],
+)
+registro_metricas.coletor(
+    "optionmarket_aprovacoes_pendentes",
+    "gauge",
+    "Copy-trades aguardando aprovação no observador",
+    lambda: [
+        ({"modo": "sincrono"}, observador_aprovacoes.estatisticas()["pendentes"]),
+        ({"modo": "assincrono"}, observador_aprovacoes_async.estatisticas()["pendentes"]),
+    ],
+)
+registro_metricas.coletor(
+    "optionmarket_aprovacoes_correcoes_total",
+    "counter",
+    "Refuse/approve enviados pelo observador de aprovações",
+    lambda: [
+        ({"modo": "sincrono"}, observador_aprovacoes.estatisticas()["correcoes"]),
+        ({"modo": "assincrono"}, observador_aprovacoes_async.estatisticas()["correcoes"]),
+    ],
+)
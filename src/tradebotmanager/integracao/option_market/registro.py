@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, Tuple
+from .tokens import obter_gerenciador_token, remover_gerenciadores_ociosos, remover_gerenciadores_token
+
+if TYPE_CHECKING:
+    from ...corretoras_usuarios.model import CorretoraUsuario
+    from .client import ClienteOptionMarket
+
+
+class RegistroClientes:
+    """
+    Registro de clientes da OptionMarket reaproveitados por conta (CorretoraUsuario.id).
+
+    Mantém a sessão cloudscraper aquecida (conexões keep-alive, cookies do
+    Cloudflare e token válido) entre operações, em vez de criar e descartar
+    um cliente a cada chamada. Clientes ociosos ou excedentes (LRU) saem do
+    registro; os que ainda estão em uso (ver usar()) só são desconectados
+    na última liberação.
+    """
+
+    def __init__(self, max_clientes: int = 200, tempo_ocioso: float = 900):
+        """
+        Args:
+            max_clientes: Quantidade máxima de clientes mantidos em memória
+            tempo_ocioso: Segundos sem uso após os quais o cliente é descartado
+        """
+        self.max_clientes = max_clientes
+        self.tempo_ocioso = tempo_ocioso
+        # conta_id -> (cliente, último uso); a ordem do OrderedDict é a ordem LRU
+        self._clientes: "OrderedDict[int, Tuple[ClienteOptionMarket, float]]" = OrderedDict()
+        # cliente -> usos em andamento (usar()); removido ao chegar a zero
+        self._em_uso: "Dict[ClienteOptionMarket, int]" = {}
+        # Clientes já fora do registro esperando a última liberação para desconectar -> conta_id
+        self._aposentados: "Dict[ClienteOptionMarket, int]" = {}
+        self._trava = threading.Lock()
+
+    def obter(self, conta: "CorretoraUsuario") -> "ClienteOptionMarket":
+        """
+        Retorna o cliente da conta, criando (e autenticando) se necessário
+
+        Args:
+            conta: Conta do usuário na corretora
+
+        Raises:
+            ValueError: Se a autenticação de um novo cliente falhar
+        """
+        return self._obter(conta, reservar=False)
+
+    def _obter(self, conta: "CorretoraUsuario", reservar: bool) -> "ClienteOptionMarket":
+        """
+        obter(); com `reservar`, conta o uso (ver usar()) na mesma trava em que
+        o cliente é encontrado, para uma limpeza não desconectá-lo no intervalo
+        """
+        agora = time.monotonic()
+
+        with self._trava:
+            registro = self._clientes.get(conta.id)
+            if registro:
+                cliente, _ = registro
+                # Credenciais alteradas invalidam o cliente antigo
+                if cliente.email == conta.login and cliente.senha == conta.senha:
+                    self._clientes[conta.id] = (cliente, agora)
+                    self._clientes.move_to_end(conta.id)
+                    if reservar:
+                        self._reservar(cliente)
+                    return cliente
+                self._descartar(conta.id)
+                # O token guardado pertence às credenciais antigas
+                obter_gerenciador_token(conta).limpar()
+
+        # Importado só aqui: o cloudscraper é caro e não deve pesar no import da aplicação
+        from .client import ClienteOptionMarket
+
+        # Cria fora da trava: o login é lento e não deve bloquear as outras contas
+        novo = ClienteOptionMarket(conta.login, conta.senha, gerenciador_token=obter_gerenciador_token(conta))
+
+        with self._trava:
+            registro = self._clientes.get(conta.id)
+            if registro:
+                # Outra thread criou o cliente enquanto este autenticava
+                novo.desconectar()
+                if reservar:
+                    self._reservar(registro[0])
+                return registro[0]
+
+            self._clientes[conta.id] = (novo, agora)
+            if reservar:
+                self._reservar(novo)
+            self._remover_excedentes(agora)
+            return novo
+
+    @contextmanager
+    def usar(self, conta: "CorretoraUsuario") -> Iterator["ClienteOptionMarket"]:
+        """
+        Cliente da conta reservado durante o bloco: se for removido do registro
+        nesse meio tempo (LRU, ociosidade, credenciais alteradas), a desconexão
+        espera o fim do bloco em vez de fechar a sessão no meio de uma requisição
+
+        Args:
+            conta: Conta do usuário na corretora
+
+        Raises:
+            ValueError: Se a autenticação de um novo cliente falhar
+        """
+        cliente = self._obter(conta, reservar=True)
+        try:
+            yield cliente
+        finally:
+            self._liberar(cliente)
+
+    def _reservar(self, cliente: "ClienteOptionMarket") -> None:
+        """Chamar com a trava"""
+        self._em_uso[cliente] = self._em_uso.get(cliente, 0) + 1
+
+    def _liberar(self, cliente: "ClienteOptionMarket") -> None:
+        with self._trava:
+            usos = self._em_uso.pop(cliente) - 1
+            if usos:
+                self._em_uso[cliente] = usos
+                return
+            conta_id = self._aposentados.pop(cliente, None)
+            if conta_id is None:
+                return
+            # O gerenciador de token só sai com a desconexão, e só se a conta não ganhou outro cliente
+            esquecer_token = conta_id not in self._clientes
+        cliente.desconectar()
+        if esquecer_token:
+            remover_gerenciadores_token([conta_id])
+
+    def aquecer(self, contas: Iterable["CorretoraUsuario"] = (), max_paralelo: int = 4) -> int:
+        """
+        Prepara o registro antes das primeiras requisições: carrega o cliente
+        (cloudscraper) e, para as contas informadas, cria e autentica os clientes
+
+        Args:
+            contas: Contas a deixar com cliente pronto (ex: as com bots ativos)
+            max_paralelo: Logins simultâneos na corretora
+
+        Returns:
+            Quantidade de clientes criados ou já existentes
+        """
+        from . import client  # noqa: F401
+
+        contas = list(contas)
+        if not contas:
+            return 0
+
+        def preparar(conta: "CorretoraUsuario") -> bool:
+            try:
+                self.obter(conta)
+                return True
+            except (ValueError, ConnectionError):
+                # A conta volta a ser tentada na primeira operação
+                return False
+
+        with ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix="aquecer_registro") as executor:
+            return sum(executor.map(preparar, contas))
+
+    def remover(self, conta_id: int) -> None:
+        """Desconecta e remove o cliente da conta (ex: conta desativada ou senha alterada)"""
+        with self._trava:
+            self._descartar(conta_id)
+
+    def limpar_ociosos(self) -> int:
+        """
+        Remove clientes sem uso há mais de `tempo_ocioso` segundos e os
+        gerenciadores de token ociosos das contas sem cliente (chamado
+        periodicamente pelo ciclo de vida da aplicação)
+
+        Returns:
+            Quantidade de clientes removidos
+        """
+        with self._trava:
+            removidos = self._remover_excedentes(time.monotonic())
+            remover_gerenciadores_ociosos(
+                self.tempo_ocioso, manter=[*self._clientes, *self._aposentados.values()]
+            )
+        return removidos
+
+    def fechar_todos(self) -> None:
+        """Desconecta todos os clientes, inclusive os ainda em uso (desligamento da aplicação)"""
+        with self._trava:
+            for conta_id in list(self._clientes):
+                self._descartar(conta_id)
+            aposentados, self._aposentados = list(self._aposentados), {}
+        for cliente in aposentados:
+            cliente.desconectar()
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Quantidade de clientes mantidos, aguardando desconexão e limite configurado"""
+        return {
+            "clientes": len(self._clientes),
+            "aguardando_liberacao": len(self._aposentados),
+            "max_clientes": self.max_clientes,
+        }
+
+    def _remover_excedentes(self, agora: float) -> int:
+        """
+        Remove ociosos e, se ainda acima do limite, os menos usados, junto com
+        os gerenciadores de token das contas já desconectadas (os das contas
+        com cliente ainda em uso saem na última liberação). Chamar com a trava.
+        """
+        removidos = []
+        for conta_id, (_, ultimo_uso) in list(self._clientes.items()):
+            # Ordem LRU: ao achar um cliente recente, os seguintes também são
+            if agora - ultimo_uso < self.tempo_ocioso:
+                break
+            self._descartar(conta_id)
+            removidos.append(conta_id)
+
+        while len(self._clientes) > self.max_clientes:
+            conta_id = next(iter(self._clientes))
+            self._descartar(conta_id)
+            removidos.append(conta_id)
+
+        remover_gerenciadores_token(conta_id for conta_id in removidos if conta_id not in self._aposentados.values())
+        return len(removidos)
+
+    def _descartar(self, conta_id: int) -> None:
+        """Remove o cliente e o desconecta, ou adia a desconexão se estiver em uso. Chamar com a trava."""
+        registro = self._clientes.pop(conta_id, None)
+        if not registro:
+            return
+        cliente = registro[0]
+        if self._em_uso.get(cliente):
+            self._aposentados[cliente] = conta_id
+        else:
+            cliente.desconectar()
+
+
+# Registro único do processo
+registro_clientes = RegistroClientes()
@@ -1,13 +1,26 @@
-from typing import Any, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from .aprovacao import PRAZO_ESPERA_BLOQUEANTE, observador_aprovacoes
+from .cache import CacheListagens, cache_listagens
 from .client import ClienteOptionMarket
 
+# Maior página aceita pela API de copy-trade
+TAMANHO_PAGINA_PADRAO = 100
+
+
 class OptionMarketRepository:
     """
     Repository para operações de copy-trade na OptionMarket via API externa.
     Depende de ClienteOptionMarket para autenticação e requisições.
     """
-    def __init__(self, client: ClienteOptionMarket):
+    def __init__(self, client: ClienteOptionMarket, cache: Optional[CacheListagens] = cache_listagens):
+        """
+        Args:
+            client: Cliente autenticado da conta
+            cache: Cache das listagens de copy-trade (None desativa)
+        """
         self.client = client
+        self.cache = cache
 
     def seguir_bot(self, profile_id: str, max_balance_to_use: float) -> str:
         """
@@ -20,11 +33,14 @@ class OptionMarketRepository:
         }
         try:
             resp = self.client.post("/copy-trade", dados=body)
-            return resp["id"]
+            broker_copy_id = resp["id"]
         except Exception as exc:
             msg = str(exc)
             raise RuntimeError(f"Erro ao seguir bot: {msg}")
 
+        self._invalidar(broker_copy_id)
+        return broker_copy_id
+
     def deixar_de_seguir_bot(self, broker_copy_id: str) -> bool:
         """
         Cancela (unfollow) um copy-trade e verifica se ficou inativo.
@@ -35,53 +51,187 @@ class OptionMarketRepository:
             self.client.patch(path, dados={})
         except Exception as exc:
             raise RuntimeError(f"Erro ao deixar de seguir bot: {exc}")
+        finally:
+            # Mesmo com erro a corretora pode ter aplicado a mudança
+            self._invalidar(broker_copy_id)
         
         # Verifica se ficou inativo
-        bots = self.listar_bots(ativo=False)
-        for bot in bots:
-            if bot["id"] == broker_copy_id:
-                return not bot.get("active", True)
+        bot = self.buscar_bot(broker_copy_id, ativo=False)
+        if bot:
+            return not bot.get("active", True)
         return False
 
-    def listar_bots(self, ativo: bool = True) -> List[dict]:
+    def listar_bots(self, ativo: Optional[bool] = True, **opcoes) -> List[dict]:
+        """
+        Lista todos os bots filtrando por ativo/inativo, percorrendo todas as páginas.
+        Aceita as mesmas opções de iterar_bots; só a listagem padrão usa o cache.
+        """
+        usar_cache = self.cache is not None and ativo is not None and not opcoes
+        if usar_cache:
+            bots = self.cache.obter_listagem(self.client.email, ativo)
+            if bots is not None:
+                return bots
+
+        bots = list(self.iterar_bots(ativo=ativo, **opcoes))
+        if usar_cache:
+            self.cache.guardar_listagem(self.client.email, ativo, bots)
+        return bots
+
+    def iterar_bots(
+        self,
+        ativo: Optional[bool] = True,
+        tamanho_pagina: int = TAMANHO_PAGINA_PADRAO,
+        ordenar_por: str = "updatedAt",
+        direcao: str = "DESC",
+        filtros: Optional[Dict[str, Any]] = None,
+        pre_carregar: bool = False,
+    ) -> Iterator[dict]:
         """
-        Lista bots filtrando por ativo/inativo.
+        Percorre os copy-trades página a página, sob demanda.
+        Quem chama pode interromper a iteração assim que achar o que procura,
+        evitando baixar as páginas seguintes.
+
+        Args:
+            ativo: True=só ativos, False=só inativos, None=todos
+            tamanho_pagina: Itens por página pedidos à API (no máximo TAMANHO_PAGINA_PADRAO)
+            ordenar_por: Campo de ordenação da API
+            direcao: ASC ou DESC
+            filtros: Parâmetros extras de query string
+            pre_carregar: Busca a próxima página em segundo plano enquanto a atual é processada
         """
-        ativo_str = "true" if ativo else "false"
-        path = f"/copy-trade?page=1&pageSize=100&active={ativo_str}&orderBy=updatedAt&orderDirection=DESC"
+        for pagina in self._iterar_paginas(ativo, tamanho_pagina, ordenar_por, direcao, filtros, pre_carregar):
+            yield from pagina
+
+    def _iterar_paginas(
+        self,
+        ativo: Optional[bool],
+        tamanho_pagina: int,
+        ordenar_por: str,
+        direcao: str,
+        filtros: Optional[Dict[str, Any]],
+        pre_carregar: bool,
+    ) -> Iterator[List[dict]]:
+        """Percorre a listagem de copy-trades devolvendo uma página por vez"""
+        # A API não devolve mais que TAMANHO_PAGINA_PADRAO itens; pedir mais faria a
+        # primeira página parecer a última e a listagem terminar truncada
+        tamanho_pagina = min(tamanho_pagina, TAMANHO_PAGINA_PADRAO)
+        parametros: Dict[str, Any] = {
+            **(filtros or {}),
+            "pageSize": tamanho_pagina,
+            "orderBy": ordenar_por,
+            "orderDirection": direcao,
+        }
+        if ativo is not None:
+            parametros["active"] = "true" if ativo else "false"
+
+        executor = ThreadPoolExecutor(max_workers=1) if pre_carregar else None
+        # Próxima página já pedida em segundo plano (pre_carregar)
+        proxima: Optional[Future] = None
+        pagina = 1
         try:
-            resp = self.client.get(path)
+            while True:
+                itens = proxima.result() if proxima else self._buscar_pagina(parametros, pagina)
+                proxima = None
+                ultima = len(itens) < tamanho_pagina
+                if executor and not ultima:
+                    proxima = executor.submit(self._buscar_pagina, parametros, pagina + 1)
+
+                yield itens
+                if ultima:
+                    return
+                pagina += 1
+        finally:
+            # Iteração interrompida: descarta a página pedida e não usada
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def buscar_bot(self, broker_copy_id: str, ativo: Optional[bool] = True) -> Optional[dict]:
+        """
+        Busca um copy-trade pelo id, parando na primeira página que o contiver.
+        Consulta o cache antes e o atualiza com as páginas lidas.
+        """
+        usar_cache = self.cache is not None and ativo is not None
+        if usar_cache:
+            encontrado, bot = self.cache.buscar(self.client.email, ativo, broker_copy_id)
+            if encontrado:
+                return bot
+
+        lidos: List[dict] = []
+        for pagina in self._iterar_paginas(ativo, TAMANHO_PAGINA_PADRAO, "updatedAt", "DESC", None, False):
+            lidos.extend(pagina)
+            ultima = len(pagina) < TAMANHO_PAGINA_PADRAO
+            achou = any(bot["id"] == broker_copy_id for bot in pagina)
+            if usar_cache and ultima:
+                # Listagem lida até o fim: pode substituir a do cache
+                self.cache.guardar_listagem(self.client.email, ativo, lidos)
+            elif usar_cache and achou:
+                self.cache.atualizar_itens(self.client.email, ativo, lidos)
+            if ultima or achou:
+                break
+
+        return next((bot for bot in lidos if bot["id"] == broker_copy_id), None)
+
+    def _buscar_pagina(self, parametros: Dict[str, Any], pagina: int) -> List[dict]:
+        """Busca uma página da listagem de copy-trades"""
+        try:
+            resp = self.client.get("/copy-trade", parametros={**parametros, "page": pagina})
             return resp["data"]
         except Exception as exc:
             msg = str(exc)
             raise RuntimeError(f"Erro ao listar bots: {msg}")
 
-    def atualizar_status_aprovado(self, broker_copy_id: str, tentativas: int = 3) -> bool:
+    def atualizar_status_aprovado(self, broker_copy_id: str, tentativas: int = 3, prazo: float = PRAZO_ESPERA_BLOQUEANTE) -> bool:
         """
-        Garante que o copy-trade fique com status APPROVED, tentando refuse/approve.
+        Garante que o copy-trade fique com status APPROVED, esperando o observador
+        de aprovações. Só manda refuse/approve se o copy-trade estiver preso.
+
+        Args:
+            broker_copy_id: ID do copy-trade na corretora
+            tentativas: Máximo de refuse/approve enviados
+            prazo: Segundos até desistir; curto, pois um id que não aparece entre os ativos
+                só é dado como não aprovado ao fim do prazo
         """
-        if tentativas < 1:
-            tentativas = 1
+        futuro = self.aguardar_aprovacao(broker_copy_id, max_correcoes=max(1, tentativas), prazo=prazo)
+        return futuro.result()
 
+    def aguardar_aprovacao(
+        self,
+        broker_copy_id: str,
+        ao_concluir: Optional[Callable[[str, bool], None]] = None,
+        max_correcoes: Optional[int] = None,
+        prazo: Optional[float] = None,
+    ) -> Future:
+        """
+        Registra o copy-trade no observador de aprovações da conta, sem bloquear.
+        Retorna um Future com True quando aprovado, False se desistiu.
+        """
+        return observador_aprovacoes.observar(self, broker_copy_id, ao_concluir, max_correcoes, prazo)
+
+    def forcar_aprovacao(self, broker_copy_id: str) -> None:
+        """
+        Manda refuse e approve para destravar um copy-trade não aprovado.
+        """
         refuse_path = f"/copy-trade/{broker_copy_id}/refuse-follower"
         approve_path = f"/copy-trade/{broker_copy_id}/approve-follower"
-        for _ in range(tentativas):
+        # O refuse sozinho já altera o copy-trade: invalida o cache mesmo se o approve nem sair
+        try:
             try:
                 self.client.patch(refuse_path, dados={})
             except Exception as exc:
                 msg = str(exc)
                 if "already refused" not in msg.lower():
                     raise RuntimeError(f"Erro ao recusar bot: {msg}")
-                
+
             try:
                 self.client.patch(approve_path, dados={})
             except Exception as exc:
                 msg = str(exc)
                 if "already approved" not in msg.lower():
                     raise RuntimeError(f"Erro ao aprovar bot: {msg}")
-            bots = self.listar_bots(ativo=True)
-            
-            for bot in bots:
-                if bot["id"] == broker_copy_id and bot.get("status") == "APPROVED":
-                    return True
-        return False
+        finally:
+            self._invalidar(broker_copy_id)
+
+    def _invalidar(self, broker_copy_id: str) -> None:
+        """Marca o copy-trade como alterado no cache de listagens da conta"""
+        if self.cache is not None:
+            self.cache.invalidar(self.client.email, broker_copy_id)
@@ -0,0 +1,246 @@
+import asyncio
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+from .aprovacao import PRAZO_ESPERA_BLOQUEANTE, observador_aprovacoes_async
+from .cache import CacheListagens, cache_listagens
+from .client_async import ClienteOptionMarketAsync
+from .repository import TAMANHO_PAGINA_PADRAO
+
+
+async def executar_com_limite(tarefas: Iterable[Awaitable[Any]], limite: int = 50) -> List[Any]:
+    """
+    Executa corrotinas em paralelo com no máximo `limite` simultâneas.
+
+    Args:
+        tarefas: Corrotinas a executar (ex: um seguir_bot por conta)
+        limite: Máximo de corrotinas em andamento ao mesmo tempo
+
+    Returns:
+        Resultados na mesma ordem das tarefas. Falhas são devolvidas como a
+        própria exceção, para que uma conta com erro não cancele as demais.
+    """
+    semaforo = asyncio.Semaphore(limite)
+
+    async def executar(tarefa: Awaitable[Any]) -> Any:
+        async with semaforo:
+            return await tarefa
+
+    return await asyncio.gather(*(executar(t) for t in tarefas), return_exceptions=True)
+
+
+class OptionMarketRepositoryAsync:
+    """
+    Versão assíncrona do OptionMarketRepository.
+    Depende de ClienteOptionMarketAsync para autenticação e requisições.
+    """
+    def __init__(self, client: ClienteOptionMarketAsync, cache: Optional[CacheListagens] = cache_listagens):
+        """
+        Args:
+            client: Cliente autenticado da conta
+            cache: Cache das listagens de copy-trade (None desativa)
+        """
+        self.client = client
+        self.cache = cache
+
+    async def seguir_bot(self, profile_id: str, max_balance_to_use: float) -> str:
+        """
+        Segue um trader criando um copy-trade. Retorna o id da assinatura criada.
+        """
+        body = {
+            "maxBalanceToUse": max_balance_to_use,
+            "traderUserId": profile_id,
+            "stopLoss": 1000000,
+        }
+        try:
+            resp = await self.client.post("/copy-trade", dados=body)
+            broker_copy_id = resp["id"]
+        except Exception as exc:
+            raise RuntimeError(f"Erro ao seguir bot: {exc}")
+
+        self._invalidar(broker_copy_id)
+        return broker_copy_id
+
+    async def deixar_de_seguir_bot(self, broker_copy_id: str) -> bool:
+        """
+        Cancela (unfollow) um copy-trade e verifica se ficou inativo.
+        """
+        path = f"/copy-trade/{broker_copy_id}/inactive"
+
+        try:
+            await self.client.patch(path, dados={})
+        except Exception as exc:
+            raise RuntimeError(f"Erro ao deixar de seguir bot: {exc}")
+        finally:
+            # Mesmo com erro a corretora pode ter aplicado a mudança
+            self._invalidar(broker_copy_id)
+
+        # Verifica se ficou inativo
+        bot = await self.buscar_bot(broker_copy_id, ativo=False)
+        if bot:
+            return not bot.get("active", True)
+        return False
+
+    async def listar_bots(self, ativo: Optional[bool] = True, **opcoes) -> List[dict]:
+        """
+        Lista todos os bots filtrando por ativo/inativo, percorrendo todas as páginas.
+        Aceita as mesmas opções de iterar_bots; só a listagem padrão usa o cache.
+        """
+        usar_cache = self.cache is not None and ativo is not None and not opcoes
+        if usar_cache:
+            bots = self.cache.obter_listagem(self.client.email, ativo)
+            if bots is not None:
+                return bots
+
+        bots = [bot async for bot in self.iterar_bots(ativo=ativo, **opcoes)]
+        if usar_cache:
+            self.cache.guardar_listagem(self.client.email, ativo, bots)
+        return bots
+
+    async def iterar_bots(
+        self,
+        ativo: Optional[bool] = True,
+        tamanho_pagina: int = TAMANHO_PAGINA_PADRAO,
+        ordenar_por: str = "updatedAt",
+        direcao: str = "DESC",
+        filtros: Optional[Dict[str, Any]] = None,
+        pre_carregar: bool = False,
+    ) -> AsyncIterator[dict]:
+        """
+        Percorre os copy-trades página a página, sob demanda.
+        Mesmas opções de OptionMarketRepository.iterar_bots.
+        """
+        async for pagina in self._iterar_paginas(ativo, tamanho_pagina, ordenar_por, direcao, filtros, pre_carregar):
+            for bot in pagina:
+                yield bot
+
+    async def _iterar_paginas(
+        self,
+        ativo: Optional[bool],
+        tamanho_pagina: int,
+        ordenar_por: str,
+        direcao: str,
+        filtros: Optional[Dict[str, Any]],
+        pre_carregar: bool,
+    ) -> AsyncIterator[List[dict]]:
+        """Percorre a listagem de copy-trades devolvendo uma página por vez"""
+        # A API não devolve mais que TAMANHO_PAGINA_PADRAO itens; pedir mais faria a
+        # primeira página parecer a última e a listagem terminar truncada
+        tamanho_pagina = min(tamanho_pagina, TAMANHO_PAGINA_PADRAO)
+        parametros: Dict[str, Any] = {
+            **(filtros or {}),
+            "pageSize": tamanho_pagina,
+            "orderBy": ordenar_por,
+            "orderDirection": direcao,
+        }
+        if ativo is not None:
+            parametros["active"] = "true" if ativo else "false"
+
+        pagina = 1
+        # Próxima página já pedida em segundo plano (pre_carregar)
+        proxima: Optional[asyncio.Task] = None
+        try:
+            while True:
+                itens = await (proxima or self._buscar_pagina(parametros, pagina))
+                proxima = None
+                ultima = len(itens) < tamanho_pagina
+                if pre_carregar and not ultima:
+                    proxima = asyncio.create_task(self._buscar_pagina(parametros, pagina + 1))
+
+                yield itens
+                if ultima:
+                    return
+                pagina += 1
+        finally:
+            # Iteração interrompida: descarta a página pedida e não usada
+            if proxima:
+                proxima.cancel()
+
+    async def buscar_bot(self, broker_copy_id: str, ativo: Optional[bool] = True) -> Optional[dict]:
+        """
+        Busca um copy-trade pelo id, parando na primeira página que o contiver.
+        Consulta o cache antes e o atualiza com as páginas lidas.
+        """
+        usar_cache = self.cache is not None and ativo is not None
+        if usar_cache:
+            encontrado, bot = self.cache.buscar(self.client.email, ativo, broker_copy_id)
+            if encontrado:
+                return bot
+
+        lidos: List[dict] = []
+        async for pagina in self._iterar_paginas(ativo, TAMANHO_PAGINA_PADRAO, "updatedAt", "DESC", None, False):
+            lidos.extend(pagina)
+            ultima = len(pagina) < TAMANHO_PAGINA_PADRAO
+            achou = any(bot["id"] == broker_copy_id for bot in pagina)
+            if usar_cache and ultima:
+                # Listagem lida até o fim: pode substituir a do cache
+                self.cache.guardar_listagem(self.client.email, ativo, lidos)
+            elif usar_cache and achou:
+                self.cache.atualizar_itens(self.client.email, ativo, lidos)
+            if ultima or achou:
+                break
+
+        return next((bot for bot in lidos if bot["id"] == broker_copy_id), None)
+
+    async def _buscar_pagina(self, parametros: Dict[str, Any], pagina: int) -> List[dict]:
+        """Busca uma página da listagem de copy-trades"""
+        try:
+            resp = await self.client.get("/copy-trade", parametros={**parametros, "page": pagina})
+            return resp["data"]
+        except Exception as exc:
+            raise RuntimeError(f"Erro ao listar bots: {exc}")
+
+    async def atualizar_status_aprovado(self, broker_copy_id: str, tentativas: int = 3, prazo: float = PRAZO_ESPERA_BLOQUEANTE) -> bool:
+        """
+        Garante que o copy-trade fique com status APPROVED, esperando o observador
+        de aprovações. Só manda refuse/approve se o copy-trade estiver preso.
+
+        Args:
+            broker_copy_id: ID do copy-trade na corretora
+            tentativas: Máximo de refuse/approve enviados
+            prazo: Segundos até desistir; curto, pois um id que não aparece entre os ativos
+                só é dado como não aprovado ao fim do prazo
+        """
+        futuro = self.aguardar_aprovacao(broker_copy_id, max_correcoes=max(1, tentativas), prazo=prazo)
+        return await asyncio.wrap_future(futuro)
+
+    def aguardar_aprovacao(
+        self,
+        broker_copy_id: str,
+        ao_concluir: Optional[Callable[[str, bool], None]] = None,
+        max_correcoes: Optional[int] = None,
+        prazo: Optional[float] = None,
+    ) -> Future:
+        """
+        Registra o copy-trade no observador de aprovações da conta, sem bloquear.
+        Retorna um Future com True quando aprovado, False se desistiu.
+        """
+        return observador_aprovacoes_async.observar(self, broker_copy_id, ao_concluir, max_correcoes, prazo)
+
+    async def forcar_aprovacao(self, broker_copy_id: str) -> None:
+        """
+        Manda refuse e approve para destravar um copy-trade não aprovado.
+        """
+        refuse_path = f"/copy-trade/{broker_copy_id}/refuse-follower"
+        approve_path = f"/copy-trade/{broker_copy_id}/approve-follower"
+        # O refuse sozinho já altera o copy-trade: invalida o cache mesmo se o approve nem sair
+        try:
+            try:
+                await self.client.patch(refuse_path, dados={})
+            except Exception as exc:
+                msg = str(exc)
+                if "already refused" not in msg.lower():
+                    raise RuntimeError(f"Erro ao recusar bot: {msg}")
+
+            try:
+                await self.client.patch(approve_path, dados={})
+            except Exception as exc:
+                msg = str(exc)
+                if "already approved" not in msg.lower():
+                    raise RuntimeError(f"Erro ao aprovar bot: {msg}")
+        finally:
+            self._invalidar(broker_copy_id)
+
+    def _invalidar(self, broker_copy_id: str) -> None:
+        """Marca o copy-trade como alterado no cache de listagens da conta"""
+        if self.cache is not None:
+            self.cache.invalidar(self.client.email, broker_copy_id)
@@ -0,0 +1,290 @@
+import asyncio
+import base64
+import json
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    from ...corretoras_usuarios.model import CorretoraUsuario
+
+
+logger = logging.getLogger("tradebotmanager.option_market")
+
+# Renova o token alguns minutos antes de expirar para não falhar no meio de uma operação
+MARGEM_RENOVACAO_PADRAO = 300
+
+
+def ler_expiracao_token(token: str) -> Optional[int]:
+    """
+    Lê a claim 'exp' de um token JWT sem validar a assinatura
+    
+    Args:
+        token: Token JWT no formato header.payload.signature
+        
+    Returns:
+        Expiração em segundos desde epoch, ou None se o token estiver malformado ou sem 'exp'
+    """
+    try:
+        partes = token.split(".")
+        if len(partes) < 2:
+            return None
+        
+        payload_b64 = partes[1]
+        # Adiciona padding necessário para decodificação base64
+        padding = "=" * (-len(payload_b64) % 4)
+        payload_bytes = base64.urlsafe_b64decode(payload_b64 + padding)
+        payload = json.loads(payload_bytes.decode("utf-8"))
+        
+        exp = payload.get("exp")
+        return int(exp) if exp is not None else None
+        
+    except Exception:
+        return None
+
+
+class GerenciadorToken:
+    """
+    Ciclo de vida do token JWT de uma conta na OptionMarket.
+
+    - Decodifica a claim 'exp' uma única vez, quando o token é definido
+    - Renova o token `margem_renovacao` segundos antes de expirar
+    - Garante um único /auth/login por vez: chamadas simultâneas, de threads
+      ou de corrotinas em qualquer event loop, esperam o login em andamento e
+      reaproveitam o token obtido
+    - Avisa `ao_renovar` a cada token novo (ex: para gravar no banco), fora
+      da trava; uma falha ao avisar é registrada no log e não derruba o login
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        margem_renovacao: float = MARGEM_RENOVACAO_PADRAO,
+        ao_renovar: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Args:
+            token: Token já conhecido (ex: CorretoraUsuario.token_jwt)
+            margem_renovacao: Segundos antes do 'exp' em que o token já é renovado
+            ao_renovar: Função chamada com cada token novo obtido por login
+        """
+        self.margem_renovacao = margem_renovacao
+        self.ao_renovar = ao_renovar
+        self.token: Optional[str] = None
+        self.expiracao: Optional[int] = None
+        self.renovacoes = 0
+        self.ultima_falha: Optional[str] = None
+        self.ultimo_uso = time.monotonic()
+        # Uma única trava para threads e corrotinas: o caminho assíncrono a
+        # adquire sem bloquear (ver _adquirir_async), então não fica presa a
+        # um event loop e o login é único entre os dois caminhos
+        self._trava = threading.Lock()
+        self.definir(token)
+
+    def definir(self, token: Optional[str]) -> None:
+        """Troca o token atual, decodificando sua expiração"""
+        self.token = token
+        self.expiracao = ler_expiracao_token(token) if token else None
+
+    def limpar(self) -> None:
+        """Esquece o token atual"""
+        self.definir(None)
+
+    def valido(self) -> bool:
+        """True se há token e ele ainda não expirou"""
+        return self.expiracao is not None and time.time() < self.expiracao
+
+    def precisa_renovar(self) -> bool:
+        """True se não há token ou ele expira dentro da margem de renovação"""
+        return self.expiracao is None or time.time() >= self.expiracao - self.margem_renovacao
+
+    def obter(self, fazer_login: Callable[[], str]) -> str:
+        """
+        Retorna um token válido, fazendo login apenas se necessário
+
+        Args:
+            fazer_login: Função que autentica na API e retorna o token novo
+
+        Raises:
+            ValueError: Se a autenticação falhar
+        """
+        self.ultimo_uso = time.monotonic()
+        if not self.precisa_renovar():
+            return self.token
+
+        with self._trava:
+            # Outra thread pode ter renovado enquanto esta esperava a trava
+            if not self.precisa_renovar():
+                return self.token
+
+            token = self._registrar(fazer_login)
+
+        self._avisar_renovacao(token)
+        return token
+
+    async def obter_async(self, fazer_login: Callable[[], Awaitable[str]]) -> str:
+        """
+        Versão assíncrona de obter()
+
+        Args:
+            fazer_login: Corrotina que autentica na API e retorna o token novo
+
+        Raises:
+            ValueError: Se a autenticação falhar
+        """
+        self.ultimo_uso = time.monotonic()
+        if not self.precisa_renovar():
+            return self.token
+
+        await self._adquirir_async()
+        try:
+            if not self.precisa_renovar():
+                return self.token
+
+            try:
+                token = await fazer_login()
+            except Exception as e:
+                self.ultima_falha = str(e)
+                raise
+
+            self._guardar(token)
+        finally:
+            self._trava.release()
+
+        # Gravação síncrona no banco fora do event loop
+        await asyncio.to_thread(self._avisar_renovacao, token)
+        return token
+
+    def renovar(self, fazer_login: Callable[[], str]) -> str:
+        """Força um novo login, mesmo com token ainda válido"""
+        with self._trava:
+            token = self._registrar(fazer_login)
+
+        self._avisar_renovacao(token)
+        return token
+
+    def estado(self) -> Dict[str, Optional[object]]:
+        """Resumo do token para diagnóstico (nunca inclui o token)"""
+        return {
+            "possui_token": self.token is not None,
+            "expira_em": self.expiracao,
+            "precisa_renovar": self.precisa_renovar(),
+            "renovacoes": self.renovacoes,
+            "ultima_falha": self.ultima_falha,
+        }
+
+    async def _adquirir_async(self) -> None:
+        """
+        Adquire a trava sem bloquear o event loop: tenta sem esperar e, se
+        ocupada, dorme um pouco (até 50 ms) antes de tentar de novo.
+        Cancelar a espera não deixa a trava presa.
+        """
+        espera = 0.001
+        while not self._trava.acquire(blocking=False):
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 0.05)
+
+    def _registrar(self, fazer_login: Callable[[], str]) -> str:
+        """Faz login e guarda o token novo. Chamar com a trava."""
+        try:
+            token = fazer_login()
+        except Exception as e:
+            self.ultima_falha = str(e)
+            raise
+
+        self._guardar(token)
+        return token
+
+    def _avisar_renovacao(self, token: str) -> None:
+        """Chama `ao_renovar` com o token novo. Chamar sem a trava."""
+        if not self.ao_renovar:
+            return
+        try:
+            self.ao_renovar(token)
+        except Exception:
+            # O token novo já está em memória; só a cópia no banco ficou para trás
+            logger.exception("Falha ao gravar o token renovado")
+
+    def _guardar(self, token: str) -> None:
+        """Define o token obtido por login e atualiza os contadores"""
+        self.definir(token)
+        self.renovacoes += 1
+        self.ultima_falha = None
+
+
+def salvar_token_no_banco(conta_id: int, token: str) -> None:
+    """
+    Grava o token renovado em CorretoraUsuario.token_jwt, para que um
+    reinício do processo não precise autenticar de novo
+    """
+    # Import local: o módulo de integração não depende do banco para ser importado
+    from database import BancoDeDados
+    from ...corretoras_usuarios.repository import CorretoraUsuarioRepository
+
+    sessao = BancoDeDados()
+    try:
+        CorretoraUsuarioRepository(sessao).atualizar_token(conta_id, token)
+    finally:
+        sessao.close()
+
+
+# Um gerenciador por conta, compartilhado por todos os clientes do processo;
+# os ociosos saem junto com a limpeza do registro de clientes
+_gerenciadores: Dict[int, GerenciadorToken] = {}
+_trava_gerenciadores = threading.Lock()
+
+
+def obter_gerenciador_token(conta: "CorretoraUsuario") -> GerenciadorToken:
+    """
+    Retorna o gerenciador de token da conta, criando a partir de
+    conta.token_jwt e gravando no banco cada token renovado
+    """
+    with _trava_gerenciadores:
+        gerenciador = _gerenciadores.get(conta.id)
+        if gerenciador is None:
+            conta_id = conta.id
+            gerenciador = GerenciadorToken(
+                conta.token_jwt,
+                ao_renovar=lambda token: salvar_token_no_banco(conta_id, token),
+            )
+            _gerenciadores[conta_id] = gerenciador
+        gerenciador.ultimo_uso = time.monotonic()
+        return gerenciador
+
+
+def remover_gerenciadores_token(contas_ids: Iterable[int]) -> None:
+    """Esquece os gerenciadores das contas (ex: clientes removidos do registro)"""
+    with _trava_gerenciadores:
+        for conta_id in contas_ids:
+            _gerenciadores.pop(conta_id, None)
+
+
+def remover_gerenciadores_ociosos(tempo_ocioso: float, manter: Iterable[int] = ()) -> int:
+    """
+    Esquece os gerenciadores sem uso há mais de `tempo_ocioso` segundos; o
+    token continua gravado em CorretoraUsuario.token_jwt para o próximo uso
+
+    Args:
+        tempo_ocioso: Segundos sem pedir token após os quais o gerenciador sai do mapa
+        manter: Contas preservadas mesmo ociosas (ex: com cliente no registro)
+
+    Returns:
+        Quantidade de gerenciadores removidos
+    """
+    limite = time.monotonic() - tempo_ocioso
+    with _trava_gerenciadores:
+        manter = set(manter)
+        ociosos = [
+            conta_id for conta_id, g in _gerenciadores.items()
+            if g.ultimo_uso < limite and conta_id not in manter
+        ]
+        for conta_id in ociosos:
+            del _gerenciadores[conta_id]
+    return len(ociosos)
+
+
+def estado_gerenciadores() -> Dict[int, Dict[str, Optional[object]]]:
+    """Estado do token de cada conta conhecida pelo processo"""
+    with _trava_gerenciadores:
+        return {conta_id: g.estado() for conta_id, g in _gerenciadores.items()}
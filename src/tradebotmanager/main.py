@@ -1,13 +1,137 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+import env_variables
+from database import aquecer_pool_async, fabrica_sessoes_async, liberar_engines_async
+from instrumentacao_banco import escopo_consultas
+from metricas import registro_metricas
+from roteamento_banco import verificar_replicas_periodicamente
+from .integracao.option_market import metricas as metricas_option_market  # noqa: F401 (registra os coletores)
+from .integracao.option_market.limitador import limitador_requisicoes
+from .integracao.option_market.registro import registro_clientes
+from .saude import MonitorSaude, monitor_saude, sonda_corretora
+
+
+logger = logging.getLogger("tradebotmanager")
+
+# Intervalo entre limpezas dos clientes ociosos do registro da corretora
+INTERVALO_LIMPEZA_REGISTRO_S = 60
+
+
+async def limpar_registro_periodicamente(intervalo: float = INTERVALO_LIMPEZA_REGISTRO_S) -> None:
+    """
+    Remove do registro os clientes ociosos e do limitador os baldes das
+    contas ociosas a cada `intervalo` segundos, até ser cancelada
+    """
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            removidos = await asyncio.to_thread(registro_clientes.limpar_ociosos)
+            if removidos:
+                logger.info("Registro de clientes: %d ociosos removidos", removidos)
+            limitador_requisicoes.limpar_ociosos()
+        except Exception:
+            logger.exception("Falha ao limpar os clientes ociosos do registro")
+
+
+async def aquecer_clientes_contas() -> None:
+    """
+    Cria e autentica no registro os clientes das contas com bots ativos (até
+    o tamanho do registro), para que as primeiras operações delas não paguem
+    o login. Roda em segundo plano: os logins não atrasam a subida.
+    """
+    # Importados aqui: os models e repositories não pesam no import da aplicação
+    from .bots_usuarios_op_mkt.model import BotUsuarioOpMkt  # noqa: F401
+    from .bots_option_market.model import BotOptionMarket  # noqa: F401
+    from .corretoras.model import Corretora  # noqa: F401
+    from .usuarios.model import Usuario  # noqa: F401
+    from .corretoras_usuarios.repository_async import CorretoraUsuarioRepositoryAsync
+
+    try:
+        async with fabrica_sessoes_async()() as sessao:
+            contas = await CorretoraUsuarioRepositoryAsync(sessao).listar_com_bots_ativos(
+                limite=registro_clientes.max_clientes
+            )
+        prontos = await asyncio.to_thread(registro_clientes.aquecer, contas)
+        logger.info("Registro de clientes: %d de %d contas com bots ativos prontas", prontos, len(contas))
+    except Exception as erro:
+        logger.warning("Falha ao aquecer os clientes das contas: %s", erro)
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """
+    Aquece o pool do banco e carrega o cliente da corretora antes das
+    primeiras requisições; em segundo plano, autentica as contas com bots
+    ativos, limpa periodicamente os clientes ociosos e mede o atraso das
+    réplicas. No desligamento libera os recursos compartilhados.
+    Uma falha no aquecimento não impede a subida: a conexão é tentada de novo
+    na primeira requisição.
+    """
+    resultados = await asyncio.gather(
+        aquecer_pool_async(),
+        asyncio.to_thread(registro_clientes.aquecer),
+        return_exceptions=True,
+    )
+    for etapa, resultado in zip(("pool do banco", "cliente da corretora"), resultados):
+        if isinstance(resultado, Exception):
+            logger.warning("Falha ao aquecer o %s: %s", etapa, resultado)
+    monitor_saude.iniciar()
+    tarefas = [
+        asyncio.create_task(aquecer_clientes_contas(), name="aquecimento_clientes"),
+        asyncio.create_task(limpar_registro_periodicamente(), name="limpeza_registro"),
+        # Atraso das réplicas medido aqui; o roteamento das sessões só lê a última medição
+        asyncio.create_task(
+            verificar_replicas_periodicamente(env_variables.DB_REPLICA_VERIFICACAO_S), name="verificacao_replicas"
+        ),
+    ]
+
+    yield
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await asyncio.gather(*tarefas, return_exceptions=True)
+    await monitor_saude.parar()
+    await sonda_corretora.fechar()
+    registro_clientes.fechar_todos()
+    await liberar_engines_async()
+
 
 app = FastAPI(
     title="TradeBotManager",
     description="Sistema de Gerenciamento de Bots de Trading",
     version="0.1.0",
+    lifespan=ciclo_de_vida,
 )
 
 
+@app.middleware("http")
+async def medir_consultas(request: Request, call_next):
+    """Agrupa os comandos SQL de cada requisição para detectar N+1"""
+    with escopo_consultas(f"{request.method} {request.url.path}"):
+        return await call_next(request)
+
+
 @app.head("/health")
 async def obter_status():
     """Endpoint HEAD para verificar status da API - compatível com UptimeRobot free"""
     return {"status": "ativo", "versao": "0.1.0"}
+
+
+@app.api_route("/health/deep", methods=["GET", "HEAD"])
+async def obter_saude_detalhada():
+    """
+    Estado do banco, da corretora, do disjuntor e dos tokens, lido das
+    verificações feitas em segundo plano (não consulta nada na hora).
+    503 quando uma dependência crítica falha ou ainda não foi verificada.
+    """
+    relatorio = monitor_saude.relatorio()
+    codigo = 200 if relatorio["status"] in (MonitorSaude.OK, MonitorSaude.DEGRADADO) else 503
+    return JSONResponse(relatorio, status_code=codigo)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def obter_metricas():
+    """Métricas da aplicação no formato texto do Prometheus"""
+    return PlainTextResponse(registro_metricas.gerar_texto(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,164 @@
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Amostra coletada sob demanda: (rótulos, valor)
+Amostra = Tuple[Dict[str, str], float]
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    """Formata rótulos no padrão Prometheus: {a="1",b="2"}"""
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _escapar(valor: object) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Contador:
+    """Contador monotônico com rótulos"""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._trava = threading.Lock()
+
+    def incrementar(self, *valores_rotulos: str, valor: float = 1) -> None:
+        """Soma `valor` à série dos rótulos informados (na ordem de `rotulos`)"""
+        with self._trava:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0) + valor
+
+    def valores(self) -> Dict[Tuple[str, ...], float]:
+        """Cópia das séries atuais"""
+        with self._trava:
+            return dict(self._valores)
+
+    def linhas(self) -> List[str]:
+        return [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {valor}"
+            for chave, valor in self.valores().items()
+        ]
+
+
+class Histograma:
+    """Histograma com buckets fixos e rótulos"""
+
+    tipo = "histogram"
+
+    # Buckets em segundos, adequados para latência de chamadas HTTP e de banco
+    BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> [contagem por bucket..., soma, total]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._trava = threading.Lock()
+
+    def observar(self, valor: float, *valores_rotulos: str) -> None:
+        """Registra uma observação na série dos rótulos informados"""
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._trava:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [0] * (len(self.buckets) + 2)
+            if indice < len(self.buckets):
+                serie[indice] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def linhas(self) -> List[str]:
+        with self._trava:
+            series = {chave: list(serie) for chave, serie in self._series.items()}
+
+        linhas = []
+        for chave, serie in series.items():
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, serie):
+                acumulado += contagem
+                le = f'le="{limite}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, le)} {acumulado}")
+            le = 'le="+Inf"'
+            linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, le)} {serie[-1]}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {serie[-2]}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {serie[-1]}")
+        return linhas
+
+
+class RegistroMetricas:
+    """
+    Registro das métricas da aplicação, exportadas em formato texto do Prometheus.
+
+    Contadores e histogramas são atualizados no caminho da requisição (uma
+    trava curta por observação). Valores que já existem em outros objetos
+    (ex: estado do circuit breaker, pool do banco) são lidos por coletores
+    apenas quando /metrics é consultado.
+    """
+
+    def __init__(self):
+        self._metricas: Dict[str, object] = {}
+        # nome -> (tipo, ajuda, função que devolve as amostras)
+        self._coletores: Dict[str, Tuple[str, str, Callable[[], Iterable[Amostra]]]] = {}
+        self._trava = threading.Lock()
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        """Cria (ou retorna o já criado) contador"""
+        return self._registrar(Contador(nome, ajuda, rotulos))
+
+    def histograma(self, nome: str, ajuda: str, rotulos: Sequence[str] = (), buckets: Sequence[float] = Histograma.BUCKETS_PADRAO) -> Histograma:
+        """Cria (ou retorna o já criado) histograma"""
+        return self._registrar(Histograma(nome, ajuda, rotulos, buckets))
+
+    def coletor(self, nome: str, tipo: str, ajuda: str, coletar: Callable[[], Iterable[Amostra]]) -> None:
+        """
+        Registra uma métrica lida sob demanda
+
+        Args:
+            nome: Nome da família de métricas
+            tipo: gauge ou counter
+            ajuda: Descrição da métrica
+            coletar: Função que devolve as amostras (rótulos, valor) da métrica
+        """
+        with self._trava:
+            self._coletores[nome] = (tipo, ajuda, coletar)
+
+    def gerar_texto(self) -> str:
+        """Todas as métricas no formato texto do Prometheus"""
+        with self._trava:
+            metricas = list(self._metricas.values())
+            coletores = list(self._coletores.items())
+
+        linhas: List[str] = []
+        for metrica in metricas:
+            linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica.linhas())
+
+        for nome, (tipo, ajuda, coletar) in coletores:
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for rotulos, valor in coletar():
+                linhas.append(f"{nome}{_formatar_rotulos(list(rotulos), list(rotulos.values()))} {float(valor)}")
+
+        return "\n".join(linhas) + "\n"
+
+    def _registrar(self, metrica):
+        with self._trava:
+            existente = self._metricas.get(metrica.nome)
+            if existente is not None:
+                return existente
+            self._metricas[metrica.nome] = metrica
+            return metrica
+
+
+# Registro único do processo, exposto em /metrics
+registro_metricas = RegistroMetricas()
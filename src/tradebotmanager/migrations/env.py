@@ -0,0 +1,44 @@
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from env_variables import DATABASE_URL
+from database import ModelBase
+
+# Importar todos os models para registrar as tabelas (autogenerate compara com o metadata)
+from usuarios.model import Usuario  # noqa: F401
+from corretoras.model import Corretora  # noqa: F401
+from corretoras_usuarios.model import CorretoraUsuario  # noqa: F401
+from bots_option_market.model import BotOptionMarket  # noqa: F401
+from bots_usuarios_op_mkt.model import BotUsuarioOpMkt  # noqa: F401
+from bots_usuarios_op_mkt.resumo import ResumoSeguidoresBot  # noqa: F401
+
+target_metadata = ModelBase.metadata
+
+
+def rodar_offline() -> None:
+    """Gera o SQL das migrations sem conectar (alembic upgrade --sql)"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def rodar_online() -> None:
+    """Aplica as migrations no banco de DATABASE_URL"""
+    # Engine própria, sem pool e sem o statement_timeout da aplicação:
+    # criar índice em tabela grande pode passar do limite das requisições
+    engine = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+    with engine.connect() as conexao:
+        context.configure(connection=conexao, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    rodar_offline()
+else:
+    rodar_online()
@@ -0,0 +1,95 @@
+"""Esquema inicial, como era criado pelo create_all do teste.py
+
+Bancos que já existem foram criados assim; basta marcá-los com
+`alembic stamp 0001_esquema_inicial` antes do primeiro upgrade.
+
+Revision ID: 0001_esquema_inicial
+Revises:
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001_esquema_inicial"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "usuarios",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(length=100), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("senha", sa.String(length=255), nullable=False),
+        sa.Column("tipo", sa.Enum("ADMIN", "USUARIO", name="tipousuario"), nullable=False),
+        sa.Column("ativo", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_usuarios_id", "usuarios", ["id"])
+    op.create_index("ix_usuarios_email", "usuarios", ["email"], unique=True)
+
+    op.create_table(
+        "corretoras",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(length=100), nullable=False),
+        sa.Column("ativo", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_corretoras_id", "corretoras", ["id"])
+
+    op.create_table(
+        "corretoras_usuarios",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("corretora_id", sa.Integer(), nullable=False),
+        sa.Column("login", sa.String(length=100), nullable=False),
+        sa.Column("senha", sa.String(length=255), nullable=False),
+        sa.Column("token_jwt", sa.String(length=500), nullable=True),
+        sa.Column("api_token", sa.String(length=255), nullable=True),
+        sa.Column("ativo", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"]),
+        sa.ForeignKeyConstraint(["corretora_id"], ["corretoras.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_corretoras_usuarios_id", "corretoras_usuarios", ["id"])
+
+    op.create_table(
+        "bots_option_market",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("id_perfil", sa.String(length=100), nullable=True),
+        sa.Column("nome", sa.String(length=100), nullable=False),
+        sa.Column("descricao", sa.String(length=500), nullable=True),
+        sa.Column("ativo", sa.Boolean(), nullable=False),
+        sa.Column("corretora_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["corretora_id"], ["corretoras.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_bots_option_market_id", "bots_option_market", ["id"])
+    op.create_index("ix_bots_option_market_id_perfil", "bots_option_market", ["id_perfil"])
+
+    op.create_table(
+        "bots_usuarios_op_mkt",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("bot_option_market_id", sa.Integer(), nullable=False),
+        sa.Column("copy_trade_id", sa.String(length=100), nullable=True),
+        sa.Column("ativo", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"]),
+        sa.ForeignKeyConstraint(["bot_option_market_id"], ["bots_option_market.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_bots_usuarios_op_mkt_id", "bots_usuarios_op_mkt", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("bots_usuarios_op_mkt")
+    op.drop_table("bots_option_market")
+    op.drop_table("corretoras_usuarios")
+    op.drop_table("corretoras")
+    op.drop_table("usuarios")
+    sa.Enum(name="tipousuario").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,79 @@
+"""Índices compostos, parciais e únicos das consultas dos repositories
+
+Os índices são criados com CREATE INDEX CONCURRENTLY, fora de transação, para
+não travar escrita nas tabelas em produção. Os únicos falham se já houver
+duplicatas; nesse caso, resolva os registros repetidos e rode de novo. O de
+copy_trade_id ignora os vazios ("" de registros antigos), que podem se repetir.
+
+Um CREATE INDEX CONCURRENTLY interrompido deixa o índice criado mas inválido
+(pg_index.indisvalid = false): o IF NOT EXISTS o pularia e ele nunca seria
+usado. Por isso o upgrade remove os índices inválidos antes de criá-los, o que
+o deixa retomável.
+
+Revision ID: 0002_indices_consultas
+Revises: 0001_esquema_inicial
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0002_indices_consultas"
+down_revision: Union[str, None] = "0001_esquema_inicial"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, tabela, colunas, único, predicado do índice parcial); espelha os __table_args__ dos models
+INDICES = [
+    ("ix_bots_usuarios_op_mkt_usuario_bot", "bots_usuarios_op_mkt", ["usuario_id", "bot_option_market_id"], False, None),
+    ("ix_bots_usuarios_op_mkt_bot_ativo", "bots_usuarios_op_mkt", ["bot_option_market_id"], False, "ativo"),
+    (
+        "uq_bots_usuarios_op_mkt_copy_trade_id",
+        "bots_usuarios_op_mkt",
+        ["copy_trade_id"],
+        True,
+        "copy_trade_id IS NOT NULL AND copy_trade_id <> ''",
+    ),
+    ("uq_corretoras_usuarios_usuario_corretora", "corretoras_usuarios", ["usuario_id", "corretora_id"], True, None),
+    ("uq_corretoras_usuarios_corretora_login", "corretoras_usuarios", ["corretora_id", "login"], True, None),
+    ("ix_corretoras_usuarios_corretora_ativo", "corretoras_usuarios", ["corretora_id"], False, "ativo"),
+    ("ix_bots_option_market_corretora", "bots_option_market", ["corretora_id"], False, None),
+]
+
+
+def indice_invalido(nome: str) -> bool:
+    """True se o índice existe no schema atual mas ficou inválido (build concorrente interrompido)"""
+    return bool(op.get_bind().scalar(
+        sa.text(
+            "SELECT NOT i.indisvalid FROM pg_index i"
+            " JOIN pg_class c ON c.oid = i.indexrelid"
+            " JOIN pg_namespace n ON n.oid = c.relnamespace"
+            " WHERE c.relname = :nome AND n.nspname = current_schema()"
+        ),
+        {"nome": nome},
+    ))
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, unico, predicado in INDICES:
+            # Em modo offline (--sql) não há conexão para consultar o catálogo
+            if not context.is_offline_mode() and indice_invalido(nome):
+                op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
+            op.create_index(
+                nome,
+                tabela,
+                colunas,
+                unique=unico,
+                postgresql_where=sa.text(predicado) if predicado else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
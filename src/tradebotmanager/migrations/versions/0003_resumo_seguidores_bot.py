@@ -0,0 +1,82 @@
+"""Tabela resumo_seguidores_bot, mantida por triggers nas associações
+
+Guarda por bot a quantidade de seguidores ativos e inativos. Cada INSERT,
+DELETE ou mudança de ativo/bot em bots_usuarios_op_mkt soma ou subtrai 1
+na linha do bot, então os painéis leem a contagem sem varrer as associações.
+A carga inicial roda na mesma transação das triggers, com as associações
+bloqueadas para escrita, para não perder mudanças concorrentes.
+
+Revision ID: 0003_resumo_seguidores_bot
+Revises: 0002_indices_consultas
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003_resumo_seguidores_bot"
+down_revision: Union[str, None] = "0002_indices_consultas"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "resumo_seguidores_bot",
+        sa.Column("bot_option_market_id", sa.Integer(), nullable=False),
+        sa.Column("ativos", sa.Integer(), nullable=False),
+        sa.Column("inativos", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["bot_option_market_id"], ["bots_option_market.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("bot_option_market_id"),
+    )
+
+    op.execute("LOCK TABLE bots_usuarios_op_mkt IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION atualizar_resumo_seguidores_bot() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE resumo_seguidores_bot
+                   SET ativos = ativos - CASE WHEN OLD.ativo THEN 1 ELSE 0 END,
+                       inativos = inativos - CASE WHEN OLD.ativo THEN 0 ELSE 1 END
+                 WHERE bot_option_market_id = OLD.bot_option_market_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO resumo_seguidores_bot (bot_option_market_id, ativos, inativos)
+                VALUES (NEW.bot_option_market_id, CASE WHEN NEW.ativo THEN 1 ELSE 0 END, CASE WHEN NEW.ativo THEN 0 ELSE 1 END)
+                ON CONFLICT (bot_option_market_id) DO UPDATE
+                   SET ativos = resumo_seguidores_bot.ativos + EXCLUDED.ativos,
+                       inativos = resumo_seguidores_bot.inativos + EXCLUDED.inativos;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tg_resumo_seguidores_bot_inclusao_exclusao
+        AFTER INSERT OR DELETE ON bots_usuarios_op_mkt
+        FOR EACH ROW EXECUTE FUNCTION atualizar_resumo_seguidores_bot()
+    """)
+    op.execute("""
+        CREATE TRIGGER tg_resumo_seguidores_bot_alteracao
+        AFTER UPDATE OF ativo, bot_option_market_id ON bots_usuarios_op_mkt
+        FOR EACH ROW
+        WHEN (OLD.ativo IS DISTINCT FROM NEW.ativo OR OLD.bot_option_market_id IS DISTINCT FROM NEW.bot_option_market_id)
+        EXECUTE FUNCTION atualizar_resumo_seguidores_bot()
+    """)
+    op.execute("""
+        INSERT INTO resumo_seguidores_bot (bot_option_market_id, ativos, inativos)
+        SELECT bot_option_market_id,
+               count(*) FILTER (WHERE ativo),
+               count(*) FILTER (WHERE NOT ativo)
+          FROM bots_usuarios_op_mkt
+         GROUP BY bot_option_market_id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS tg_resumo_seguidores_bot_alteracao ON bots_usuarios_op_mkt")
+    op.execute("DROP TRIGGER IF EXISTS tg_resumo_seguidores_bot_inclusao_exclusao ON bots_usuarios_op_mkt")
+    op.execute("DROP FUNCTION IF EXISTS atualizar_resumo_seguidores_bot()")
+    op.drop_table("resumo_seguidores_bot")
@@ -0,0 +1,309 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from sqlalchemy import insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from unidade_trabalho import confirmar, desfazer, confirmar_async, desfazer_async
+
+# Linhas por comando; lotes maiores são divididos em vários comandos na mesma transação
+TAMANHO_LOTE_PADRAO = 500
+
+
+def fatiar(itens: Sequence[Any], tamanho: int) -> Iterator[Sequence[Any]]:
+    """Divide os itens em fatias de no máximo `tamanho`"""
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def valores_colunas(objeto: Any) -> Dict[str, Any]:
+    """Colunas preenchidas de um objeto ainda não salvo, no formato aceito por insert()"""
+    valores = {}
+    for atributo in inspect(type(objeto)).column_attrs:
+        valor = getattr(objeto, atributo.key)
+        # Ausente = default da coluna (ex: id gerado, ativo=True)
+        if valor is not None:
+            valores[atributo.key] = valor
+    return valores
+
+
+@contextmanager
+def _sem_expirar(sessao: Session) -> Iterator[None]:
+    """
+    Mantém os objetos retornados legíveis após o commit; sem isso cada
+    objeto do lote faria um SELECT próprio no primeiro acesso
+    """
+    expirar = sessao.expire_on_commit
+    sessao.expire_on_commit = False
+    try:
+        yield
+    finally:
+        sessao.expire_on_commit = expirar
+
+
+def criar_em_lote(sessao: Session, objetos: List[Any], tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> List[Any]:
+    """
+    Insere os objetos com INSERT em lote (executemany) e RETURNING, em uma transação
+
+    Args:
+        sessao: Sessão do banco
+        objetos: Objetos novos de um mesmo model
+        tamanho_lote: Linhas por comando INSERT
+
+    Returns:
+        Os registros criados, já com id, na ordem dos objetos
+    """
+    if not objetos:
+        return []
+
+    modelo = type(objetos[0])
+    criados: List[Any] = []
+    try:
+        for fatia in fatiar(objetos, tamanho_lote):
+            criados.extend(sessao.scalars(
+                insert(modelo).returning(modelo, sort_by_parameter_order=True),
+                [valores_colunas(objeto) for objeto in fatia],
+            ))
+        with _sem_expirar(sessao):
+            confirmar(sessao)
+    except Exception:
+        desfazer(sessao)
+        raise
+    return criados
+
+
+def atualizar_em_lote(
+    sessao: Session,
+    modelo: type,
+    alteracoes: List[Dict[str, Any]],
+    tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+) -> int:
+    """
+    Atualiza várias linhas pela chave primária com UPDATE em lote (executemany), em uma transação
+
+    Args:
+        sessao: Sessão do banco
+        modelo: Model das linhas
+        alteracoes: Um dicionário por linha, com "id" e as colunas a alterar
+        tamanho_lote: Linhas por comando UPDATE
+
+    Returns:
+        Quantidade de linhas enviadas
+    """
+    if not alteracoes:
+        return 0
+
+    try:
+        for fatia in fatiar(alteracoes, tamanho_lote):
+            sessao.execute(update(modelo), list(fatia))
+        confirmar(sessao)
+    except Exception:
+        desfazer(sessao)
+        raise
+    return len(alteracoes)
+
+
+def definir_ativo_em_lote(
+    sessao: Session,
+    modelo: type,
+    ids: Iterable[int],
+    ativo: bool,
+    tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+) -> List[int]:
+    """
+    Ativa ou desativa várias linhas com UPDATE ... WHERE id IN (...) RETURNING id, em uma transação.
+    Linhas que já estão no estado pedido não são reescritas.
+
+    Args:
+        sessao: Sessão do banco
+        modelo: Model com as colunas id e ativo
+        ids: IDs das linhas
+        ativo: Novo valor de ativo
+        tamanho_lote: IDs por comando UPDATE
+
+    Returns:
+        IDs que mudaram de estado
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+
+    alterados: List[int] = []
+    try:
+        for fatia in fatiar(ids, tamanho_lote):
+            alterados.extend(sessao.scalars(
+                update(modelo)
+                .where(modelo.id.in_(fatia), modelo.ativo.is_not(ativo))
+                .values(ativo=ativo)
+                .returning(modelo.id)
+                .execution_options(synchronize_session=False)
+            ))
+        confirmar(sessao)
+    except Exception:
+        desfazer(sessao)
+        raise
+    return alterados
+
+
+def colunas_alteraveis(modelo: type, dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Mantém só as colunas do model (sem a chave primária); demais chaves são ignoradas"""
+    colunas = {atributo.key for atributo in inspect(modelo).column_attrs}
+    return {campo: valor for campo, valor in dados.items() if campo in colunas and campo != "id"}
+
+
+def definir_ativo(sessao: Session, modelo: type, registro_id: int, ativo: bool) -> bool:
+    """
+    Ativa ou desativa uma linha com um único UPDATE ... WHERE id = ... RETURNING id
+
+    Args:
+        sessao: Sessão do banco
+        modelo: Model com as colunas id e ativo
+        registro_id: ID da linha
+        ativo: Novo valor de ativo
+
+    Returns:
+        False se a linha não existe
+    """
+    alterado = sessao.scalar(
+        update(modelo).where(modelo.id == registro_id).values(ativo=ativo).returning(modelo.id)
+    )
+    if alterado is None:
+        return False
+    confirmar(sessao)
+    return True
+
+
+def atualizar_por_id(sessao: Session, modelo: type, registro_id: int, dados: Dict[str, Any]) -> Optional[Any]:
+    """
+    Atualiza uma linha com um único UPDATE ... WHERE id = ... RETURNING, sem SELECT antes nem refresh depois
+
+    Args:
+        sessao: Sessão do banco
+        modelo: Model da linha
+        registro_id: ID da linha
+        dados: Colunas a alterar; chaves que não são colunas do model são ignoradas.
+            Sem nenhuma coluna a alterar, a linha só é lida (SELECT, sem commit)
+
+    Returns:
+        O registro atualizado, ou None se a linha não existe
+    """
+    valores = colunas_alteraveis(modelo, dados)
+    if not valores:
+        # Nada a alterar: só lê a linha. Um UPDATE sem efeito ainda travaria a
+        # linha, deixaria uma versão morta e dispararia os triggers da tabela
+        return sessao.scalar(
+            select(modelo).where(modelo.id == registro_id).execution_options(populate_existing=True)
+        )
+    registro = sessao.scalar(
+        update(modelo)
+        .where(modelo.id == registro_id)
+        .values(**valores)
+        .returning(modelo)
+        .execution_options(populate_existing=True)
+    )
+    if registro is None:
+        return None
+    with _sem_expirar(sessao):
+        confirmar(sessao)
+    return registro
+
+
+async def criar_em_lote_async(sessao: AsyncSession, objetos: List[Any], tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> List[Any]:
+    """Versão assíncrona de criar_em_lote()"""
+    if not objetos:
+        return []
+
+    modelo = type(objetos[0])
+    criados: List[Any] = []
+    try:
+        for fatia in fatiar(objetos, tamanho_lote):
+            criados.extend(await sessao.scalars(
+                insert(modelo).returning(modelo, sort_by_parameter_order=True),
+                [valores_colunas(objeto) for objeto in fatia],
+            ))
+        with _sem_expirar(sessao.sync_session):
+            await confirmar_async(sessao)
+    except Exception:
+        await desfazer_async(sessao)
+        raise
+    return criados
+
+
+async def atualizar_em_lote_async(
+    sessao: AsyncSession,
+    modelo: type,
+    alteracoes: List[Dict[str, Any]],
+    tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+) -> int:
+    """Versão assíncrona de atualizar_em_lote()"""
+    if not alteracoes:
+        return 0
+
+    try:
+        for fatia in fatiar(alteracoes, tamanho_lote):
+            await sessao.execute(update(modelo), list(fatia))
+        await confirmar_async(sessao)
+    except Exception:
+        await desfazer_async(sessao)
+        raise
+    return len(alteracoes)
+
+
+async def definir_ativo_em_lote_async(
+    sessao: AsyncSession,
+    modelo: type,
+    ids: Iterable[int],
+    ativo: bool,
+    tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+) -> List[int]:
+    """Versão assíncrona de definir_ativo_em_lote()"""
+    ids = list(ids)
+    if not ids:
+        return []
+
+    alterados: List[int] = []
+    try:
+        for fatia in fatiar(ids, tamanho_lote):
+            alterados.extend(await sessao.scalars(
+                update(modelo)
+                .where(modelo.id.in_(fatia), modelo.ativo.is_not(ativo))
+                .values(ativo=ativo)
+                .returning(modelo.id)
+                .execution_options(synchronize_session=False)
+            ))
+        await confirmar_async(sessao)
+    except Exception:
+        await desfazer_async(sessao)
+        raise
+    return alterados
+
+
+async def definir_ativo_async(sessao: AsyncSession, modelo: type, registro_id: int, ativo: bool) -> bool:
+    """Versão assíncrona de definir_ativo()"""
+    alterado = await sessao.scalar(
+        update(modelo).where(modelo.id == registro_id).values(ativo=ativo).returning(modelo.id)
+    )
+    if alterado is None:
+        return False
+    await confirmar_async(sessao)
+    return True
+
+
+async def atualizar_por_id_async(sessao: AsyncSession, modelo: type, registro_id: int, dados: Dict[str, Any]) -> Optional[Any]:
+    """Versão assíncrona de atualizar_por_id()"""
+    valores = colunas_alteraveis(modelo, dados)
+    if not valores:
+        return await sessao.scalar(
+            select(modelo).where(modelo.id == registro_id).execution_options(populate_existing=True)
+        )
+    registro = await sessao.scalar(
+        update(modelo)
+        .where(modelo.id == registro_id)
+        .values(**valores)
+        .returning(modelo)
+        .execution_options(populate_existing=True)
+    )
+    if registro is None:
+        return None
+    with _sem_expirar(sessao.sync_session):
+        await confirmar_async(sessao)
+    return registro
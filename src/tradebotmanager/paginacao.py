@@ -0,0 +1,83 @@
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from instrumentacao_banco import metodo_atual
+
+# Linhas buscadas por vez do cursor no servidor ao percorrer um resultado
+TAMANHO_LOTE_STREAM = 1000
+
+
+def paginar(consulta, modelo: type, apos_id: Optional[int] = None, limite: Optional[int] = None):
+    """
+    Paginação por chave (keyset) no id: WHERE id > apos_id ORDER BY id LIMIT limite.
+    Cada página custa o mesmo, qualquer que seja a posição (sem OFFSET).
+
+    Args:
+        consulta: Query (sessao.query) ou select()
+        modelo: Model cujo id ordena a paginação
+        apos_id: Último id da página anterior (proximo_cursor); None = primeira página
+        limite: Itens por página; None junto com apos_id None mantém a consulta sem paginação
+    """
+    if apos_id is None and limite is None:
+        return consulta
+
+    if apos_id is not None:
+        consulta = consulta.where(modelo.id > apos_id)
+    consulta = consulta.order_by(modelo.id)
+    return consulta.limit(limite) if limite is not None else consulta
+
+
+def proximo_cursor(itens: List[Any], limite: Optional[int]) -> Optional[int]:
+    """apos_id da página seguinte, ou None se esta foi a última"""
+    if limite is None or len(itens) < limite:
+        return None
+    return itens[-1].id
+
+
+def iterar(sessao: Session, consulta, objetos: bool = True, tamanho_lote: int = TAMANHO_LOTE_STREAM) -> Iterator[Any]:
+    """
+    Percorre o resultado em lotes, com cursor no servidor (yield_per): a memória
+    fica limitada ao lote e a primeira linha chega sem esperar o resultado inteiro.
+    A sessão fica ocupada até o fim da iteração.
+
+    Args:
+        sessao: Sessão do banco
+        consulta: select() de um model ou de colunas
+        objetos: True para select(Model) (devolve objetos); False para select(colunas) (devolve linhas)
+        tamanho_lote: Linhas buscadas por vez
+    """
+    # O comando só é executado na primeira leitura, quando o método de repository
+    # que pediu a iteração já retornou; o rótulo dele vai junto (métricas e roteamento)
+    rotulo = metodo_atual.get()
+
+    def linhas() -> Iterator[Any]:
+        token = metodo_atual.set(rotulo)
+        try:
+            resultado = sessao.execute(consulta, execution_options={"yield_per": tamanho_lote})
+        finally:
+            metodo_atual.reset(token)
+        try:
+            yield from (resultado.scalars() if objetos else resultado)
+        finally:
+            resultado.close()
+
+    return linhas()
+
+
+def iterar_async(sessao: AsyncSession, consulta, objetos: bool = True, tamanho_lote: int = TAMANHO_LOTE_STREAM) -> AsyncIterator[Any]:
+    """Versão assíncrona de iterar(), para uso com async for"""
+    rotulo = metodo_atual.get()
+
+    async def linhas() -> AsyncIterator[Any]:
+        token = metodo_atual.set(rotulo)
+        try:
+            resultado = await sessao.stream(consulta, execution_options={"yield_per": tamanho_lote})
+        finally:
+            metodo_atual.reset(token)
+        try:
+            async for item in (resultado.scalars() if objetos else resultado):
+                yield item
+        finally:
+            await resultado.close()
+
+    return linhas()
@@ -0,0 +1,251 @@
+import logging
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.exc import TimeoutError as TimeoutPool
+import env_variables
+from instrumentacao_banco import instrumentar_comandos
+from metricas import registro_metricas
+
+espera_pool = registro_metricas.histograma(
+    "banco_pool_espera_segundos",
+    "Tempo esperando uma conexão livre no pool",
+    ("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+timeouts_pool = registro_metricas.contador(
+    "banco_pool_timeouts_total",
+    "Pedidos de conexão que estouraram o pool_timeout",
+    ("engine",),
+)
+
+# nome -> engine síncrona (para a assíncrona, a sync_engine), lidas pelos coletores
+_engines: Dict[str, Engine] = {}
+
+logger = logging.getLogger("tradebotmanager.sql")
+
+
+def nome_prepared_statement() -> str:
+    """
+    Nome único para os prepared statements do asyncpg atrás do PgBouncer: os
+    nomes sequenciais padrão colidem quando conexões de clientes diferentes
+    passam pela mesma conexão do servidor
+    """
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+class MedicaoPool:
+    """Mede o tempo de espera por conexão do pool, separando pressão no banco de pressão na aplicação"""
+
+    nome_engine = "sync"
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutPool:
+            timeouts_pool.incrementar(self.nome_engine)
+            raise
+        finally:
+            espera_pool.observar(time.perf_counter() - inicio, self.nome_engine)
+
+
+class PoolMedido(MedicaoPool, QueuePool):
+    nome_engine = "sync"
+
+
+class PoolMedidoAsync(MedicaoPool, AsyncAdaptedQueuePool):
+    nome_engine = "async"
+
+
+class PerfilBanco:
+    """
+    Configuração das engines do banco, lida de env_variables.
+
+    - Pool dimensionado (pool_size, max_overflow, pool_timeout, pool_recycle)
+      e pre-ping na engine
+    - statement_timeout no servidor, enviado na abertura da conexão (só Postgres)
+    - Modo PgBouncer (pool em transação): não envia parâmetros de inicialização
+      nem usa prepared statements do asyncpg; o statement_timeout é aplicado com
+      SET LOCAL no início de cada transação
+    - Log de SQL: desligado, só lentas, por amostragem ou tudo; nunca echo=True
+    """
+
+    LOG_DESLIGADO = "desligado"
+    LOG_LENTO = "lento"
+    LOG_AMOSTRA = "amostra"
+    LOG_TUDO = "tudo"
+
+    def __init__(
+        self,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+        statement_timeout_ms: int = 30000,
+        pgbouncer: bool = False,
+        log_sql: str = LOG_LENTO,
+        log_sql_lento_ms: float = 500,
+        log_sql_amostra: float = 0.01,
+    ):
+        """
+        Args:
+            pool_size: Conexões mantidas abertas no pool
+            max_overflow: Conexões extras abertas sob pico
+            pool_timeout: Segundos esperando uma conexão livre antes de erro
+            pool_recycle: Segundos de vida de uma conexão antes de reabrir
+            pool_pre_ping: Testa a conexão ao retirar do pool
+            statement_timeout_ms: Limite de execução de cada comando no servidor (0 desativa)
+            pgbouncer: Conexão através do PgBouncer em modo transação
+            log_sql: desligado, lento, amostra ou tudo
+            log_sql_lento_ms: A partir de quantos ms um comando é logado no modo lento
+            log_sql_amostra: Fração de comandos logados no modo amostra
+        """
+        if log_sql not in (self.LOG_DESLIGADO, self.LOG_LENTO, self.LOG_AMOSTRA, self.LOG_TUDO):
+            raise ValueError(f"DB_LOG_SQL inválido: {log_sql}")
+
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping = pool_pre_ping
+        self.statement_timeout_ms = statement_timeout_ms
+        self.pgbouncer = pgbouncer
+        self.log_sql = log_sql
+        self.log_sql_lento_ms = log_sql_lento_ms
+        self.log_sql_amostra = log_sql_amostra
+
+    @classmethod
+    def do_ambiente(cls) -> "PerfilBanco":
+        """Perfil a partir das variáveis DB_* de env_variables"""
+        return cls(
+            pool_size=env_variables.DB_POOL_SIZE,
+            max_overflow=env_variables.DB_MAX_OVERFLOW,
+            pool_timeout=env_variables.DB_POOL_TIMEOUT,
+            pool_recycle=env_variables.DB_POOL_RECYCLE,
+            pool_pre_ping=env_variables.DB_POOL_PRE_PING,
+            statement_timeout_ms=env_variables.DB_STATEMENT_TIMEOUT_MS,
+            pgbouncer=env_variables.DB_PGBOUNCER,
+            log_sql=env_variables.DB_LOG_SQL,
+            log_sql_lento_ms=env_variables.DB_LOG_SQL_LENTO_MS,
+            log_sql_amostra=env_variables.DB_LOG_SQL_AMOSTRA,
+        )
+
+    def opcoes_engine(self, url: str, assincrona: bool = False) -> Dict[str, Any]:
+        """
+        Argumentos para create_engine (psycopg2) ou create_async_engine (asyncpg).
+        Os connect_args são do Postgres; outros bancos (SQLite nos testes) não os recebem.
+
+        Args:
+            url: URL do banco da engine
+            assincrona: True para a engine asyncpg
+        """
+        opcoes: Dict[str, Any] = {
+            "echo": False,
+            "poolclass": PoolMedidoAsync if assincrona else PoolMedido,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
+        if make_url(url).get_backend_name() != "postgresql":
+            return opcoes
+
+        if assincrona:
+            if self.pgbouncer:
+                # Prepared statements não sobrevivem à troca de conexão do PgBouncer
+                opcoes["connect_args"] = {
+                    "statement_cache_size": 0,
+                    "prepared_statement_cache_size": 0,
+                    "prepared_statement_name_func": nome_prepared_statement,
+                }
+            elif self.statement_timeout_ms:
+                opcoes["connect_args"] = {"server_settings": {"statement_timeout": str(self.statement_timeout_ms)}}
+        elif self.statement_timeout_ms and not self.pgbouncer:
+            opcoes["connect_args"] = {"options": f"-c statement_timeout={self.statement_timeout_ms}"}
+
+        return opcoes
+
+    def instrumentar(self, engine: Engine, nome: str) -> None:
+        """
+        Registra a engine nas métricas do pool, liga a medição e o log de SQL do
+        perfil e, no modo PgBouncer, o statement_timeout por transação
+
+        Args:
+            engine: Engine síncrona (para a assíncrona, engine_async.sync_engine)
+            nome: Rótulo da engine nas métricas (ex: sync, async)
+        """
+        _engines[nome] = engine
+        instrumentar_comandos(engine, nome, self._deve_logar)
+        if self.pgbouncer and self.statement_timeout_ms and engine.dialect.name == "postgresql":
+            self._limitar_transacoes(engine, nome)
+
+    def _limitar_transacoes(self, engine: Engine, nome: str) -> None:
+        """
+        Aplica o statement_timeout com SET LOCAL no início de cada transação.
+        Atrás do PgBouncer em modo transação a conexão do servidor muda a cada
+        transação, então o parâmetro da abertura não vale; o SET LOCAL morre com
+        a transação e não vaza para o próximo cliente da conexão.
+        """
+        comando = f"SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}"
+
+        @event.listens_for(engine, "begin")
+        def _ao_iniciar(conexao):
+            conexao.exec_driver_sql(comando)
+
+        logger.info("engine %s: statement_timeout de %d ms por transação (PgBouncer)", nome, self.statement_timeout_ms)
+
+    def _deve_logar(self, duracao_ms: float) -> bool:
+        if self.log_sql == self.LOG_DESLIGADO:
+            return False
+        if self.log_sql == self.LOG_TUDO:
+            return True
+        if self.log_sql == self.LOG_AMOSTRA:
+            return duracao_ms >= self.log_sql_lento_ms or random.random() < self.log_sql_amostra
+        return duracao_ms >= self.log_sql_lento_ms
+
+
+def estatisticas_pool() -> Dict[str, Dict[str, float]]:
+    """Conexões em uso, ociosas e saturação do pool de cada engine"""
+    estatisticas = {}
+    for nome, engine in _engines.items():
+        pool = engine.pool
+        capacidade = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+        em_uso = pool.checkedout()
+        estatisticas[nome] = {
+            "em_uso": em_uso,
+            "ociosas": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "capacidade": capacidade,
+            "saturacao": em_uso / capacidade if capacidade else 0.0,
+        }
+    return estatisticas
+
+
+def _amostras_conexoes() -> List:
+    return [
+        ({"engine": nome, "estado": estado}, valores[estado])
+        for nome, valores in estatisticas_pool().items()
+        for estado in ("em_uso", "ociosas", "overflow")
+    ]
+
+
+registro_metricas.coletor(
+    "banco_pool_conexoes",
+    "gauge",
+    "Conexões do pool por estado",
+    _amostras_conexoes,
+)
+registro_metricas.coletor(
+    "banco_pool_saturacao",
+    "gauge",
+    "Conexões em uso sobre a capacidade do pool (pool_size + max_overflow)",
+    lambda: [({"engine": nome}, valores["saturacao"]) for nome, valores in estatisticas_pool().items()],
+)
@@ -0,0 +1,59 @@
+from typing import Any, Optional, Sequence
+from sqlalchemy.orm import joinedload, selectinload
+from .bots_option_market.model import BotOptionMarket
+from .bots_usuarios_op_mkt.model import BotUsuarioOpMkt
+from .corretoras_usuarios.model import CorretoraUsuario
+from .usuarios.model import Usuario
+
+# Opções de carregamento (selectinload/joinedload) aplicadas a uma consulta.
+# Coleções usam selectinload (uma consulta extra por nível, sem duplicar linhas);
+# relacionamentos muitos-para-um usam joinedload (mesmo SELECT).
+PlanoCarga = Sequence[Any]
+
+
+def aplicar_plano(consulta, plano: Optional[PlanoCarga]):
+    """
+    Aplica o plano de carregamento a uma Query ou select()
+
+    Args:
+        consulta: Query (sessao.query) ou select()
+        plano: Opções de carregamento; None mantém o carregamento preguiçoso
+    """
+    return consulta.options(*plano) if plano else consulta
+
+
+# Usuario com as contas e a corretora de cada conta
+USUARIO_CONTAS: PlanoCarga = (
+    selectinload(Usuario.contas_corretoras).joinedload(CorretoraUsuario.corretora),
+)
+
+# Painel do usuário: contas, bots seguidos, bot e corretora de cada associação
+USUARIO_PAINEL: PlanoCarga = (
+    selectinload(Usuario.contas_corretoras).joinedload(CorretoraUsuario.corretora),
+    selectinload(Usuario.bots_option_market)
+    .joinedload(BotUsuarioOpMkt.bot_option_market)
+    .joinedload(BotOptionMarket.corretora),
+)
+
+# Conta com a corretora e o dono
+CONTA_PAINEL: PlanoCarga = (
+    joinedload(CorretoraUsuario.corretora),
+    joinedload(CorretoraUsuario.dono_conta),
+)
+
+# Associação com o bot
+ASSOCIACAO_BOT: PlanoCarga = (
+    joinedload(BotUsuarioOpMkt.bot_option_market),
+)
+
+# Painel de associações: usuário, bot e corretora do bot
+ASSOCIACAO_PAINEL: PlanoCarga = (
+    joinedload(BotUsuarioOpMkt.usuario),
+    joinedload(BotUsuarioOpMkt.bot_option_market).joinedload(BotOptionMarket.corretora),
+)
+
+# Painel do bot: corretora e seguidores com o respectivo usuário
+BOT_PAINEL: PlanoCarga = (
+    joinedload(BotOptionMarket.corretora),
+    selectinload(BotOptionMarket.usuarios).joinedload(BotUsuarioOpMkt.usuario),
+)
@@ -0,0 +1,251 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import Select, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from instrumentacao_banco import metodo_atual
+from metricas import registro_metricas
+from unidade_trabalho import unidade_atual
+
+logger = logging.getLogger("tradebotmanager.sql")
+
+# Métodos de repository que só leem e podem ir para uma réplica
+PREFIXOS_LEITURA = ("buscar_", "listar_", "iterar_")
+
+# Chave em sessao.info: a sessão já escreveu, então as leituras seguintes ficam na primária
+_ESCREVEU = "escreveu_na_primaria"
+
+# Opção de execução da consulta que a mantém na primária mesmo num método de
+# leitura, ex: select(...).execution_options(ler_da_primaria=True) para um
+# retrato do estado que será usado em escritas condicionais logo depois
+LER_DA_PRIMARIA = "ler_da_primaria"
+
+roteamentos = registro_metricas.contador(
+    "banco_roteamento_total",
+    "Comandos SELECT por destino (primária ou réplica)",
+    ("destino",),
+)
+
+# Atraso medido no PostgreSQL; 0 se a réplica já aplicou todo o WAL recebido
+_CONSULTA_ATRASO = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    """
+    Engine de uma réplica de leitura com a proteção contra atraso: o atraso
+    de replicação é medido em segundo plano (verificar_replicas_periodicamente)
+    a cada `intervalo_verificacao` segundos e, acima de `atraso_max`, a réplica
+    deixa de receber leituras até a próxima medição. O roteamento só lê a
+    última medição; sem medição recente (nunca medida, ou verificação parada
+    há mais de 3 intervalos) as leituras ficam na primária.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        engine: Engine,
+        atraso_max: float = 5,
+        intervalo_verificacao: float = 5,
+        engine_async: Optional[AsyncEngine] = None,
+    ):
+        """
+        Args:
+            nome: Rótulo da réplica em logs e métricas
+            engine: Engine síncrona (para a assíncrona, a sync_engine)
+            atraso_max: Segundos de atraso aceitos
+            intervalo_verificacao: Segundos entre medições do atraso
+            engine_async: Engine assíncrona da réplica, usada para medir sem threads
+        """
+        self.nome = nome
+        self.engine = engine
+        self.engine_async = engine_async
+        self.atraso_max = atraso_max
+        self.intervalo_verificacao = intervalo_verificacao
+        self.atraso: Optional[float] = None
+        self._medido_em = float("-inf")
+
+    def disponivel(self) -> bool:
+        """True se a última medição é recente e está dentro do limite; não acessa o banco"""
+        if time.monotonic() - self._medido_em > 3 * self.intervalo_verificacao:
+            return False
+        return self.atraso is not None and self.atraso <= self.atraso_max
+
+    def medir(self) -> None:
+        """Mede o atraso com a engine síncrona; bloqueia, chamar fora do event loop"""
+        self._registrar(self._medir_atraso())
+
+    async def medir_async(self) -> None:
+        """Mede o atraso sem bloquear o event loop, com no máximo `intervalo_verificacao` segundos"""
+        try:
+            if self.engine_async is not None:
+                atraso = await asyncio.wait_for(self._medir_atraso_async(), self.intervalo_verificacao)
+            else:
+                atraso = await asyncio.wait_for(asyncio.to_thread(self._medir_atraso), self.intervalo_verificacao)
+        except asyncio.TimeoutError:
+            logger.warning("Réplica %s sem resposta, leituras na primária", self.nome)
+            atraso = None
+        self._registrar(atraso)
+
+    def _registrar(self, atraso: Optional[float]) -> None:
+        self.atraso = atraso
+        self._medido_em = time.monotonic()
+
+    def _medir_atraso(self) -> Optional[float]:
+        # Outros bancos (ex: um arquivo SQLite nos testes locais) não têm atraso a medir
+        if self.engine.dialect.name != "postgresql":
+            return 0.0
+        try:
+            with self.engine.connect() as conexao:
+                return float(conexao.execute(_CONSULTA_ATRASO).scalar() or 0)
+        except Exception as erro:
+            logger.warning("Réplica %s indisponível, leituras na primária: %s", self.nome, erro)
+            return None
+
+    async def _medir_atraso_async(self) -> Optional[float]:
+        if self.engine.dialect.name != "postgresql":
+            return 0.0
+        try:
+            async with self.engine_async.connect() as conexao:
+                return float((await conexao.execute(_CONSULTA_ATRASO)).scalar() or 0)
+        except Exception as erro:
+            logger.warning("Réplica %s indisponível, leituras na primária: %s", self.nome, erro)
+            return None
+
+
+class SessaoRoteada(Session):
+    """
+    Sessão que manda as leituras dos métodos de repository buscar_*, listar_*
+    e iterar_* para uma réplica disponível e todo o resto para a primária.
+
+    Ficam na primária: escritas, SELECT ... FOR UPDATE, consultas marcadas com
+    LER_DA_PRIMARIA, qualquer comando dentro de uma unidade de trabalho e todas
+    as leituras de uma sessão que já escreveu (ler o que acabou de gravar).
+    Sem réplicas configuradas, é uma Session comum.
+    """
+
+    def __init__(self, *args: Any, replicas: Sequence[Replica] = (), **kwargs: Any):
+        """
+        Args:
+            replicas: Réplicas de leitura, usadas em rodízio
+        """
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+        self._rodizio = itertools.cycle(self.replicas) if self.replicas else None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primaria = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if not self.replicas or not isinstance(clause, Select):
+            return primaria
+
+        if (
+            self._flushing
+            or self.info.get(_ESCREVEU)
+            or clause._for_update_arg is not None
+            or clause.get_execution_options().get(LER_DA_PRIMARIA)
+            or unidade_atual(self) is not None
+            or not _metodo_de_leitura()
+        ):
+            roteamentos.incrementar("primaria")
+            return primaria
+
+        replica = self._escolher_replica()
+        if replica is None:
+            roteamentos.incrementar("primaria")
+            return primaria
+        roteamentos.incrementar("replica")
+        return replica.engine
+
+    def _escolher_replica(self) -> Optional[Replica]:
+        for _ in range(len(self.replicas)):
+            replica = next(self._rodizio)
+            if replica.disponivel():
+                return replica
+        return None
+
+
+def _metodo_de_leitura() -> bool:
+    # metodo_atual = "Classe.metodo", marcado por medir_repository
+    return metodo_atual.get().rpartition(".")[2].startswith(PREFIXOS_LEITURA)
+
+
+@event.listens_for(SessaoRoteada, "after_flush")
+def _marcar_escrita_orm(sessao: Session, contexto: Any) -> None:
+    sessao.info[_ESCREVEU] = True
+
+
+@event.listens_for(SessaoRoteada, "do_orm_execute")
+def _marcar_escrita_em_lote(estado: Any) -> None:
+    # insert/update/delete executados direto (operacoes_lote, UPDATE ... RETURNING)
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        estado.session.info[_ESCREVEU] = True
+
+
+def criar_replicas(
+    prefixo: str,
+    engines: Sequence[Engine],
+    atraso_max: float,
+    intervalo_verificacao: float,
+    engines_async: Sequence[AsyncEngine] = (),
+) -> List[Replica]:
+    """
+    Réplicas nomeadas {prefixo}_replica0, {prefixo}_replica1, ... na ordem das engines
+
+    Args:
+        prefixo: Rótulo da engine primária correspondente (ex: sync, async)
+        engines: Engines síncronas das réplicas (para as assíncronas, as sync_engine)
+        atraso_max: Segundos de atraso aceitos
+        intervalo_verificacao: Segundos entre medições do atraso
+        engines_async: Engines assíncronas correspondentes, na mesma ordem, se houver
+    """
+    replicas = [
+        Replica(
+            f"{prefixo}_replica{indice}",
+            engine,
+            atraso_max,
+            intervalo_verificacao,
+            engines_async[indice] if engines_async else None,
+        )
+        for indice, engine in enumerate(engines)
+    ]
+    _replicas.extend(replicas)
+    return replicas
+
+
+# Todas as réplicas criadas no processo (síncronas e assíncronas), lidas pelo coletor
+_replicas: List[Replica] = []
+
+
+async def verificar_replicas_periodicamente(intervalo: float) -> None:
+    """
+    Mede o atraso de todas as réplicas do processo a cada `intervalo` segundos,
+    até ser cancelada. Réplicas criadas depois (engines criadas no primeiro uso)
+    entram na rodada seguinte.
+    """
+    while True:
+        await asyncio.gather(*(replica.medir_async() for replica in list(_replicas)))
+        await asyncio.sleep(intervalo)
+
+
+def estado_replicas() -> Dict[str, Dict[str, Any]]:
+    """Último atraso medido de cada réplica e se ela recebe leituras (health checks)"""
+    return {
+        replica.nome: {
+            "atraso_segundos": replica.atraso,
+            "recebe_leituras": replica.disponivel(),
+        }
+        for replica in _replicas
+    }
+
+registro_metricas.coletor(
+    "banco_replica_atraso_segundos",
+    "gauge",
+    "Último atraso de replicação medido em cada réplica",
+    lambda: [({"replica": replica.nome}, replica.atraso) for replica in _replicas if replica.atraso is not None],
+)
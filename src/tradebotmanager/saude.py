@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from metricas import registro_metricas
+from .integracao.option_market.disjuntor import Disjuntor, disjuntor_corretora
+from .integracao.option_market.tokens import estado_gerenciadores
+
+logger = logging.getLogger("tradebotmanager.saude")
+
+# Sonda: devolve (ok, detalhes); exceção ou estouro do tempo limite contam como falha
+Sonda = Callable[[], Awaitable[tuple]]
+
+
+class MonitorSaude:
+    """
+    Verificações das dependências (banco, corretora, disjuntor, tokens) feitas
+    em segundo plano a cada `intervalo` segundos. O /health/deep só lê o
+    último resultado: consultá-lo não gera carga no banco nem na corretora,
+    qualquer que seja a frequência.
+
+    Sondas críticas com falha deixam o status "falha" (HTTP 503); as demais,
+    "degradado". Resultados mais velhos que 3 intervalos (rodadas travadas)
+    também contam como falha.
+    """
+
+    OK = "ok"
+    DEGRADADO = "degradado"
+    FALHA = "falha"
+    INICIANDO = "iniciando"
+
+    def __init__(self, intervalo: float = 15, tempo_limite: float = 5):
+        """
+        Args:
+            intervalo: Segundos entre rodadas de verificação
+            tempo_limite: Segundos máximos de cada sonda
+        """
+        self.intervalo = intervalo
+        self.tempo_limite = tempo_limite
+        # nome -> (sonda, crítica)
+        self._sondas: Dict[str, tuple] = {}
+        self._resultados: Dict[str, Dict[str, Any]] = {}
+        self._atualizado_em: Optional[float] = None
+        self._tarefa: Optional[asyncio.Task] = None
+
+    def registrar(self, nome: str, sonda: Sonda, critica: bool = True) -> None:
+        """
+        Args:
+            nome: Chave da sonda no relatório
+            sonda: Corrotina sem argumentos que devolve (ok, detalhes)
+            critica: Falha da sonda deixa a aplicação em "falha" (True) ou "degradado" (False)
+        """
+        self._sondas[nome] = (sonda, critica)
+
+    async def atualizar(self) -> None:
+        """Executa todas as sondas ao mesmo tempo e guarda os resultados"""
+        nomes = list(self._sondas)
+        resultados = await asyncio.gather(*(self._executar(nome) for nome in nomes))
+        # Troca o dicionário inteiro: quem lê nunca vê uma rodada pela metade
+        self._resultados = dict(zip(nomes, resultados))
+        self._atualizado_em = time.time()
+
+    async def _executar(self, nome: str) -> Dict[str, Any]:
+        sonda, critica = self._sondas[nome]
+        inicio = time.perf_counter()
+        try:
+            ok, detalhes = await asyncio.wait_for(sonda(), self.tempo_limite)
+        except asyncio.TimeoutError:
+            ok, detalhes = False, {"erro": f"sem resposta em {self.tempo_limite}s"}
+        except Exception as erro:
+            ok, detalhes = False, {"erro": str(erro)}
+        # Loga só a mudança de estado, não cada rodada com falha
+        anterior = self._resultados.get(nome)
+        if not ok and (anterior is None or anterior["ok"]):
+            logger.warning("Sonda %s falhou: %s", nome, detalhes)
+        elif ok and anterior is not None and not anterior["ok"]:
+            logger.info("Sonda %s recuperada", nome)
+        return {
+            "ok": ok,
+            "critica": critica,
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "detalhes": detalhes,
+        }
+
+    async def _executar_sempre(self) -> None:
+        while True:
+            try:
+                await self.atualizar()
+            except Exception:
+                logger.exception("Falha na rodada de verificações de saúde")
+            await asyncio.sleep(self.intervalo)
+
+    def iniciar(self) -> None:
+        """Começa as rodadas em segundo plano (no event loop atual)"""
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar_sempre(), name="monitor_saude")
+
+    async def parar(self) -> None:
+        """Interrompe as rodadas (desligamento da aplicação)"""
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    def status(self) -> str:
+        """ok, degradado, falha ou iniciando (nenhuma rodada concluída)"""
+        if self._atualizado_em is None:
+            return self.INICIANDO
+        if time.time() - self._atualizado_em > 3 * self.intervalo:
+            return self.FALHA
+        falhas = [resultado for resultado in self._resultados.values() if not resultado["ok"]]
+        if any(resultado["critica"] for resultado in falhas):
+            return self.FALHA
+        return self.DEGRADADO if falhas else self.OK
+
+    def relatorio(self) -> Dict[str, Any]:
+        """Último resultado de cada sonda, sem executar nenhuma"""
+        idade = None if self._atualizado_em is None else round(time.time() - self._atualizado_em, 1)
+        return {
+            "status": self.status(),
+            "verificado_ha_segundos": idade,
+            "intervalo_segundos": self.intervalo,
+            "sondas": self._resultados,
+        }
+
+
+async def sonda_banco() -> tuple:
+    """SELECT 1 na engine assíncrona, mais o estado dos pools e das réplicas"""
+    from sqlalchemy import text
+    from database import obter_engine_async
+    from perfil_banco import estatisticas_pool
+    from roteamento_banco import estado_replicas
+
+    async with obter_engine_async().connect() as conexao:
+        await conexao.execute(text("SELECT 1"))
+    return True, {"pools": estatisticas_pool(), "replicas": estado_replicas()}
+
+
+class SondaCorretora:
+    """
+    Alcance da API da corretora: qualquer resposta abaixo de 500 (inclusive
+    401/403/404) mostra que a API está no ar. Não autentica nem usa contas,
+    e não passa pelo disjuntor, para não contar nas taxas de erro dele.
+    """
+
+    def __init__(self):
+        self._sessao = None
+
+    async def __call__(self) -> tuple:
+        if self._sessao is None:
+            from .integracao.option_market.client_async import ClienteOptionMarketAsync
+
+            # Uma conexão reaproveitada entre rodadas
+            self._sessao = ClienteOptionMarketAsync.criar_sessao(max_conexoes=1)
+
+        resposta = await self._sessao.head("/")
+        return resposta.status_code < 500, {"status_http": resposta.status_code}
+
+    async def fechar(self) -> None:
+        if self._sessao is not None:
+            await self._sessao.aclose()
+            self._sessao = None
+
+
+def criar_sonda_disjuntor(disjuntor: Disjuntor) -> Sonda:
+    """Falha enquanto o disjuntor estiver aberto (corretora rejeitada sem contato)"""
+    async def sonda_disjuntor() -> tuple:
+        resumo = disjuntor.resumo()
+        return resumo["estado"] != Disjuntor.ABERTO, resumo
+    return sonda_disjuntor
+
+
+async def sonda_tokens() -> tuple:
+    """Contas com a última renovação de token falhando; só contagens, nunca tokens"""
+    estados: List[Dict[str, Any]] = list(estado_gerenciadores().values())
+    com_falha = sum(1 for estado in estados if estado["ultima_falha"] is not None)
+    return com_falha == 0, {
+        "contas": len(estados),
+        "com_token": sum(1 for estado in estados if estado["possui_token"]),
+        "precisam_renovar": sum(1 for estado in estados if estado["precisa_renovar"]),
+        "renovacao_com_falha": com_falha,
+    }
+
+
+def criar_monitor_saude() -> MonitorSaude:
+    """Monitor com as sondas da aplicação; intervalos de SAUDE_INTERVALO_S e SAUDE_TEMPO_LIMITE_S"""
+    import env_variables
+
+    monitor = MonitorSaude(env_variables.SAUDE_INTERVALO_S, env_variables.SAUDE_TEMPO_LIMITE_S)
+    monitor.registrar("banco", sonda_banco)
+    monitor.registrar("corretora", sonda_corretora)
+    monitor.registrar("disjuntor", criar_sonda_disjuntor(disjuntor_corretora), critica=False)
+    monitor.registrar("tokens", sonda_tokens, critica=False)
+    return monitor
+
+
+# Únicos do processo; a sonda da corretora guarda a conexão entre rodadas
+sonda_corretora = SondaCorretora()
+monitor_saude = criar_monitor_saude()
+
+registro_metricas.coletor(
+    "saude_sonda_ok",
+    "gauge",
+    "Último resultado de cada sonda do /health/deep (1 = ok)",
+    lambda: [
+        ({"sonda": nome}, 1.0 if resultado["ok"] else 0.0)
+        for nome, resultado in monitor_saude.relatorio()["sondas"].items()
+    ],
+)
@@ -1,4 +1,4 @@
-from database import engine, ModelBase
+from database import ModelBase, obter_engine
 
 # Importar todos os models para registrar as tabelas
 from usuarios.model import Usuario
@@ -6,11 +6,12 @@ from corretoras.model import Corretora
 from corretoras_usuarios.model import CorretoraUsuario
 from bots_option_market.model import BotOptionMarket
 from bots_usuarios_op_mkt.model import BotUsuarioOpMkt
+from bots_usuarios_op_mkt.resumo import ResumoSeguidoresBot
 
 def testar_criacao_tabelas():
     """Testa se todos os models e relacionamentos estão corretos"""
     try:
-        ModelBase.metadata.create_all(bind=engine)
+        ModelBase.metadata.create_all(bind=obter_engine())
         print("✅ Todas as tabelas criadas com sucesso!")
         print("✅ Relacionamentos SQLAlchemy validados!")
         
@@ -24,5 +25,5 @@ def testar_criacao_tabelas():
     return True
 
 if __name__ == "__main__":
-    # ModelBase.metadata.drop_all(bind=engine)
+    # ModelBase.metadata.drop_all(bind=obter_engine())
     testar_criacao_tabelas()
\ No newline at end of file
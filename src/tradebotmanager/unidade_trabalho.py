@@ -0,0 +1,134 @@
+from typing import Any, List, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Chave em sessao.info com a pilha de unidades de trabalho abertas na sessão
+_CHAVE = "unidades_trabalho"
+
+
+class UnidadeDeTrabalho:
+    """
+    Agrupa várias operações de repositories em uma única transação.
+
+    Dentro do bloco, os repositories fazem flush em vez de commit (os ids e as
+    constraints continuam disponíveis na hora) e só há um commit, na saída do
+    bloco mais externo. Se o bloco falhar, tudo é desfeito. Blocos aninhados
+    viram savepoints: uma falha interna desfaz só o trecho aninhado.
+
+    Uso:
+        with UnidadeDeTrabalho(sessao):
+            conta = contas.criar(conta)
+            associacoes.criar(associacao)
+
+        async with UnidadeDeTrabalho(sessao_async):
+            ...
+    """
+
+    def __init__(self, sessao: Union[Session, AsyncSession], recarregar_objetos: bool = False):
+        """
+        Args:
+            sessao: Sessão (síncrona ou assíncrona) usada pelos repositories
+            recarregar_objetos: Faz refresh() dos objetos criados/atualizados; só é
+                preciso para ler valores gerados pelo servidor (server_default, triggers)
+        """
+        self.sessao = sessao
+        self.recarregar_objetos = recarregar_objetos
+        self._savepoint: Any = None
+
+    def __enter__(self) -> "UnidadeDeTrabalho":
+        pilha = _pilha(self.sessao)
+        if pilha:
+            self._savepoint = self.sessao.begin_nested()
+        pilha.append(self)
+        return self
+
+    def __exit__(self, tipo_erro, erro, rastreio) -> None:
+        _pilha(self.sessao).pop()
+        if self._savepoint is not None:
+            if tipo_erro is None:
+                self._savepoint.commit()
+            else:
+                self._savepoint.rollback()
+        elif tipo_erro is None:
+            try:
+                self.sessao.commit()
+            except Exception:
+                self.sessao.rollback()
+                raise
+        else:
+            self.sessao.rollback()
+
+    async def __aenter__(self) -> "UnidadeDeTrabalho":
+        pilha = _pilha(self.sessao)
+        if pilha:
+            self._savepoint = await self.sessao.begin_nested()
+        pilha.append(self)
+        return self
+
+    async def __aexit__(self, tipo_erro, erro, rastreio) -> None:
+        _pilha(self.sessao).pop()
+        if self._savepoint is not None:
+            if tipo_erro is None:
+                await self._savepoint.commit()
+            else:
+                await self._savepoint.rollback()
+        elif tipo_erro is None:
+            try:
+                await self.sessao.commit()
+            except Exception:
+                await self.sessao.rollback()
+                raise
+        else:
+            await self.sessao.rollback()
+
+
+def _pilha(sessao: Union[Session, AsyncSession]) -> List[UnidadeDeTrabalho]:
+    return sessao.info.setdefault(_CHAVE, [])
+
+
+def unidade_atual(sessao: Union[Session, AsyncSession]) -> Optional[UnidadeDeTrabalho]:
+    """Unidade de trabalho mais interna aberta na sessão, se houver"""
+    pilha = sessao.info.get(_CHAVE)
+    return pilha[-1] if pilha else None
+
+
+def confirmar(sessao: Session) -> None:
+    """Commit, ou apenas flush se a sessão estiver dentro de uma unidade de trabalho"""
+    if unidade_atual(sessao) is None:
+        sessao.commit()
+    else:
+        sessao.flush()
+
+
+def desfazer(sessao: Session) -> None:
+    """Rollback, exceto dentro de uma unidade de trabalho (que desfaz ao sair com erro)"""
+    if unidade_atual(sessao) is None:
+        sessao.rollback()
+
+
+def recarregar(sessao: Session, objeto: Any) -> None:
+    """refresh() do objeto, dispensado dentro de unidade de trabalho que não pediu recarga"""
+    unidade = unidade_atual(sessao)
+    if unidade is None or unidade.recarregar_objetos:
+        sessao.refresh(objeto)
+
+
+async def confirmar_async(sessao: AsyncSession) -> None:
+    """Versão assíncrona de confirmar()"""
+    if unidade_atual(sessao) is None:
+        await sessao.commit()
+    else:
+        await sessao.flush()
+
+
+async def desfazer_async(sessao: AsyncSession) -> None:
+    """Versão assíncrona de desfazer()"""
+    if unidade_atual(sessao) is None:
+        await sessao.rollback()
+
+
+async def recarregar_async(sessao: AsyncSession, objeto: Any) -> None:
+    """Versão assíncrona de recarregar()"""
+    unidade = unidade_atual(sessao)
+    if unidade is None or unidade.recarregar_objetos:
+        await sessao.refresh(objeto)
@@ -1,20 +1,28 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from paginacao import TAMANHO_LOTE_STREAM, iterar, paginar
+from unidade_trabalho import confirmar, recarregar
 from .model import Usuario, TipoUsuario
 from ..corretoras_usuarios.model import CorretoraUsuario
+from ..planos_carga import PlanoCarga, aplicar_plano
 
 
+@medir_repository
 class UsuarioRepository:
     def __init__(self, sessao: Session):
         self.sessao = sessao
 
-    def buscar_por_id(self, usuario_id: int) -> Optional[Usuario]:
+    def buscar_por_id(self, usuario_id: int, plano: Optional[PlanoCarga] = None) -> Optional[Usuario]:
         """
         Busca usuário por ID
         Args:
             usuario_id: ID do usuário
+            plano: Relacionamentos carregados junto (ex: planos_carga.USUARIO_PAINEL)
         """
-        return self.sessao.query(Usuario).filter(Usuario.id == usuario_id).first()
+        return aplicar_plano(self.sessao.query(Usuario), plano).filter(Usuario.id == usuario_id).first()
 
     def buscar_por_email(self, email: str) -> Optional[Usuario]:
         """
@@ -26,38 +34,45 @@ class UsuarioRepository:
         """
         return self.sessao.query(Usuario).filter(Usuario.email == email).first()
 
-    def listar_usuarios(self, ativo: Optional[bool] = True) -> List[Usuario]:
+    def listar_usuarios(self, ativo: Optional[bool] = True, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Usuario]:
         """
         Lista usuários com filtro de status
         Args:
             ativo: True=só ativos, False=só inativos, None=todos
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
         """
         query = self.sessao.query(Usuario)
         
         if ativo is not None:
             query = query.filter(Usuario.ativo.is_(ativo))
         
-        return query.all()
+        return paginar(query, Usuario, apos_id, limite).all()
 
-    def listar_admins(self, ativo: Optional[bool] = True) -> List[Usuario]:
+    def listar_admins(self, ativo: Optional[bool] = True, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Usuario]:
         """
         Lista usuários administradores
         Args:
             ativo: True=só ativos, False=só inativos, None=todos
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
         """
         query = self.sessao.query(Usuario).filter(Usuario.tipo == TipoUsuario.ADMIN)
         
         if ativo is not None:
             query = query.filter(Usuario.ativo.is_(ativo))
         
-        return query.all()
+        return paginar(query, Usuario, apos_id, limite).all()
 
-    def buscar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True) -> List[Usuario]:
+    def buscar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Usuario]:
         """
         Lista usuários que possuem conta em uma corretora específica
         Args:
             corretora_id: ID da corretora
             ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.USUARIO_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
         """
         query = self.sessao.query(Usuario)\
             .join(CorretoraUsuario)\
@@ -69,41 +84,91 @@ class UsuarioRepository:
                 Usuario.ativo.is_(ativo)
             )
         
-        return query.all()
+        return aplicar_plano(paginar(query, Usuario, apos_id, limite), plano).all()
+
+    def iterar_usuarios(
+        self,
+        ativo: Optional[bool] = True,
+        colunas: Optional[Sequence[Any]] = None,
+        tamanho_lote: int = TAMANHO_LOTE_STREAM,
+    ) -> Iterator[Any]:
+        """
+        Percorre os usuários em lotes, com cursor no servidor (memória constante)
+        Args:
+            ativo: True=só ativos, False=só inativos, None=todos
+            colunas: Só estas colunas (ex: [Usuario.id, Usuario.ativo]), em linhas leves sem objetos ORM
+            tamanho_lote: Linhas buscadas por vez
+        Uso: for item in repository.iterar_usuarios(...)
+        """
+        consulta = (select(*colunas) if colunas else select(Usuario))
+
+        if ativo is not None:
+            consulta = consulta.where(Usuario.ativo.is_(ativo))
+
+        return iterar(self.sessao, consulta.order_by(Usuario.id), objetos=not colunas, tamanho_lote=tamanho_lote)
 
     def criar(self, usuario: Usuario) -> Usuario:
         """Cria novo usuário"""
         self.sessao.add(usuario)
-        self.sessao.commit()
-        self.sessao.refresh(usuario)
+        confirmar(self.sessao)
+        recarregar(self.sessao, usuario)
         return usuario
 
     def atualizar(self, usuario: Usuario) -> Usuario:
         """Atualiza usuário existente"""
-        self.sessao.commit()
-        self.sessao.refresh(usuario)
+        confirmar(self.sessao)
+        recarregar(self.sessao, usuario)
         return usuario
 
+    def atualizar_por_id(self, usuario_id: int, dados: Dict[str, Any]) -> Optional[Usuario]:
+        """
+        Atualiza campos do usuário com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            usuario_id: ID do usuário
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Usuário atualizado, ou None se não existe
+        """
+        return operacoes_lote.atualizar_por_id(self.sessao, Usuario, usuario_id, dados)
+
+    def criar_em_lote(self, usuarios: List[Usuario]) -> List[Usuario]:
+        """
+        Cria vários registros com INSERT em lote (RETURNING) e um único commit
+        Args:
+            usuarios: Usuários novos
+        Returns:
+            Usuários criados, com id, na mesma ordem
+        """
+        return operacoes_lote.criar_em_lote(self.sessao, usuarios)
+
+    def atualizar_em_lote(self, alteracoes: List[Dict[str, Any]]) -> int:
+        """
+        Atualiza vários usuários pelo id com UPDATE em lote e um único commit
+        Args:
+            alteracoes: Um dicionário por usuário, com "id" e os campos a alterar
+        """
+        return operacoes_lote.atualizar_em_lote(self.sessao, Usuario, alteracoes)
+
+    def desativar_em_lote(self, usuario_ids: List[int]) -> List[int]:
+        """
+        Soft delete de vários usuários com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs desativados (os que estavam ativos)
+        """
+        return operacoes_lote.definir_ativo_em_lote(self.sessao, Usuario, usuario_ids, False)
+
+    def ativar_em_lote(self, usuario_ids: List[int]) -> List[int]:
+        """
+        Reativa vários usuários com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs ativados (os que estavam inativos)
+        """
+        return operacoes_lote.definir_ativo_em_lote(self.sessao, Usuario, usuario_ids, True)
+
     def desativar(self, usuario_id: int) -> bool:
-        """Soft delete - marca usuário como inativo"""
-        usuario = self.buscar_por_id(usuario_id)
-        if usuario:
-            # Usar update query para evitar problemas de tipo
-            self.sessao.query(Usuario)\
-                .filter(Usuario.id == usuario_id)\
-                .update({Usuario.ativo: False})
-            self.sessao.commit()
-            return True
-        return False
+        """Soft delete - marca usuário como inativo com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, Usuario, usuario_id, False)
 
     def ativar(self, usuario_id: int) -> bool:
-        """Reativa usuário inativo"""
-        # Busca usuário mesmo se inativo
-        usuario = self.sessao.query(Usuario).filter(Usuario.id == usuario_id).first()
-        if usuario:
-            self.sessao.query(Usuario)\
-                .filter(Usuario.id == usuario_id)\
-                .update({Usuario.ativo: True})
-            self.sessao.commit()
-            return True
-        return False
\ No newline at end of file
+        """Reativa usuário inativo com um único UPDATE ... RETURNING"""
+        return operacoes_lote.definir_ativo(self.sessao, Usuario, usuario_id, True)
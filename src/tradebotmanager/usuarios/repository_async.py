@@ -0,0 +1,175 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+import operacoes_lote
+from instrumentacao_banco import medir_repository
+from paginacao import TAMANHO_LOTE_STREAM, iterar_async, paginar
+from unidade_trabalho import confirmar_async, recarregar_async
+from .model import Usuario, TipoUsuario
+from ..corretoras_usuarios.model import CorretoraUsuario
+from ..planos_carga import PlanoCarga, aplicar_plano
+
+
+@medir_repository
+class UsuarioRepositoryAsync:
+    """Versão assíncrona do UsuarioRepository, para uso nos handlers do FastAPI"""
+
+    def __init__(self, sessao: AsyncSession):
+        self.sessao = sessao
+
+    async def buscar_por_id(self, usuario_id: int, plano: Optional[PlanoCarga] = None) -> Optional[Usuario]:
+        """
+        Busca usuário por ID
+        Args:
+            usuario_id: ID do usuário
+            plano: Relacionamentos carregados junto (ex: planos_carga.USUARIO_PAINEL)
+        """
+        consulta = aplicar_plano(select(Usuario).where(Usuario.id == usuario_id), plano)
+        return (await self.sessao.scalars(consulta)).unique().first()
+
+    async def buscar_por_email(self, email: str) -> Optional[Usuario]:
+        """
+        Busca usuário por email
+        Args:
+            email: Email do usuário
+        """
+        return await self.sessao.scalar(select(Usuario).where(Usuario.email == email))
+
+    async def listar_usuarios(self, ativo: Optional[bool] = True, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Usuario]:
+        """
+        Lista usuários com filtro de status
+        Args:
+            ativo: True=só ativos, False=só inativos, None=todos
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
+        """
+        consulta = select(Usuario)
+
+        if ativo is not None:
+            consulta = consulta.where(Usuario.ativo.is_(ativo))
+
+        return list(await self.sessao.scalars(paginar(consulta, Usuario, apos_id, limite)))
+
+    async def listar_admins(self, ativo: Optional[bool] = True, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Usuario]:
+        """
+        Lista usuários administradores
+        Args:
+            ativo: True=só ativos, False=só inativos, None=todos
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
+        """
+        consulta = select(Usuario).where(Usuario.tipo == TipoUsuario.ADMIN)
+
+        if ativo is not None:
+            consulta = consulta.where(Usuario.ativo.is_(ativo))
+
+        return list(await self.sessao.scalars(paginar(consulta, Usuario, apos_id, limite)))
+
+    async def buscar_por_corretora(self, corretora_id: int, ativo: Optional[bool] = True, plano: Optional[PlanoCarga] = None, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Usuario]:
+        """
+        Lista usuários que possuem conta em uma corretora específica
+        Args:
+            corretora_id: ID da corretora
+            ativo: True=só ativos, False=só inativos, None=todos
+            plano: Relacionamentos carregados junto (ex: planos_carga.USUARIO_PAINEL)
+            apos_id: Cursor da paginação por id (id do último item da página anterior)
+            limite: Itens por página; None traz todos
+        """
+        consulta = select(Usuario)\
+            .join(CorretoraUsuario)\
+            .where(CorretoraUsuario.corretora_id == corretora_id)
+
+        if ativo is not None:
+            consulta = consulta.where(
+                CorretoraUsuario.ativo.is_(ativo),
+                Usuario.ativo.is_(ativo)
+            )
+
+        return list((await self.sessao.scalars(aplicar_plano(paginar(consulta, Usuario, apos_id, limite), plano))).unique())
+
+    def iterar_usuarios(
+        self,
+        ativo: Optional[bool] = True,
+        colunas: Optional[Sequence[Any]] = None,
+        tamanho_lote: int = TAMANHO_LOTE_STREAM,
+    ) -> AsyncIterator[Any]:
+        """
+        Percorre os usuários em lotes, com cursor no servidor (memória constante)
+        Args:
+            ativo: True=só ativos, False=só inativos, None=todos
+            colunas: Só estas colunas (ex: [Usuario.id, Usuario.ativo]), em linhas leves sem objetos ORM
+            tamanho_lote: Linhas buscadas por vez
+        Uso: async for item in repository.iterar_usuarios(...)
+        """
+        consulta = (select(*colunas) if colunas else select(Usuario))
+
+        if ativo is not None:
+            consulta = consulta.where(Usuario.ativo.is_(ativo))
+
+        return iterar_async(self.sessao, consulta.order_by(Usuario.id), objetos=not colunas, tamanho_lote=tamanho_lote)
+
+    async def criar(self, usuario: Usuario) -> Usuario:
+        """Cria novo usuário"""
+        self.sessao.add(usuario)
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, usuario)
+        return usuario
+
+    async def atualizar(self, usuario: Usuario) -> Usuario:
+        """Atualiza usuário existente"""
+        await confirmar_async(self.sessao)
+        await recarregar_async(self.sessao, usuario)
+        return usuario
+
+    async def atualizar_por_id(self, usuario_id: int, dados: Dict[str, Any]) -> Optional[Usuario]:
+        """
+        Atualiza campos do usuário com um único UPDATE ... RETURNING, sem buscar antes
+        Args:
+            usuario_id: ID do usuário
+            dados: Campos a alterar; chaves que não são colunas são ignoradas
+        Returns:
+            Usuário atualizado, ou None se não existe
+        """
+        return await operacoes_lote.atualizar_por_id_async(self.sessao, Usuario, usuario_id, dados)
+
+    async def criar_em_lote(self, usuarios: List[Usuario]) -> List[Usuario]:
+        """
+        Cria vários registros com INSERT em lote (RETURNING) e um único commit
+        Args:
+            usuarios: Usuários novos
+        Returns:
+            Usuários criados, com id, na mesma ordem
+        """
+        return await operacoes_lote.criar_em_lote_async(self.sessao, usuarios)
+
+    async def atualizar_em_lote(self, alteracoes: List[Dict[str, Any]]) -> int:
+        """
+        Atualiza vários usuários pelo id com UPDATE em lote e um único commit
+        Args:
+            alteracoes: Um dicionário por usuário, com "id" e os campos a alterar
+        """
+        return await operacoes_lote.atualizar_em_lote_async(self.sessao, Usuario, alteracoes)
+
+    async def desativar_em_lote(self, usuario_ids: List[int]) -> List[int]:
+        """
+        Soft delete de vários usuários com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs desativados (os que estavam ativos)
+        """
+        return await operacoes_lote.definir_ativo_em_lote_async(self.sessao, Usuario, usuario_ids, False)
+
+    async def ativar_em_lote(self, usuario_ids: List[int]) -> List[int]:
+        """
+        Reativa vários usuários com UPDATE ... RETURNING e um único commit
+        Returns:
+            IDs ativados (os que estavam inativos)
+        """
+        return await operacoes_lote.definir_ativo_em_lote_async(self.sessao, Usuario, usuario_ids, True)
+
+    async def desativar(self, usuario_id: int) -> bool:
+        """Soft delete - marca usuário como inativo com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, Usuario, usuario_id, False)
+
+    async def ativar(self, usuario_id: int) -> bool:
+        """Reativa usuário inativo com um único UPDATE ... RETURNING"""
+        return await operacoes_lote.definir_ativo_async(self.sessao, Usuario, usuario_id, True)
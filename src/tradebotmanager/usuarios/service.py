@@ -1,6 +1,7 @@
 from typing import List, Optional
 
 from .model import Usuario, TipoUsuario
+from ..planos_carga import PlanoCarga
 from .repository import UsuarioRepository
 
 class UsuarioService:
@@ -21,33 +22,35 @@ class UsuarioService:
         )
         return self.repository.criar(usuario)
 
-    def buscar_por_id(self, usuario_id: int) -> Usuario:
-        """Busca um usuário pelo ID. Lança ValueError se não encontrado."""
-        usuario = self.repository.buscar_por_id(usuario_id)
+    def buscar_por_id(self, usuario_id: int, plano: Optional[PlanoCarga] = None) -> Usuario:
+        """
+        Busca um usuário pelo ID. Lança ValueError se não encontrado.
+        Use plano=planos_carga.USUARIO_PAINEL para trazer contas e bots no mesmo número fixo de consultas.
+        """
+        usuario = self.repository.buscar_por_id(usuario_id, plano)
         if not usuario:
             raise ValueError(f"Usuário com id {usuario_id} não encontrado.")
         
         return usuario
 
-    def listar_usuarios(self, ativo: Optional[bool] = True) -> List[Usuario]:
-        """Lista todos os usuários, podendo filtrar por ativos/inativos."""
-        return self.repository.listar_usuarios(ativo=ativo)
+    def listar_usuarios(self, ativo: Optional[bool] = True, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Usuario]:
+        """
+        Lista os usuários, podendo filtrar por ativos/inativos.
+        Com limite, pagina por id: a próxima página começa em apos_id=paginacao.proximo_cursor(itens, limite).
+        """
+        return self.repository.listar_usuarios(ativo=ativo, apos_id=apos_id, limite=limite)
 
     def atualizar_usuario(self, usuario_id: int, **dados) -> Usuario:
-        """Atualiza dados de um usuário. Lança ValueError se não encontrado."""
-        usuario = self.repository.buscar_por_id(usuario_id)
+        """Atualiza dados de um usuário com um único UPDATE ... RETURNING. Lança ValueError se não encontrado."""
+        usuario = self.repository.atualizar_por_id(usuario_id, dados)
         if not usuario:
             raise ValueError(f"Usuário com id {usuario_id} não encontrado.")
-        
-        for campo, valor in dados.items():
-            if hasattr(usuario, campo):
-                setattr(usuario, campo, valor)
-        return self.repository.atualizar(usuario)
+
+        return usuario
 
     def desativar_usuario(self, usuario_id: int) -> bool:
         """Marca o usuário como inativo (soft delete). Lança ValueError se não encontrado."""
-        usuario = self.repository.buscar_por_id(usuario_id)
-        if not usuario:
+        if not self.repository.desativar(usuario_id):
             raise ValueError(f"Usuário com id {usuario_id} não encontrado.")
-        
-        return self.repository.desativar(usuario_id)
+
+        return True
@@ -0,0 +1,56 @@
+from typing import List, Optional
+
+from .model import Usuario, TipoUsuario
+from ..planos_carga import PlanoCarga
+from .repository_async import UsuarioRepositoryAsync
+
+class UsuarioServiceAsync:
+    """
+    Versão assíncrona do UsuarioService, sobre o UsuarioRepositoryAsync.
+    """
+    def __init__(self, repository: UsuarioRepositoryAsync):
+        self.repository = repository
+
+    async def criar_usuario(self, nome: str, email: str, senha: str, tipo=None) -> Usuario:
+        """Cria um novo usuário."""
+        usuario = Usuario(
+            nome=nome,
+            email=email,
+            senha=senha,
+            tipo=tipo or TipoUsuario.USUARIO,
+            ativo=True
+        )
+        return await self.repository.criar(usuario)
+
+    async def buscar_por_id(self, usuario_id: int, plano: Optional[PlanoCarga] = None) -> Usuario:
+        """
+        Busca um usuário pelo ID. Lança ValueError se não encontrado.
+        Use plano=planos_carga.USUARIO_PAINEL para trazer contas e bots no mesmo número fixo de consultas.
+        """
+        usuario = await self.repository.buscar_por_id(usuario_id, plano)
+        if not usuario:
+            raise ValueError(f"Usuário com id {usuario_id} não encontrado.")
+
+        return usuario
+
+    async def listar_usuarios(self, ativo: Optional[bool] = True, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Usuario]:
+        """
+        Lista os usuários, podendo filtrar por ativos/inativos.
+        Com limite, pagina por id: a próxima página começa em apos_id=paginacao.proximo_cursor(itens, limite).
+        """
+        return await self.repository.listar_usuarios(ativo=ativo, apos_id=apos_id, limite=limite)
+
+    async def atualizar_usuario(self, usuario_id: int, **dados) -> Usuario:
+        """Atualiza dados de um usuário com um único UPDATE ... RETURNING. Lança ValueError se não encontrado."""
+        usuario = await self.repository.atualizar_por_id(usuario_id, dados)
+        if not usuario:
+            raise ValueError(f"Usuário com id {usuario_id} não encontrado.")
+
+        return usuario
+
+    async def desativar_usuario(self, usuario_id: int) -> bool:
+        """Marca o usuário como inativo (soft delete). Lança ValueError se não encontrado."""
+        if not await self.repository.desativar(usuario_id):
+            raise ValueError(f"Usuário com id {usuario_id} não encontrado.")
+
+        return True
@@ -0,0 +1,23 @@
+"""
+Fixtures compartilhadas. Importa todos os models para que os relacionamentos
+entre eles (declarados por nome) sejam resolvidos e create_all crie todas as tabelas.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from database import ModelBase
+from tradebotmanager.usuarios.model import Usuario  # noqa: F401
+from tradebotmanager.corretoras.model import Corretora  # noqa: F401
+from tradebotmanager.corretoras_usuarios.model import CorretoraUsuario  # noqa: F401
+from tradebotmanager.bots_option_market.model import BotOptionMarket  # noqa: F401
+from tradebotmanager.bots_usuarios_op_mkt.model import BotUsuarioOpMkt  # noqa: F401
+
+
+@pytest.fixture
+def sessao():
+    """Sessão de um SQLite em memória com todas as tabelas criadas"""
+    engine = create_engine("sqlite://")
+    ModelBase.metadata.create_all(engine)
+    with Session(engine) as sessao:
+        yield sessao
+    engine.dispose()
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from tradebotmanager.integracao.option_market.aprovacao import ObservadorAprovacoesAsync
+
+
+class RepositoryFalso:
+    """Repository assíncrono cuja listagem de ativos tem os copy-trades de `status`"""
+
+    def __init__(self, status):
+        self.client = type("Cliente", (), {"email": "conta@teste"})()
+        self.status = status
+        self.forcados = []
+
+    async def iterar_bots(self, ativo=True):
+        for broker_copy_id, status in self.status.items():
+            yield {"id": broker_copy_id, "status": status}
+
+    async def forcar_aprovacao(self, broker_copy_id):
+        self.forcados.append(broker_copy_id)
+        self.status[broker_copy_id] = "APPROVED"
+
+
+def test_observador_async_conclui_aprovacao():
+    observador = ObservadorAprovacoesAsync(intervalo_inicial=0.01, tolerancia=0)
+    repository = RepositoryFalso({"a": "PENDING"})
+
+    async def aguardar():
+        return await asyncio.wrap_future(observador.observar(repository, "a"))
+
+    assert asyncio.run(aguardar()) is True
+    assert repository.forcados == ["a"]
+
+
+def test_observador_async_descarta_consultor_de_loop_fechado():
+    observador = ObservadorAprovacoesAsync(intervalo_inicial=60, prazo=60)
+
+    async def registrar(broker_copy_id):
+        return observador.observar(RepositoryFalso({}), broker_copy_id)
+
+    loop = asyncio.new_event_loop()
+    antigo = loop.run_until_complete(registrar("a"))
+    loop.close()
+
+    async def registrar_e_esperar_uma_consulta():
+        await registrar("b")
+        await asyncio.sleep(0.05)
+
+    asyncio.run(registrar_e_esperar_uma_consulta())
+
+    with pytest.raises(RuntimeError, match="encerrado"):
+        antigo.result(timeout=0)
+    # O id novo ganhou um consultor no loop novo, que chegou a consultar a corretora
+    assert observador.estatisticas()["consultas"] == 1
+
+
+def test_observador_cancelado_conclui_como_nao_aprovado():
+    observador = ObservadorAprovacoesAsync(intervalo_inicial=60, prazo=60)
+    concluidos = []
+
+    async def observar_e_cancelar():
+        futuro = observador.observar(
+            RepositoryFalso({"a": "PENDING"}), "a", ao_concluir=lambda *args: concluidos.append(args)
+        )
+        futuro.cancel()
+
+    asyncio.run(observar_e_cancelar())
+
+    assert concluidos == [("a", False)]
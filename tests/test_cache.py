@@ -0,0 +1,119 @@
+import time
+
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import declarative_base
+from cache import CacheTTL
+from cache_catalogo import CacheCatalogo
+from tradebotmanager.integracao.option_market.cache import CacheListagens
+
+
+def test_cache_ttl_guarda_e_conta_acertos_e_falhas():
+    cache = CacheTTL(ttl=60)
+
+    assert cache.obter("a") is None
+    cache.guardar("a", 1)
+
+    assert cache.obter("a") == 1
+    assert cache.estatisticas() == {"acertos": 1, "falhas": 1, "taxa_acerto": 0.5, "itens": 1}
+
+
+def test_cache_ttl_expira_valores(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: agora[0])
+    cache = CacheTTL(ttl=10)
+    cache.guardar("a", 1)
+
+    agora[0] += 9.9
+    assert cache.obter("a") == 1
+    agora[0] += 0.1
+    assert cache.obter("a") is None
+    assert cache.estatisticas()["itens"] == 0
+
+
+def test_cache_ttl_descarta_o_menos_usado():
+    cache = CacheTTL(ttl=60, max_itens=2)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    cache.obter("a")
+
+    cache.guardar("c", 3)
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") == 1
+    assert cache.obter("c") == 3
+
+
+def test_cache_ttl_invalidar_e_limpar():
+    cache = CacheTTL(ttl=60)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+
+    cache.invalidar("a")
+    assert cache.obter("a") is None
+    cache.limpar()
+    assert cache.obter("b") is None
+
+
+def test_cache_listagens_separa_ativos_e_inativos():
+    cache = CacheListagens()
+    cache.guardar_listagem("conta", True, [{"id": "1"}])
+
+    assert cache.obter_listagem("conta", True) == [{"id": "1"}]
+    assert cache.obter_listagem("conta", False) is None
+
+
+def test_cache_listagens_invalidar_marca_so_o_id_alterado():
+    cache = CacheListagens()
+    cache.guardar_listagem("conta", True, [{"id": "1"}, {"id": "2"}])
+
+    cache.invalidar("conta", "1")
+
+    # A listagem completa não é mais confiável, mas os demais ids sim
+    assert cache.obter_listagem("conta", True) is None
+    assert cache.buscar("conta", True, "1") == (False, None)
+    assert cache.buscar("conta", True, "2") == (True, {"id": "2"})
+    # Id ausente de uma listagem válida: o cache garante que não existe
+    assert cache.buscar("conta", True, "3") == (True, None)
+
+
+def test_cache_listagens_atualizar_itens_limpa_o_id_sujo():
+    cache = CacheListagens()
+    cache.guardar_listagem("conta", True, [{"id": "1", "status": "PENDING"}])
+    cache.invalidar("conta", "1")
+
+    cache.atualizar_itens("conta", True, [{"id": "1", "status": "APPROVED"}])
+
+    assert cache.obter_listagem("conta", True) == [{"id": "1", "status": "APPROVED"}]
+
+
+def test_cache_listagens_invalidar_conta_descarta_as_duas_listagens():
+    cache = CacheListagens()
+    cache.guardar_listagem("conta", True, [{"id": "1"}])
+    cache.guardar_listagem("conta", False, [{"id": "2"}])
+    cache.guardar_listagem("outra", True, [{"id": "3"}])
+
+    cache.invalidar_conta("conta")
+
+    assert cache.obter_listagem("conta", True) is None
+    assert cache.obter_listagem("conta", False) is None
+    assert cache.obter_listagem("outra", True) == [{"id": "3"}]
+
+
+class Bot(declarative_base()):
+    __tablename__ = "bots"
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+
+
+def test_cache_catalogo_nao_guarda_carga_de_antes_da_invalidacao():
+    catalogo = CacheCatalogo("bots")
+
+    def carregar_e_ser_invalidado():
+        # Uma escrita limpa o cache enquanto o valor antigo ainda está sendo lido
+        catalogo.invalidar()
+        return Bot(id=1, nome="antigo")
+
+    assert catalogo.obter_ou_carregar(("id", 1), carregar_e_ser_invalidado).nome == "antigo"
+    assert catalogo.obter_ou_carregar(("id", 1), lambda: Bot(id=1, nome="novo")).nome == "novo"
+    assert catalogo.obter_ou_carregar(("id", 1), lambda: Bot(id=1, nome="outro")).nome == "novo"
@@ -0,0 +1,42 @@
+from tradebotmanager.corretoras_usuarios.model import CorretoraUsuario
+from tradebotmanager.corretoras_usuarios.repository import CorretoraUsuarioRepository
+from tradebotmanager.bots_option_market.model import BotOptionMarket
+from tradebotmanager.bots_usuarios_op_mkt.model import BotUsuarioOpMkt
+
+
+def criar_conta(sessao, usuario_id, corretora_id, ativa=True):
+    conta = CorretoraUsuario(usuario_id=usuario_id, corretora_id=corretora_id, login=f"u{usuario_id}c{corretora_id}", senha="s", ativo=ativa)
+    sessao.add(conta)
+    sessao.flush()
+    return conta.id
+
+
+def seguir(sessao, usuario_id, bot_id, ativo=True):
+    sessao.add(BotUsuarioOpMkt(usuario_id=usuario_id, bot_option_market_id=bot_id, ativo=ativo))
+
+
+def test_lista_so_contas_que_seguem_bot_ativo_da_propria_corretora(sessao):
+    sessao.add_all([
+        BotOptionMarket(id=1, nome="ativo", corretora_id=1, ativo=True),
+        BotOptionMarket(id=2, nome="inativo", corretora_id=1, ativo=False),
+        BotOptionMarket(id=3, nome="outra corretora", corretora_id=2, ativo=True),
+    ])
+    segue = criar_conta(sessao, 1, 1)
+    seguir(sessao, 1, 1)
+    criar_conta(sessao, 2, 1)
+    seguir(sessao, 2, 1, ativo=False)
+    criar_conta(sessao, 3, 1)
+    seguir(sessao, 3, 2)
+    criar_conta(sessao, 4, 1, ativa=False)
+    seguir(sessao, 4, 1)
+    # Segue um bot ativo, mas de outra corretora
+    criar_conta(sessao, 5, 1)
+    seguir(sessao, 5, 3)
+    outra = criar_conta(sessao, 6, 1)
+    seguir(sessao, 6, 1)
+    sessao.commit()
+
+    repository = CorretoraUsuarioRepository(sessao)
+
+    assert [conta.id for conta in repository.listar_com_bots_ativos()] == [segue, outra]
+    assert [conta.id for conta in repository.listar_com_bots_ativos(limite=1)] == [segue]
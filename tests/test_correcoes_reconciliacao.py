@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from tradebotmanager.bots_usuarios_op_mkt.model import BotUsuarioOpMkt
+from tradebotmanager.bots_usuarios_op_mkt.repository import BotUsuarioOpMktRepository
+
+
+def criar_associacoes(sessao, *estados):
+    """Associações (copy_trade_id, ativo) sem checagem de chave estrangeira (SQLite)"""
+    associacoes = [
+        BotUsuarioOpMkt(usuario_id=1, bot_option_market_id=1, copy_trade_id=copy_trade_id, ativo=ativo)
+        for copy_trade_id, ativo in estados
+    ]
+    sessao.add_all(associacoes)
+    sessao.commit()
+    return [associacao.id for associacao in associacoes]
+
+
+def estado(sessao, associacao_id):
+    sessao.expire_all()
+    associacao = sessao.get(BotUsuarioOpMkt, associacao_id)
+    return associacao.copy_trade_id, associacao.ativo
+
+
+def test_aplica_correcoes_nas_linhas_iguais_ao_retrato(sessao):
+    ativar, desativar, completar = criar_associacoes(sessao, ("a", False), ("b", True), (None, False))
+
+    alteradas = BotUsuarioOpMktRepository(sessao).aplicar_correcoes(
+        {ativar: "a"}, {desativar: "b"}, {completar: ("c", False)}
+    )
+
+    assert alteradas == 3
+    assert estado(sessao, ativar) == ("a", True)
+    assert estado(sessao, desativar) == ("b", False)
+    assert estado(sessao, completar) == ("c", True)
+
+
+def test_ignora_linhas_alteradas_depois_do_retrato(sessao):
+    ativar, desativar, completar = criar_associacoes(sessao, ("a", False), ("b", True), (None, False))
+    # Alterações feitas entre o retrato e as correções (ex: o usuário seguiu de novo)
+    sessao.get(BotUsuarioOpMkt, ativar).copy_trade_id = "a2"
+    sessao.get(BotUsuarioOpMkt, desativar).ativo = False
+    sessao.get(BotUsuarioOpMkt, completar).copy_trade_id = "d"
+    sessao.commit()
+
+    alteradas = BotUsuarioOpMktRepository(sessao).aplicar_correcoes(
+        {ativar: "a"}, {desativar: "b"}, {completar: ("c", False)}
+    )
+
+    assert alteradas == 0
+    assert estado(sessao, ativar) == ("a2", False)
+    assert estado(sessao, desativar) == ("b", False)
+    assert estado(sessao, completar) == ("d", False)
+
+
+def test_copy_trade_id_vazio_fica_fora_do_indice_unico(sessao):
+    vazios = criar_associacoes(sessao, ("", False), ("", True), (None, False), (None, True), ("a", True))
+
+    assert len(vazios) == 5
+    assert BotUsuarioOpMktRepository(sessao).buscar_por_copy_trade_id("") is None
+    assert BotUsuarioOpMktRepository(sessao).buscar_por_copy_trade_id("a").id == vazios[4]
+    with pytest.raises(IntegrityError):
+        criar_associacoes(sessao, ("a", False))
@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from tradebotmanager.integracao.option_market.client_async import ClienteOptionMarketAsync
+from tradebotmanager.integracao.option_market.disjuntor import CircuitoAberto, Disjuntor
+from tradebotmanager.integracao.option_market.limitador import LimitadorRequisicoes
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """time.monotonic controlado pelo teste"""
+    agora = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: agora[0])
+    return agora
+
+
+def criar_disjuntor():
+    return Disjuntor(janela=10, minimo_chamadas=4, limite_erros=0.5, duracao_lenta=5, tempo_aberto=30, chamadas_teste=2)
+
+
+def chamar(disjuntor, sucesso=True, duracao=0.1):
+    disjuntor.registrar(sucesso, duracao, disjuntor.verificar())
+
+
+def abrir(disjuntor):
+    for _ in range(4):
+        chamar(disjuntor, sucesso=False)
+    assert disjuntor.estado == Disjuntor.ABERTO
+
+
+def test_fechado_so_abre_depois_do_minimo_de_chamadas():
+    disjuntor = criar_disjuntor()
+
+    for _ in range(3):
+        chamar(disjuntor, sucesso=False)
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+    chamar(disjuntor, sucesso=False)
+    assert disjuntor.estado == Disjuntor.ABERTO
+    assert disjuntor.aberturas == 1
+
+
+def test_abre_com_chamadas_lentas():
+    disjuntor = criar_disjuntor()
+
+    for _ in range(4):
+        chamar(disjuntor, duracao=6)
+
+    assert disjuntor.estado == Disjuntor.ABERTO
+
+
+def test_aberto_rejeita_sem_chamar_a_corretora(relogio):
+    disjuntor = criar_disjuntor()
+    abrir(disjuntor)
+
+    with pytest.raises(CircuitoAberto):
+        disjuntor.verificar()
+    assert disjuntor.rejeitadas == 1
+
+
+def test_meio_aberto_limita_testes_e_fecha_com_sucessos(relogio):
+    disjuntor = criar_disjuntor()
+    abrir(disjuntor)
+    relogio[0] += 30
+
+    geracoes = [disjuntor.verificar(), disjuntor.verificar()]
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+    with pytest.raises(CircuitoAberto):
+        disjuntor.verificar()
+
+    for geracao in geracoes:
+        disjuntor.registrar(True, 0.1, geracao)
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+
+def test_meio_aberto_reabre_na_primeira_falha(relogio):
+    disjuntor = criar_disjuntor()
+    abrir(disjuntor)
+    relogio[0] += 30
+
+    chamar(disjuntor, sucesso=False)
+
+    assert disjuntor.estado == Disjuntor.ABERTO
+    assert disjuntor.aberturas == 2
+
+
+def test_resultado_de_chamada_iniciada_antes_da_abertura_e_ignorado(relogio):
+    disjuntor = criar_disjuntor()
+    antiga = disjuntor.verificar()
+    abrir(disjuntor)
+    relogio[0] += 30
+    teste = disjuntor.verificar()
+
+    # A chamada antiga termina com sucesso durante o meio aberto: não conta como teste
+    disjuntor.registrar(True, 0.1, antiga)
+    disjuntor.registrar(True, 0.1, disjuntor.verificar())
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+
+    disjuntor.registrar(True, 0.1, teste)
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+
+def test_falha_antiga_nao_entra_na_janela_do_novo_fechado(relogio):
+    disjuntor = criar_disjuntor()
+    antigas = [disjuntor.verificar() for _ in range(4)]
+    abrir(disjuntor)
+    relogio[0] += 30
+    chamar(disjuntor)
+    chamar(disjuntor)
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+    for geracao in antigas:
+        disjuntor.registrar(False, 0.1, geracao)
+
+    assert disjuntor.estado == Disjuntor.FECHADO
+    assert disjuntor.resumo()["chamadas_na_janela"] == 0
+
+
+def test_liberar_devolve_a_vaga_sem_contar_como_teste(relogio):
+    disjuntor = criar_disjuntor()
+    abrir(disjuntor)
+    relogio[0] += 30
+    cancelada, teste = disjuntor.verificar(), disjuntor.verificar()
+
+    disjuntor.liberar(cancelada)
+    disjuntor.registrar(True, 0.1, teste)
+
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+    disjuntor.registrar(True, 0.1, disjuntor.verificar())
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+
+def test_meio_aberto_recomeca_quando_os_testes_nao_concluem(relogio):
+    disjuntor = criar_disjuntor()
+    abrir(disjuntor)
+    relogio[0] += 30
+    presas = [disjuntor.verificar(), disjuntor.verificar()]
+
+    relogio[0] += disjuntor.tempo_meio_aberto
+    geracoes = [disjuntor.verificar(), disjuntor.verificar()]
+
+    # O resultado dos testes presos chega tarde e é ignorado
+    disjuntor.registrar(False, 0.1, presas[0])
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+    for geracao in geracoes:
+        disjuntor.registrar(True, 0.1, geracao)
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+
+def test_chamada_de_teste_cancelada_nao_prende_o_meio_aberto():
+    async def cancelar_login(cliente):
+        chegou = asyncio.Event()
+
+        async def nunca_responde(requisicao):
+            chegou.set()
+            await asyncio.Event().wait()
+
+        cliente.sessao = httpx.AsyncClient(base_url="http://corretora", transport=httpx.MockTransport(nunca_responde))
+        tarefa = asyncio.create_task(cliente._login())
+        await chegou.wait()
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+        await cliente.sessao.aclose()
+
+    cliente = ClienteOptionMarketAsync("conta@teste", "senha", sessao=object())
+    cliente.limitador = LimitadorRequisicoes(taxa_host=1e6, rajada_host=1e6, taxa_conta=1e6, rajada_conta=1e6)
+    cliente.disjuntor = Disjuntor(minimo_chamadas=1, tempo_aberto=0, chamadas_teste=1)
+    chamar(cliente.disjuntor, sucesso=False)
+
+    asyncio.run(cancelar_login(cliente))
+
+    assert cliente.disjuntor.estado == Disjuntor.MEIO_ABERTO
+    cliente.disjuntor.registrar(True, 0.1, cliente.disjuntor.verificar())
+    assert cliente.disjuntor.estado == Disjuntor.FECHADO
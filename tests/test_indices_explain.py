@@ -0,0 +1,78 @@
+"""
+Planos (EXPLAIN) das consultas dos repositories contra um Postgres real: cada
+uma deve usar o índice criado para ela em 0002_indices_consultas. Roda só com
+DATABASE_URL apontando para um Postgres; as tabelas são criadas num schema
+temporário, dentro de uma transação desfeita ao fim.
+"""
+import os
+import uuid
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from database import ModelBase
+from tradebotmanager.corretoras_usuarios.repository import CorretoraUsuarioRepository
+from tradebotmanager.bots_option_market.repository import BotOptionMarketRepository
+from tradebotmanager.bots_usuarios_op_mkt.repository import BotUsuarioOpMktRepository
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL or make_url(DATABASE_URL).get_backend_name() != "postgresql",
+    reason="EXPLAIN precisa de DATABASE_URL apontando para um Postgres",
+)
+
+
+@pytest.fixture(scope="module")
+def conexao():
+    engine = create_engine(DATABASE_URL)
+    with engine.connect() as conexao:
+        transacao = conexao.begin()
+        schema = f"teste_explain_{uuid.uuid4().hex[:8]}"
+        conexao.exec_driver_sql(f"CREATE SCHEMA {schema}")
+        conexao.exec_driver_sql(f"SET LOCAL search_path TO {schema}")
+        ModelBase.metadata.create_all(conexao)
+        # Tabelas vazias: sem isto o planejador prefere ler a tabela inteira
+        conexao.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        yield conexao
+        transacao.rollback()
+    engine.dispose()
+
+
+def plano(conexao, consultar):
+    """EXPLAIN dos SELECTs executados por consultar(sessao)"""
+    comandos = []
+
+    def capturar(_conexao, _cursor, comando, parametros, _contexto, _executemany):
+        if comando.lstrip().upper().startswith("SELECT"):
+            comandos.append((comando, parametros))
+
+    event.listen(conexao, "before_cursor_execute", capturar)
+    try:
+        with Session(bind=conexao, join_transaction_mode="create_savepoint") as sessao:
+            consultar(sessao)
+    finally:
+        event.remove(conexao, "before_cursor_execute", capturar)
+
+    assert comandos
+    return "\n".join(
+        linha
+        for comando, parametros in comandos
+        for (linha,) in conexao.exec_driver_sql(f"EXPLAIN {comando}", parametros)
+    )
+
+
+@pytest.mark.parametrize(
+    "consultar, indice",
+    [
+        (lambda s: BotUsuarioOpMktRepository(s).buscar_por_usuario_e_bot(1, 1), "ix_bots_usuarios_op_mkt_usuario_bot"),
+        (lambda s: BotUsuarioOpMktRepository(s).listar_por_bot(1), "ix_bots_usuarios_op_mkt_bot_ativo"),
+        (lambda s: BotUsuarioOpMktRepository(s).buscar_por_copy_trade_id("abc"), "uq_bots_usuarios_op_mkt_copy_trade_id"),
+        (lambda s: CorretoraUsuarioRepository(s).buscar_por_usuario_e_corretora(1, 1), "uq_corretoras_usuarios_usuario_corretora"),
+        (lambda s: CorretoraUsuarioRepository(s).buscar_por_login(1, "conta@teste"), "uq_corretoras_usuarios_corretora_login"),
+        (lambda s: CorretoraUsuarioRepository(s).listar_por_corretora(1), "ix_corretoras_usuarios_corretora_ativo"),
+        (lambda s: BotOptionMarketRepository(s).listar_por_corretora(1), "ix_bots_option_market_corretora"),
+    ],
+)
+def test_consulta_usa_o_indice(conexao, consultar, indice):
+    assert indice in plano(conexao, consultar)
@@ -0,0 +1,35 @@
+import logging
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from instrumentacao_banco import erros_comandos, escopo_consultas, instrumentar_comandos
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrumentar_comandos(engine, "teste", lambda duracao_ms: True)
+    yield engine
+    engine.dispose()
+
+
+def test_comando_com_erro_nao_deixa_inicio_na_conexao(engine, caplog):
+    erros_antes = erros_comandos.valores().get(("desconhecido",), 0)
+
+    with engine.connect() as conexao, escopo_consultas("teste") as escopo:
+        with pytest.raises(OperationalError):
+            conexao.execute(text("SELECT * FROM tabela_inexistente"))
+        conexao.execute(text("SELECT 1"))
+
+        assert conexao.info["inicio_comandos"] == []
+
+    assert escopo.comandos == 2
+    assert erros_comandos.valores()[("desconhecido",)] == erros_antes + 1
+    assert any("falhou" in registro.message for registro in caplog.records)
+
+
+def test_comandos_logados_em_warning(engine, caplog):
+    with caplog.at_level(logging.WARNING, logger="tradebotmanager.sql"), engine.connect() as conexao:
+        conexao.execute(text("SELECT 1"))
+
+    assert [registro.levelno for registro in caplog.records] == [logging.WARNING]
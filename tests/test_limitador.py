@@ -0,0 +1,169 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from tradebotmanager.integracao.option_market.client_async import ClienteOptionMarketAsync
+from tradebotmanager.integracao.option_market.disjuntor import Disjuntor
+from tradebotmanager.integracao.option_market.limitador import (
+    BaldeTokens,
+    LimitadorRequisicoes,
+    PoliticaRetentativa,
+    ler_retry_after,
+)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """time.monotonic controlado pelo teste"""
+    agora = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: agora[0])
+    return agora
+
+
+def test_balde_libera_a_rajada_e_depois_espera(relogio):
+    balde = BaldeTokens(taxa=2, capacidade=3)
+
+    assert [balde.reservar() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert balde.reservar() == pytest.approx(0.5)
+    assert balde.reservar() == pytest.approx(1.0)
+    assert balde.esperas == 2
+
+
+def test_balde_repoe_tokens_com_o_tempo(relogio):
+    balde = BaldeTokens(taxa=2, capacidade=3)
+    for _ in range(3):
+        balde.reservar()
+
+    relogio[0] += 1
+    assert balde.reservar() == 0.0
+    assert balde.reservar() == 0.0
+    assert balde.reservar() > 0
+
+
+def test_balde_reduz_a_taxa_no_429_e_recupera_aos_poucos():
+    balde = BaldeTokens(taxa=10, capacidade=10, taxa_minima=1)
+
+    balde.registrar_limitacao()
+    assert balde.taxa == 5
+    for _ in range(3):
+        balde.registrar_limitacao()
+    assert balde.taxa == 1
+
+    balde.registrar_sucesso()
+    assert balde.taxa == pytest.approx(1.5)
+    for _ in range(100):
+        balde.registrar_sucesso()
+    assert balde.taxa == 10
+
+
+def test_limitador_descarta_baldes_ociosos(relogio):
+    limitador = LimitadorRequisicoes(taxa_conta=1, rajada_conta=2, max_contas=2)
+    limitador.aguardar("a")
+    limitador.registrar_limitacao("b")
+
+    # Cheio e na taxa máxima: descartado; com taxa reduzida: mantido
+    relogio[0] += 10
+    limitador.aguardar("c")
+
+    assert set(limitador._contas) == {"b", "c"}
+    relogio[0] += 10
+    assert limitador.limpar_ociosos() == 1
+    assert set(limitador._contas) == {"b"}
+
+
+@pytest.mark.parametrize(
+    "metodo,endpoint,esperado",
+    [
+        ("GET", "/copy-trade?page=2", True),
+        ("POST", "/auth/login", True),
+        ("PATCH", "/copy-trade/abc/inactive", True),
+        ("PATCH", "/copy-trade/abc/approve-follower", True),
+        ("POST", "/copy-trade", False),
+        ("PATCH", "/copy-trade/abc", False),
+    ],
+)
+def test_politica_so_repete_operacoes_seguras(metodo, endpoint, esperado):
+    assert PoliticaRetentativa().pode_repetir(metodo, endpoint, 0) is esperado
+
+
+def test_politica_respeita_o_maximo_de_tentativas():
+    politica = PoliticaRetentativa(max_tentativas=3)
+
+    assert politica.pode_repetir("GET", "/copy-trade", 1)
+    assert not politica.pode_repetir("GET", "/copy-trade", 2)
+
+
+def test_politica_usa_retry_after_limitado_a_espera_maxima():
+    politica = PoliticaRetentativa(espera_base=0.5, espera_maxima=30)
+
+    assert politica.calcular_espera(0, "7") == 7
+    assert politica.calcular_espera(0, "120") == 30
+    for tentativa in range(5):
+        assert 0 <= politica.calcular_espera(tentativa) <= min(30, 0.5 * 2 ** tentativa)
+
+
+def test_ler_retry_after():
+    daqui_a_10s = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+
+    assert ler_retry_after("3") == 3
+    assert ler_retry_after("-1") == 0
+    assert 8 <= ler_retry_after(daqui_a_10s) <= 10
+    assert ler_retry_after(None) is None
+    assert ler_retry_after("amanhã") is None
+
+
+def criar_cliente(respostas):
+    """Cliente assíncrono cujo login recebe as respostas na ordem; devolve também a lista de chamadas"""
+    chamadas = []
+
+    def responder(requisicao: httpx.Request) -> httpx.Response:
+        chamadas.append(requisicao.url.path)
+        return respostas[len(chamadas) - 1]
+
+    sessao = httpx.AsyncClient(base_url="http://corretora", transport=httpx.MockTransport(responder))
+    cliente = ClienteOptionMarketAsync("conta@teste", "senha", sessao=sessao)
+    cliente.limitador = LimitadorRequisicoes(taxa_host=1e6, rajada_host=1e6, taxa_conta=1e6, rajada_conta=1e6)
+    cliente.politica_retentativa = PoliticaRetentativa(max_tentativas=3, espera_base=0.01)
+    cliente.disjuntor = Disjuntor()
+    return cliente, chamadas
+
+
+def test_login_repete_apos_429_respeitando_retry_after(monkeypatch):
+    esperas = []
+
+    async def dormir(segundos):
+        esperas.append(segundos)
+
+    monkeypatch.setattr(asyncio, "sleep", dormir)
+    cliente, chamadas = criar_cliente([
+        httpx.Response(429, headers={"Retry-After": "2"}, json={}),
+        httpx.Response(200, json={"token": "novo"}),
+    ])
+
+    assert asyncio.run(cliente._login()) == "novo"
+    assert chamadas == ["/auth/login", "/auth/login"]
+    assert esperas == [2]
+
+
+def test_login_desiste_apos_o_maximo_de_tentativas(monkeypatch):
+    async def dormir(segundos):
+        pass
+
+    monkeypatch.setattr(asyncio, "sleep", dormir)
+    cliente, chamadas = criar_cliente([httpx.Response(503, json={"data": {"message": "fora do ar"}})] * 3)
+
+    with pytest.raises(ValueError, match="fora do ar"):
+        asyncio.run(cliente._login())
+    assert len(chamadas) == 3
+
+
+def test_login_nao_repete_credenciais_invalidas():
+    cliente, chamadas = criar_cliente([httpx.Response(401, json={"data": {"message": "Senha inválida"}})])
+
+    with pytest.raises(ValueError, match="Senha inválida"):
+        asyncio.run(cliente._login())
+    assert len(chamadas) == 1
@@ -0,0 +1,108 @@
+import pytest
+
+from tradebotmanager.integracao.option_market.repository import (
+    TAMANHO_PAGINA_PADRAO,
+    OptionMarketRepository,
+)
+
+
+class ClienteFalso:
+    """Responde GET /copy-trade a partir de uma lista, registrando as páginas pedidas"""
+
+    def __init__(self, bots):
+        self.email = "conta@teste"
+        self.bots = bots
+        self.paginas_pedidas = []
+
+    def get(self, caminho, parametros):
+        # Como a API, nunca devolve mais que TAMANHO_PAGINA_PADRAO itens por página
+        pagina, tamanho = parametros["page"], min(parametros["pageSize"], TAMANHO_PAGINA_PADRAO)
+        self.paginas_pedidas.append(pagina)
+        return {"data": self.bots[(pagina - 1) * tamanho:pagina * tamanho]}
+
+
+def criar_bots(quantidade):
+    return [{"id": str(i), "active": True} for i in range(quantidade)]
+
+
+def test_iterar_bots_percorre_todas_as_paginas():
+    cliente = ClienteFalso(criar_bots(25))
+    repositorio = OptionMarketRepository(cliente, cache=None)
+
+    bots = list(repositorio.iterar_bots(tamanho_pagina=10))
+
+    assert [bot["id"] for bot in bots] == [str(i) for i in range(25)]
+    assert cliente.paginas_pedidas == [1, 2, 3]
+
+
+def test_iterar_bots_pagina_cheia_no_fim_pede_uma_pagina_vazia():
+    cliente = ClienteFalso(criar_bots(20))
+
+    bots = list(OptionMarketRepository(cliente, cache=None).iterar_bots(tamanho_pagina=10))
+
+    assert len(bots) == 20
+    assert cliente.paginas_pedidas == [1, 2, 3]
+
+
+def test_iterar_bots_tamanho_acima_do_limite_da_api_nao_trunca():
+    cliente = ClienteFalso(criar_bots(250))
+
+    bots = list(OptionMarketRepository(cliente, cache=None).iterar_bots(tamanho_pagina=200))
+
+    assert [bot["id"] for bot in bots] == [str(i) for i in range(250)]
+    assert cliente.paginas_pedidas == [1, 2, 3]
+
+
+def test_iterar_bots_interrompido_nao_busca_paginas_seguintes():
+    cliente = ClienteFalso(criar_bots(50))
+
+    for bot in OptionMarketRepository(cliente, cache=None).iterar_bots(tamanho_pagina=10):
+        if bot["id"] == "12":
+            break
+
+    assert cliente.paginas_pedidas == [1, 2]
+
+
+def test_iterar_bots_com_pre_carregamento_devolve_a_mesma_ordem():
+    cliente = ClienteFalso(criar_bots(35))
+
+    bots = list(OptionMarketRepository(cliente, cache=None).iterar_bots(tamanho_pagina=10, pre_carregar=True))
+
+    assert [bot["id"] for bot in bots] == [str(i) for i in range(35)]
+
+
+def test_buscar_bot_para_na_pagina_que_contem_o_id():
+    cliente = ClienteFalso(criar_bots(450))
+
+    bot = OptionMarketRepository(cliente, cache=None).buscar_bot("150")
+
+    assert bot == {"id": "150", "active": True}
+    assert cliente.paginas_pedidas == [1, 2]
+
+
+def test_buscar_bot_inexistente_retorna_none():
+    cliente = ClienteFalso(criar_bots(150))
+
+    assert OptionMarketRepository(cliente, cache=None).buscar_bot("999") is None
+    assert cliente.paginas_pedidas == [1, 2]
+
+
+def test_forcar_aprovacao_invalida_o_cache_mesmo_se_o_refuse_falhar():
+    class ClienteRecusaFalha:
+        email = "conta@teste"
+
+        def patch(self, caminho, dados):
+            raise ConnectionError("fora do ar")
+
+    class CacheFalso:
+        def __init__(self):
+            self.invalidados = []
+
+        def invalidar(self, conta, broker_copy_id):
+            self.invalidados.append((conta, broker_copy_id))
+
+    cache = CacheFalso()
+
+    with pytest.raises(RuntimeError, match="recusar"):
+        OptionMarketRepository(ClienteRecusaFalha(), cache=cache).forcar_aprovacao("a")
+    assert cache.invalidados == [("conta@teste", "a")]
@@ -0,0 +1,55 @@
+from metricas import RegistroMetricas
+
+
+def test_contador_com_rotulos_escapados():
+    registro = RegistroMetricas()
+    contador = registro.contador("requisicoes_total", "Requisições", ("metodo", "endpoint"))
+
+    contador.incrementar("GET", '/a"b')
+    contador.incrementar("GET", '/a"b', valor=2)
+
+    assert registro.gerar_texto() == (
+        "# HELP requisicoes_total Requisições\n"
+        "# TYPE requisicoes_total counter\n"
+        'requisicoes_total{metodo="GET",endpoint="/a\\"b"} 3\n'
+    )
+
+
+def test_contador_sem_rotulos_e_registro_reaproveita_a_metrica():
+    registro = RegistroMetricas()
+
+    registro.contador("eventos_total", "Eventos").incrementar()
+    registro.contador("eventos_total", "Eventos").incrementar()
+
+    assert registro.gerar_texto().splitlines()[-1] == "eventos_total 2"
+
+
+def test_histograma_acumula_buckets():
+    registro = RegistroMetricas()
+    histograma = registro.histograma("duracao_segundos", "Duração", ("rota",), buckets=(0.1, 1))
+
+    for valor in (0.05, 0.1, 0.5, 3):
+        histograma.observar(valor, "/x")
+
+    assert registro.gerar_texto().splitlines()[2:] == [
+        'duracao_segundos_bucket{rota="/x",le="0.1"} 2',
+        'duracao_segundos_bucket{rota="/x",le="1"} 3',
+        'duracao_segundos_bucket{rota="/x",le="+Inf"} 4',
+        'duracao_segundos_sum{rota="/x"} 3.65',
+        'duracao_segundos_count{rota="/x"} 4',
+    ]
+
+
+def test_coletor_lido_sob_demanda():
+    registro = RegistroMetricas()
+    estado = {"valor": 1}
+    registro.coletor("fila", "gauge", "Itens na fila", lambda: [({"nome": "a"}, estado["valor"]), ({}, 7)])
+
+    estado["valor"] = 5
+
+    assert registro.gerar_texto() == (
+        "# HELP fila Itens na fila\n"
+        "# TYPE fila gauge\n"
+        'fila{nome="a"} 5.0\n'
+        "fila 7.0\n"
+    )
@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from sqlalchemy import Boolean, Column, Integer, String, create_engine, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, declarative_base
+import operacoes_lote
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "itens"
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50), nullable=False)
+    ativo = Column(Boolean, default=True, nullable=False)
+
+
+@pytest.fixture
+def sessao():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as sessao:
+        yield sessao
+    engine.dispose()
+
+
+def criar(sessao, *nomes):
+    return operacoes_lote.criar_em_lote(sessao, [Item(nome=nome) for nome in nomes])
+
+
+def estado(sessao):
+    sessao.expire_all()
+    return [(item.nome, item.ativo) for item in sessao.scalars(select(Item).order_by(Item.id))]
+
+
+def test_criar_em_lote_divide_em_fatias_e_mantem_a_ordem(sessao):
+    criados = operacoes_lote.criar_em_lote(sessao, [Item(nome=f"item{i}") for i in range(7)], tamanho_lote=3)
+
+    # Legíveis após o commit, sem SELECT por objeto
+    assert [item.nome for item in criados] == [f"item{i}" for i in range(7)]
+    assert all(item.id is not None and item.ativo for item in criados)
+    assert len(estado(sessao)) == 7
+
+
+def test_criar_em_lote_vazio_nao_acessa_o_banco(sessao):
+    assert operacoes_lote.criar_em_lote(sessao, []) == []
+
+
+def test_atualizar_em_lote_pela_chave_primaria(sessao):
+    a, b, _ = criar(sessao, "a", "b", "c")
+
+    enviados = operacoes_lote.atualizar_em_lote(
+        sessao, Item, [{"id": a.id, "nome": "a2"}, {"id": b.id, "ativo": False}], tamanho_lote=1
+    )
+
+    assert enviados == 2
+    assert estado(sessao) == [("a2", True), ("b", False), ("c", True)]
+
+
+def test_definir_ativo_em_lote_retorna_so_os_que_mudaram(sessao):
+    a, b, c = criar(sessao, "a", "b", "c")
+    operacoes_lote.definir_ativo(sessao, Item, b.id, False)
+
+    alterados = operacoes_lote.definir_ativo_em_lote(sessao, Item, [a.id, b.id, c.id], False, tamanho_lote=2)
+
+    assert sorted(alterados) == [a.id, c.id]
+    assert estado(sessao) == [("a", False), ("b", False), ("c", False)]
+
+
+def test_definir_ativo_de_linha_inexistente(sessao):
+    assert operacoes_lote.definir_ativo(sessao, Item, 999, False) is False
+
+
+def test_atualizar_por_id_ignora_chaves_que_nao_sao_colunas(sessao):
+    (item,) = criar(sessao, "a")
+
+    atualizado = operacoes_lote.atualizar_por_id(sessao, Item, item.id, {"nome": "b", "id": 50, "extra": 1})
+
+    assert (atualizado.id, atualizado.nome) == (item.id, "b")
+    assert operacoes_lote.atualizar_por_id(sessao, Item, item.id, {"extra": 1}).nome == "b"
+    assert operacoes_lote.atualizar_por_id(sessao, Item, 999, {"nome": "c"}) is None
+
+
+def test_atualizar_por_id_sem_colunas_so_le_a_linha(sessao):
+    (item,) = criar(sessao, "a")
+    comandos = []
+    event.listen(sessao.get_bind(), "before_cursor_execute", lambda *args: comandos.append(args[2]))
+
+    lido = operacoes_lote.atualizar_por_id(sessao, Item, item.id, {"extra": 1})
+
+    assert lido.nome == "a"
+    assert operacoes_lote.atualizar_por_id(sessao, Item, 999, {}) is None
+    assert comandos and all(comando.lstrip().upper().startswith("SELECT") for comando in comandos)
+
+
+def test_falha_desfaz_o_lote_inteiro(sessao):
+    criar(sessao, "a")
+
+    with pytest.raises(Exception):
+        # A segunda fatia viola o NOT NULL de nome
+        operacoes_lote.criar_em_lote(sessao, [Item(nome="b"), Item(nome=None)], tamanho_lote=1)
+
+    assert estado(sessao) == [("a", True)]
+
+
+def test_versoes_assincronas():
+    async def executar():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conexao:
+            await conexao.run_sync(Base.metadata.create_all)
+        # Como a fábrica da aplicação (BancoDeDadosAsync)
+        async with AsyncSession(engine, expire_on_commit=False) as sessao:
+            a, b = await operacoes_lote.criar_em_lote_async(sessao, [Item(nome="a"), Item(nome="b")])
+            await operacoes_lote.atualizar_em_lote_async(sessao, Item, [{"id": a.id, "nome": "a2"}])
+            alterados = await operacoes_lote.definir_ativo_em_lote_async(sessao, Item, [a.id, b.id], False)
+            reativado = await operacoes_lote.definir_ativo_async(sessao, Item, b.id, True)
+            atualizado = await operacoes_lote.atualizar_por_id_async(sessao, Item, b.id, {"nome": "b2"})
+            lido = await operacoes_lote.atualizar_por_id_async(sessao, Item, b.id, {})
+            itens = (await sessao.execute(select(Item.nome, Item.ativo).order_by(Item.id))).all()
+        await engine.dispose()
+        return sorted(alterados), reativado, (atualizado.nome, lido.nome), itens, [a.id, b.id]
+
+    alterados, reativado, nomes, itens, ids = asyncio.run(executar())
+
+    assert alterados == ids
+    assert reativado is True
+    assert nomes == ("b2", "b2")
+    assert itens == [("a2", False), ("b2", True)]
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import Column, Integer, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+from paginacao import iterar, paginar, proximo_cursor
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "itens"
+
+    id = Column(Integer, primary_key=True)
+
+
+# Ids fora de ordem e com buracos, como depois de exclusões
+IDS = [7, 2, 30, 11, 5, 19, 3]
+
+
+@pytest.fixture
+def sessao():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as sessao:
+        sessao.add_all(Item(id=item_id) for item_id in IDS)
+        sessao.commit()
+        yield sessao
+    engine.dispose()
+
+
+def percorrer(buscar, limite):
+    """Busca páginas seguindo proximo_cursor até a última; devolve os ids de cada página"""
+    paginas, cursor = [], None
+    while True:
+        itens = buscar(cursor)
+        paginas.append([item.id for item in itens])
+        cursor = proximo_cursor(itens, limite)
+        if cursor is None:
+            return paginas
+
+
+def test_paginar_select_percorre_tudo_em_ordem_de_id(sessao):
+    paginas = percorrer(lambda cursor: sessao.scalars(paginar(select(Item), Item, cursor, 3)).all(), 3)
+
+    assert paginas == [[2, 3, 5], [7, 11, 19], [30]]
+
+
+def test_paginar_query_legada(sessao):
+    paginas = percorrer(lambda cursor: paginar(sessao.query(Item), Item, cursor, 4).all(), 4)
+
+    assert paginas == [[2, 3, 5, 7], [11, 19, 30]]
+
+
+def test_ultima_pagina_cheia_termina_com_pagina_vazia(sessao):
+    paginas = percorrer(lambda cursor: sessao.scalars(paginar(select(Item), Item, cursor, 7)).all(), 7)
+
+    assert paginas == [sorted(IDS), []]
+
+
+def test_sem_cursor_nem_limite_mantem_a_consulta():
+    consulta = select(Item)
+
+    assert paginar(consulta, Item) is consulta
+    assert proximo_cursor([Item(id=1)], None) is None
+
+
+def test_apos_id_sem_limite_traz_o_restante(sessao):
+    assert [item.id for item in sessao.scalars(paginar(select(Item), Item, apos_id=11))] == [19, 30]
+
+
+def test_iterar_em_lotes(sessao):
+    assert sorted(item.id for item in iterar(sessao, select(Item), tamanho_lote=2)) == sorted(IDS)
+    assert sorted(item_id for (item_id,) in iterar(sessao, select(Item.id), objetos=False)) == sorted(IDS)
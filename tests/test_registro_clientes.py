@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from tradebotmanager.integracao.option_market import tokens
+from tradebotmanager.integracao.option_market.registro import RegistroClientes
+
+
+class ClienteFalso:
+    def __init__(self, email, senha):
+        self.email = email
+        self.senha = senha
+        self.desconectado = False
+
+    def desconectar(self):
+        self.desconectado = True
+
+
+def criar_conta(conta_id=1):
+    return SimpleNamespace(id=conta_id, login=f"conta{conta_id}@teste", senha="senha", token_jwt=None)
+
+
+def registrar(registro, conta):
+    """Cliente já autenticado no registro, sem login na corretora"""
+    cliente = ClienteFalso(conta.login, conta.senha)
+    registro._clientes[conta.id] = (cliente, 0.0)
+    tokens.obter_gerenciador_token(conta)
+    return cliente
+
+
+def test_cliente_em_uso_so_desconecta_e_esquece_o_token_na_liberacao():
+    registro = RegistroClientes(tempo_ocioso=0)
+    conta = criar_conta()
+    cliente = registrar(registro, conta)
+
+    with registro.usar(conta) as em_uso:
+        assert em_uso is cliente
+        # Limpeza no meio do uso: sai do registro, mas continua conectado e com token
+        assert registro.limpar_ociosos() == 1
+        assert not cliente.desconectado
+        assert conta.id in tokens._gerenciadores
+        assert registro.estatisticas()["aguardando_liberacao"] == 1
+
+    assert cliente.desconectado
+    assert conta.id not in tokens._gerenciadores
+    assert registro.estatisticas()["aguardando_liberacao"] == 0
+
+
+def test_token_mantido_se_a_conta_ganhou_outro_cliente():
+    registro = RegistroClientes(tempo_ocioso=0)
+    conta = criar_conta(2)
+    antigo = registrar(registro, conta)
+
+    with registro.usar(conta):
+        registro.limpar_ociosos()
+        novo = registrar(registro, conta)
+
+    assert antigo.desconectado and not novo.desconectado
+    assert conta.id in tokens._gerenciadores
+    tokens.remover_gerenciadores_token([conta.id])
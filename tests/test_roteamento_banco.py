@@ -0,0 +1,75 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from roteamento_banco import Replica
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: agora[0])
+    return agora
+
+
+class ReplicaFalsa(Replica):
+    """Réplica com o atraso definido pelo teste, contando as medições"""
+
+    def __init__(self, atraso):
+        super().__init__("teste", create_engine("sqlite://"), atraso_max=5, intervalo_verificacao=5)
+        self.proximo_atraso = atraso
+        self.medicoes = 0
+
+    def _medir_atraso(self):
+        self.medicoes += 1
+        return self.proximo_atraso
+
+
+def test_disponivel_so_le_a_ultima_medicao(relogio):
+    replica = ReplicaFalsa(atraso=1)
+
+    # Nunca medida: leituras na primária
+    assert replica.disponivel() is False
+    replica.medir()
+    relogio[0] += 60
+    assert [replica.disponivel() for _ in range(3)] == [False] * 3
+    assert replica.medicoes == 1
+
+
+def test_medicao_recente_dentro_e_fora_do_limite(relogio):
+    replica = ReplicaFalsa(atraso=1)
+    replica.medir()
+    assert replica.disponivel() is True
+
+    replica.proximo_atraso = 10
+    replica.medir()
+    assert replica.disponivel() is False
+
+    replica.proximo_atraso = None
+    replica.medir()
+    assert replica.disponivel() is False
+
+
+def test_medicao_parada_ha_mais_de_tres_intervalos(relogio):
+    replica = ReplicaFalsa(atraso=0)
+    replica.medir()
+
+    relogio[0] += 15
+    assert replica.disponivel() is True
+    relogio[0] += 1
+    assert replica.disponivel() is False
+
+
+def test_medir_async_com_engine_assincrona():
+    async def medir():
+        engine_async = create_async_engine("sqlite+aiosqlite://")
+        replica = Replica("teste", engine_async.sync_engine, engine_async=engine_async)
+        await replica.medir_async()
+        await engine_async.dispose()
+        return replica
+
+    replica = asyncio.run(medir())
+
+    assert replica.atraso == 0.0
+    assert replica.disponivel() is True
@@ -0,0 +1,40 @@
+"""
+Orçamento do tempo de import da aplicação (python -X importtime), que é
+quanto o processo leva para começar a subir. Cobre o que foi adiado para o
+primeiro uso: engines, models e o cloudscraper.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Generoso para máquinas de CI lentas; hoje o import fica perto de 0,5 s.
+# FastAPI e SQLAlchemy sozinhos já são a maior parte.
+ORCAMENTO_US = int(os.getenv("ORCAMENTO_IMPORT_US", 2_000_000))
+
+
+def medir_import(modulo):
+    """{módulo: tempo acumulado em µs} do import de `modulo` num processo novo"""
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join([str(RAIZ / "src"), str(RAIZ / "src" / "tradebotmanager")]))
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, env=ambiente, cwd=RAIZ, check=True,
+    )
+    tempos = {}
+    # import time: self [us] | cumulative | imported package
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        tempos[nome.strip()] = int(acumulado)
+    return tempos
+
+
+def test_import_da_aplicacao_dentro_do_orcamento():
+    tempos = medir_import("tradebotmanager.main")
+
+    assert tempos["tradebotmanager.main"] <= ORCAMENTO_US
+    # Carregado só no primeiro uso (registro de clientes), nunca no import
+    assert "cloudscraper" not in tempos